@@ -0,0 +1,295 @@
+import os
+import csv
+import time
+import argparse
+import struct
+import threading
+
+# ======= Configuration =======
+FLUSH_INTERVAL = 60  # Seconds between flushes of buffered records to the OS
+BUFFER_BYTES = 64 * 1024  # Userspace write buffer
+# =============================
+
+# header: magic | layout version | per-core columns | flags | watched
+# processes, padded to 16 bytes, then one NAME_SIZE name per process
+HEADER = struct.Struct("<4sBHBB7x")
+MAGIC = b"RLOG"
+LAYOUT_VERSION = 2  # 2 added process columns; version 1 files still load
+FLAG_NETWORK = 1  # Records carry rx and tx Mbps
+NAME_SIZE = 32
+
+
+def record_format(cores=0, network=False, processes=()):
+    """Little-endian record: epoch ns (int64), cpu %, ram % (float32), then
+    one float32 per core, rx/tx Mbps and cpu % / RSS MB per process when
+    present."""
+    return "<qff" + "f" * cores + ("ff" if network else "") + "ff" * len(processes)
+
+
+def column_names(cores=0, network=False, processes=()):
+    names = ["t_ns", "cpu", "ram"] + [f"cpu{i}" for i in range(cores)]
+    names += ["rx_mbps", "tx_mbps"] if network else []
+    for process in processes:
+        names += [f"{process}_cpu", f"{process}_rss_mb"]
+    return names
+
+
+def header_size(processes=()):
+    return HEADER.size + NAME_SIZE * len(processes)
+
+
+def read_header(f):
+    """(cores, network, process names) of an open log, ValueError if it is
+    not one; leaves `f` at the first record."""
+    data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated header")
+    magic, version, cores, flags, count = HEADER.unpack(data)
+    if magic != MAGIC or version not in (1, LAYOUT_VERSION):
+        raise ValueError("Not a resource log (or an unsupported layout)")
+    names = f.read(NAME_SIZE * count)
+    if len(names) < NAME_SIZE * count:
+        raise ValueError("Truncated header")
+    processes = tuple(
+        names[i:i + NAME_SIZE].rstrip(b"\0").decode() for i in range(0, len(names), NAME_SIZE)
+    )
+    return cores, bool(flags & FLAG_NETWORK), processes
+
+
+class BinaryLogWriter:
+    """Append-only log of fixed-width records behind a small header.
+
+    The header fixes the columns, so the file maps straight onto a NumPy
+    structured array (load()).  Appending to an existing file requires the
+    same columns; a record torn by a crash is cut off when reopening.
+    """
+
+    def __init__(self, path, cores=0, network=False, flush_interval=FLUSH_INTERVAL,
+                 processes=()):
+        self.path = path
+        self.cores = cores
+        self.network = network
+        self.processes = tuple(processes)
+        self.flush_interval = flush_interval
+        self.record = struct.Struct(record_format(cores, network, self.processes))
+        if os.path.isfile(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                layout = read_header(f)
+            if layout != (cores, network, self.processes):
+                raise ValueError(f"{path} holds {layout[0]} core columns, network={layout[1]}, "
+                                 f"processes {', '.join(layout[2]) or 'none'}")
+            size = os.path.getsize(path)
+            torn = (size - header_size(self.processes)) % self.record.size
+            if torn:
+                os.truncate(path, size - torn)
+            self.file = open(path, "ab", buffering=BUFFER_BYTES)
+        else:
+            self.file = open(path, "wb", buffering=BUFFER_BYTES)
+            self.file.write(HEADER.pack(MAGIC, LAYOUT_VERSION, cores,
+                                        FLAG_NETWORK if network else 0, len(self.processes)))
+            for process in self.processes:
+                self.file.write(process.encode()[:NAME_SIZE].ljust(NAME_SIZE, b"\0"))
+        self.last_flush = time.monotonic()
+
+    def append(self, t_ns, cpu, ram, per_core=(), rx_mbps=0.0, tx_mbps=0.0, process_stats=()):
+        """One record; per_core is padded or cut to the file's core count,
+        process_stats holds one (cpu %, RSS MB) pair per watched process."""
+        values = [t_ns, cpu, ram]
+        if self.cores:
+            per_core = list(per_core[:self.cores])
+            values += per_core + [0.0] * (self.cores - len(per_core))
+        if self.network:
+            values += [rx_mbps, tx_mbps]
+        for process_cpu, rss_mb in process_stats:
+            values += [process_cpu, rss_mb]
+        self.file.write(self.record.pack(*values))
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def write_records(self, data):
+        """Append already packed records (e.g. drained from a RecordRing)."""
+        if len(data) % self.record.size:
+            raise ValueError(f"{len(data)} bytes is not a whole number of records")
+        self.file.write(data)
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self, sync=False):
+        self.file.flush()
+        if sync:
+            os.fsync(self.file.fileno())
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush(sync=True)
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, etype, value, traceback):
+        self.close()
+
+
+class RecordRing:
+    """Preallocated in-memory ring of packed records.
+
+    A sampling loop packs each record in place (no allocation, no I/O); a
+    writer periodically drains all pending records in one write, so slow
+    storage never delays a sample.  When the writer falls behind by more
+    than `capacity` records the oldest are overwritten and counted.
+    """
+
+    def __init__(self, fmt, capacity):
+        self.record = struct.Struct(fmt)
+        self.capacity = capacity
+        self.buffer = bytearray(self.record.size * capacity)
+        self.head = 0  # Index of the oldest pending record
+        self.count = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def append(self, *values):
+        with self.lock:
+            index = (self.head + self.count) % self.capacity
+            self.record.pack_into(self.buffer, index * self.record.size, *values)
+            if self.count == self.capacity:
+                self.head = (self.head + 1) % self.capacity
+                self.dropped += 1
+            else:
+                self.count += 1
+
+    def drain(self):
+        """All pending records, oldest first, as one bytes object."""
+        with self.lock:
+            size = self.record.size
+            end = self.head + self.count
+            if end <= self.capacity:
+                data = bytes(self.buffer[self.head * size:end * size])
+            else:
+                data = bytes(self.buffer[self.head * size:]) + bytes(
+                    self.buffer[:(end - self.capacity) * size]
+                )
+            self.head = self.count = 0
+        return data
+
+
+def load(path):
+    """Map a log as a read-only NumPy structured array (needs numpy)."""
+    import numpy as np
+
+    with open(path, "rb") as f:
+        cores, network, processes = read_header(f)
+    names = column_names(cores, network, processes)
+    dtype = np.dtype([(name, "<i8" if name == "t_ns" else "<f4") for name in names])
+    offset = header_size(processes)
+    count = (os.path.getsize(path) - offset) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+
+def iter_records(path):
+    """Records as tuples, without numpy (a torn last record is skipped)."""
+    with open(path, "rb") as f:
+        record = struct.Struct(record_format(*read_header(f)))
+        while True:
+            chunk = f.read(record.size * 4096)
+            usable = len(chunk) - len(chunk) % record.size
+            yield from record.iter_unpack(chunk[:usable])
+            if len(chunk) < record.size * 4096:
+                break
+
+
+def export_csv(path, out, millis=False):
+    """Write a log as CSV in the resources_log layout (local date and time,
+    extra per-core, network and process columns appended).  `millis` adds
+    milliseconds to the time, for high-resolution logs."""
+    with open(path, "rb") as f:
+        cores, network, processes = read_header(f)
+    header = ["Date", "Time", "CPU (%)", "RAM (%)"] + [f"CPU{i} (%)" for i in range(cores)]
+    if network:
+        header += ["RX (Mbps)", "TX (Mbps)"]
+    for process in processes:
+        header += [f"{process} CPU (%)", f"{process} RSS (MB)"]
+    rows = 0
+    with open(out, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for t_ns, *values in iter_records(path):
+            tm = time.localtime(t_ns / 1e9)
+            clock = f"{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}"
+            if millis:
+                clock += f".{t_ns // 1_000_000 % 1000:03d}"
+            writer.writerow(
+                [f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}", clock]
+                + [round(v, 2) for v in values]
+            )
+            rows += 1
+    return rows
+
+
+def benchmark(days=30, interval=10, cores=4):
+    """Load time of a `days`-long log at `interval` s, CSV vs binary."""
+    import random
+    import tempfile
+    import numpy as np
+
+    rows = days * 86400 // interval
+    start_ns = time.time_ns() - days * 86400 * 10**9
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "stats.rlog")
+        with BinaryLogWriter(log, cores, network=True) as writer:
+            for i in range(rows):
+                cpu = random.uniform(0, 100)
+                writer.append(start_ns + i * interval * 10**9, cpu, random.uniform(20, 80),
+                              [cpu] * cores, random.uniform(0, 5), random.uniform(0, 5))
+        wide = os.path.join(tmp, "stats_wide.csv")
+        export_csv(log, wide)
+        # The plain resources_log CSV (Date, Time, CPU, RAM) for a like-for-like load
+        narrow = os.path.join(tmp, "stats.csv")
+        with open(wide, newline="") as src, open(narrow, "w", newline="") as dst:
+            writer = csv.writer(dst)
+            for row in csv.reader(src):
+                writer.writerow(row[:4])
+
+        start = time.perf_counter()
+        with open(narrow, newline="") as f:
+            parsed = [
+                (time.mktime(time.strptime(f"{row['Date']} {row['Time']}", "%Y-%m-%d %H:%M:%S")),
+                 float(row["CPU (%)"]), float(row["RAM (%)"]))
+                for row in csv.DictReader(f)
+            ]
+        csv_mean = sum(row[1] for row in parsed) / len(parsed)
+        csv_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        data = load(log)
+        bin_mean = float(data["cpu"].mean())
+        bin_time = time.perf_counter() - start
+
+        print(f"{days} days at {interval} s: {rows} rows")
+        print(f"CSV    ({os.path.getsize(narrow) / 2**20:6.1f} MB, cpu/ram only):  "
+              f"{csv_time * 1000:8.1f} ms to load and average")
+        print(f"binary ({os.path.getsize(log) / 2**20:6.1f} MB, +{cores} cores, rx/tx): "
+              f"{bin_time * 1000:8.1f} ms to map and average")
+        print(f"mean cpu {csv_mean:.2f} / {bin_mean:.2f}")
+        del data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Binary resource log tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write a .rlog as CSV")
+    export.add_argument("log", help="binary log (.rlog)")
+    export.add_argument("out", nargs="?", help="CSV to write (default: LOG with .csv)")
+    export.add_argument("--ms", action="store_true", help="keep milliseconds in the Time column")
+    bench = commands.add_parser("benchmark", help="CSV vs binary load time")
+    bench.add_argument("days", nargs="?", type=int, default=30, help="days of 10 s samples")
+    args = parser.parse_args()
+    if args.command == "export":
+        out = args.out or os.path.splitext(args.log)[0] + ".csv"
+        print(f"Exported {export_csv(args.log, out, args.ms)} records to {out}")
+    else:
+        benchmark(args.days)
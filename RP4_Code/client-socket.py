@@ -1,64 +1,232 @@
+import os
 import time
+import base64
+import random
+import signal
 import socket
-import multiprocessing
-from crypto import encrypt, decrypt
-from client_data_cpu import main as cpu_main
-from ram import main as ram_main
-import subprocess
-
-# Make sure chmod +x firewall.sh
-FIREWALL_SCRIPT = "./firewall.sh"
+import asyncio
+from crypto import (
+    encrypt,
+    decrypt,
+    read_message_async,
+    message_info,
+    current_session_async,
+    reset_session,
+    MSG_RESPONSE,
+    MSG_BATCH,
+)
+from telemetry_codec import encode_report, encode_sample, encode_batch
+from measurement_pool import MeasurementPool
+from proc_sampler import ProcSampler
+from nft_rulesets import NftApplier
+from decision_policy import DecisionPolicy
+from report_scheduler import ReportScheduler
+from telemetry_buffer import TelemetryRing
+from scenario_replay import Scenario
+from event_journal import (
+    EventJournal,
+    SAMPLE,
+    REPORT_SENT,
+    RESPONSE_RECEIVED,
+    APPLY_STARTED,
+    APPLY_FINISHED,
+    LOCAL_DECISION,
+    FLAG_FAILED,
+)
+from latency_trace import StageHistograms
+
 RP5_IP = "192.168.30.114"
+USE_JSON_REPORTS = False  # Debug fallback: send reports as readable JSON
+REPORT_TIMEOUT = 5  # Deadline for connect + handshake + report + reply
+# Make sure sudo can run nft_helper.py without a password
+NFT_BINARY = None  # None = system nft; point at a stand-in nft to test
+USE_SUDO = True
+QUEUE_SIZE = 4  # Bounded queues; the oldest entry is dropped when full
+# Decide locally with the controller's policy before every report for an
+# immediate reaction (the controller still has the last word). When False,
+# the local policy is only used while the controller is unreachable.
+LOCAL_DECISIONS = False
+BATCH_SIZE = 128  # Buffered samples per upload message (fewer if too large)
+# Batches per upload connection; the controller serves at most 32 messages
+# per connection, the rest follows after the next report
+UPLOAD_BATCHES = 16
+UPLOAD_TIMEOUT = 30  # Deadline for uploading the whole backlog
+# Report only when metrics move or the profile would change; flat periods
+# back off from period_T to MAX_BACKOFF periods between reports
+ADAPTIVE_REPORTING = True
+MAX_BACKOFF = 12
+POLICY_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "decision_policy.bin")
+# Replay a recorded resources_log CSV instead of random load targets, so
+# runs of different controller versions see identical inputs
+SCENARIO_TRACE = None
+SCENARIO_COMPRESSION = 1.0  # 10 = play the trace ten times faster
+SCENARIO_LOOP = True  # Restart at the end; False holds the last sample
+TRAFFIC_SINK = None  # (host, port) receiving the replayed traffic as UDP
+# Journal sample -> report -> response -> apply events (events.journal) for
+# the latency tool on the controller (journal_latency.py)
+EVENT_JOURNAL = True
+# Carry trace context in each report; the controller echoes its receive,
+# decide and send times and the node keeps per-stage latency histograms
+# (printed on SIGUSR1 and at exit). Off: no timestamps are taken at all.
+TRACE_REPORTS = False
 
 hostname = socket.gethostname()
 print(f"({hostname}): Started ")
 
 
-def send_data_to_server(payload, binary_data, host=RP5_IP, port=9999):
+def journal_event(state, event, seq, **fields):
+    """Record an event if the journal is enabled"""
+    journal = state.get("journal")
+    if journal is not None:
+        journal.record(event, seq, **fields)
+
+
+def record_trace(histograms, sampled_at, picked_at, timings, response):
+    """Fold one traced report into the per-stage histograms"""
+    histograms.record("queue", (picked_at - sampled_at) * 1000)
+    for stage in ("serialize", "encrypt", "decrypt"):
+        if stage in timings:
+            histograms.record(stage, timings[stage])
+    trace = response.get("trace") if isinstance(response, dict) else None
+    if trace and "round_trip" in timings:
+        # Controller stages use only its own clock; no clock sync needed
+        histograms.record("server decide", (trace["decide"] - trace["recv"]) * 1000)
+        histograms.record("server reply", (trace["send"] - trace["decide"]) * 1000)
+        server_ms = (trace["send"] - trace["recv"]) * 1000
+        histograms.record("network", max(timings["round_trip"] - server_ms, 0.0))
+
+
+def put_latest(queue, item):
+    """Enqueue without blocking, discarding the oldest entry when full"""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+
+async def send_data_to_server(payload, host=RP5_IP, port=9999, timings=None):
+    """Send one report and return the decrypted response (or None).
+
+    With a `timings` dict the serialize, encrypt, round-trip and decrypt
+    durations (ms) are stored in it.
+    """
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-
-            print(f"({hostname}): Socket is open")
-            sock.connect((host, port))
-
-            print(f"({hostname}): Connection is established")
-            source_ip, source_port = sock.getsockname()
-            print(f"source_ip = {source_ip} ,source_port = {source_port}\n")
-            # Encrypt and send the .json payload
-            payload["source_ip"] = source_ip
-            payload["source_port"] = source_port
-            encrypted_payload = encrypt(payload)
-            sock.sendall(encrypted_payload)
-
-            print(f"({hostname}): Payload sent")
-
-            # Encrypt and send the binary data (simulating traffic)
-            encrypted_binary = encrypt(binary_data)
-            sock.sendall(encrypted_binary)
-
-            print(f"({hostname}): Sent binary data (simulated traffic): {binary_data}")
-
-            # Receive and decrypt the server response
-            encrypted_response = sock.recv(4096)
-            if encrypted_response:
-                response = decrypt(encrypted_response)
-                print(f"({hostname}): Received from server: {response}")
-                return response
-            else:
-                print(f"({hostname}): No response received from server")
-                return None
-            print("#" * 5)
+        print(f"({hostname}): Socket is open")
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError as e:
+        reset_session()
+        print(f"({hostname}): Error in communication: {str(e)}")
+        return None
+
+    try:
+        print(f"({hostname}): Connection is established")
+        source_ip, source_port = writer.get_extra_info("sockname")[:2]
+        print(f"source_ip = {source_ip} ,source_port = {source_port}\n")
+        # Handshake first if there is no session yet or it is due for rotation
+        session = await current_session_async(reader, writer)
+        # Encode and encrypt the telemetry report
+        payload["source_ip"] = source_ip
+        payload["source_port"] = source_port
+        if timings is not None:
+            started = time.perf_counter()
+        report = encode_report(payload, use_json=USE_JSON_REPORTS)
+        if timings is not None:
+            encoded = time.perf_counter()
+        encrypted_payload = encrypt(report, session=session)
+        if timings is not None:
+            sent = time.perf_counter()
+            timings["serialize"] = (encoded - started) * 1000
+            timings["encrypt"] = (sent - encoded) * 1000
+        writer.write(encrypted_payload)
+        await writer.drain()
+        _, node_id, counter = message_info(encrypted_payload)
+
+        print(f"({hostname}): Payload sent")
+
+        # Receive and decrypt the server response
+        result = await read_message_async(reader, lambda *_: [session])
+        if timings is not None:
+            received = time.perf_counter()
+            timings["round_trip"] = (received - sent) * 1000
+        encrypted_response = result and result[0]
+        if encrypted_response and message_info(encrypted_response) != (
+            MSG_RESPONSE,
+            node_id,
+            counter,
+        ):
+            print(f"({hostname}): Response does not match our report, dropped")
+            return None
+        if encrypted_response:
+            response = decrypt(encrypted_response, session=session)
+            if timings is not None:
+                timings["decrypt"] = (time.perf_counter() - received) * 1000
+            print(f"({hostname}): Received from server: {response}")
+            return response
+        else:
+            # Most likely the controller lost our session; handshake next time
+            reset_session()
+            print(f"({hostname}): No response received from server")
+            return None
     except Exception as e:
+        reset_session()
         print(f"({hostname}): Error in communication: {str(e)}")
         return None
+    finally:
+        writer.close()
 
 
-def client_loop(period_T=10):
-    cpu_queue = multiprocessing.Queue()
-    data_queue = multiprocessing.Queue()
-    ram_queue = multiprocessing.Queue()
-    current_profile = "Low Activity"  # Initial profile
+async def upload_backlog(ring, host=RP5_IP, port=9999):
+    """Send buffered samples in compressed batches on one connection,
+    dropping each batch from the ring once the controller acknowledges it"""
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError as e:
+        print(f"({hostname}): Backlog upload failed: {str(e)}")
+        return
+
+    try:
+        session = await current_session_async(reader, writer)
+        for _ in range(UPLOAD_BATCHES):
+            if not len(ring):
+                break
+            count = min(BATCH_SIZE, len(ring))
+            while True:
+                try:
+                    message = encrypt(
+                        encode_batch(ring.peek(count)), msg_type=MSG_BATCH, session=session
+                    )
+                    break
+                except ValueError:
+                    if count == 1:
+                        raise
+                    count //= 2  # Did not fit in one message
+            writer.write(message)
+            await writer.drain()
+            _, node_id, counter = message_info(message)
+
+            result = await read_message_async(reader, lambda *_: [session])
+            reply = result and result[0]
+            if not reply or message_info(reply) != (MSG_RESPONSE, node_id, counter):
+                reset_session()
+                print(f"({hostname}): Backlog batch not acknowledged")
+                return
+            ack = decrypt(reply, session=session)
+            if not isinstance(ack, dict) or ack.get("ingested") != count:
+                print(f"({hostname}): Backlog batch rejected: {ack}")
+                return
+            ring.drop(count)
+            print(f"({hostname}): Uploaded {count} buffered samples, {len(ring)} left")
+        ring.flush()
+    except Exception as e:
+        reset_session()
+        print(f"({hostname}): Backlog upload failed: {str(e)}")
+    finally:
+        writer.close()
 
+
+async def sampling_task(pool, period_T, reports, state, scenario=None):
+    """Produce one measurement per period, independent of the network"""
+    loop = asyncio.get_running_loop()
+    seq = 0  # Follows each sample through the journal
     while True:
         print("\n")
         print("-" * 40)
@@ -66,104 +234,278 @@ def client_loop(period_T=10):
         current_date = time.strftime("%Y-%m-%d")
         current_time = time.strftime("%H-%M-%S")
         print(f"({hostname}): [Date : {current_date}] | [Time : {current_time}]")
-        start_time = time.time()
 
-        # Run CPU and data generation
-        cpu_process = multiprocessing.Process(
-            target=cpu_main, args=(period_T, cpu_queue, data_queue)
+        # The pool blocks on its worker pipes for period_T, so run it off-loop
+        cpu_usage, traffic, ram_usage = await loop.run_in_executor(
+            None, lambda: pool.run_period(period_T, scenario=scenario)
         )
-        cpu_process.start()
-
-        # Run RAM monitoring
-        ram_process = multiprocessing.Process(
-            target=ram_main, args=(period_T, ram_queue)
+        if scenario is not None:
+            print(f"({hostname}): Scenario at {scenario.position:.0f}/{scenario.duration:.0f} s, "
+                  f"loop {scenario.loops + 1}")
+        print(
+            f"({hostname}): Traffic {traffic['mbps']} Mbps, {traffic['pps']} pkt/s, "
+            f"burstiness {traffic['burstiness']}"
         )
-        ram_process.start()
 
-        # Wait for both to complete
-        cpu_process.join()
-        ram_process.join()
+        seq += 1
+        journal_event(state, SAMPLE, seq, value=cpu_usage)
+        put_latest(reports, (seq, time.time(), cpu_usage, ram_usage, traffic["mbps"]))
+
+
+def load_cached_policy():
+    """Last policy received from the controller, so a reboot during an outage
+    can still decide locally"""
+    try:
+        with open(POLICY_CACHE, "rb") as f:
+            return DecisionPolicy.decode(f.read())
+    except (OSError, ValueError) as e:
+        print(f"({hostname}): No cached decision policy: {e}")
+        return None
+
+
+def install_policy(state, encoded):
+    """Adopt (and cache) a policy sent by the controller"""
+    data = base64.b64decode(encoded)
+    state["policy"] = DecisionPolicy.decode(data)
+    # Write aside and rename, so a crash never leaves a torn cache behind
+    tmp = POLICY_CACHE + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, POLICY_CACHE)
+    print(f"({hostname}): Installed decision policy v{state['policy'].version}")
+
 
-        # Retrieve data
-        cpu_usage = cpu_queue.get()
-        binary_data = data_queue.get()
-        ram_usage = ram_queue.get()
-        binary_size_bytes = len(binary_data)
+def decide_locally(state, changes, cpu, ram, traffic, seq=0, sampled_at=None):
+    """Evaluate the controller's policy on the node itself"""
+    policy = state["policy"]
+    if policy is None:
+        print(f"({hostname}): No decision policy yet, keeping {state['profile']}")
+        return
+    start = time.perf_counter()
+    new_profile = policy.decide(cpu, ram, traffic)
+    decision_ms = (time.perf_counter() - start) * 1000
+    print(
+        f"({hostname}): Local decision (policy v{policy.version}): "
+        f"{new_profile} in {decision_ms:.3f} ms"
+    )
+    journal_event(state, LOCAL_DECISION, seq, profile=new_profile, value=decision_ms)
+    if new_profile != state["profile"]:
+        state["profile"] = new_profile
+        state["local"] = True
+        state["cause"] = seq
+        state["cause_at"] = sampled_at
+        put_latest(changes, new_profile)
+
+
+async def reporting_task(reports, changes, state, scheduler=None, ring=None):
+    """Send samples with a deadline and queue profile changes; samples that
+    cannot be delivered go to the on-disk ring for a later batch upload"""
+    while True:
+        seq, sampled_at, cpu_usage, ram_usage, mbps = await reports.get()
+        histograms = state["trace"]
+        picked_at = time.time() if histograms is not None else 0.0
 
-        bits_per_second = (binary_size_bytes * 8) / period_T
-        mbps = round(bits_per_second / 1_000_000, 2)
+        if LOCAL_DECISIONS:
+            decide_locally(state, changes, cpu_usage, ram_usage, mbps, seq, sampled_at)
+        if scheduler is not None:
+            policy = state["policy"]
+            predicted = policy.decide(cpu_usage, ram_usage, mbps) if policy else None
+            reason = scheduler.observe(
+                time.monotonic(), (cpu_usage, ram_usage, mbps), predicted
+            )
+            if reason is None:
+                print(f"({hostname}): Metrics stable, next report within "
+                      f"{scheduler.interval:.0f}s")
+                continue
+            print(f"({hostname}): Reporting ({reason})")
 
         payload = {}
-        # Construct the .json payload with mock traffic
+        # Construct the report payload with the metered traffic (Mbps)
         payload["cpu"] = cpu_usage
         payload["ram"] = ram_usage
-        payload["traffic"] = f"{mbps}Mbps"
-        payload["current_profile"] = current_profile
+        payload["traffic"] = mbps
+        payload["current_profile"] = state["profile"]
+        # Acknowledge what the firewall actually enforces since the last report
+        applied = state["applied"]
+        payload["applied_profile"] = applied["profile"]
+        payload["apply_ms"] = applied["apply_ms"]
+        payload["apply_failed"] = applied["failed"]
+        payload["apply_pending"] = applied["profile"] != state["profile"]
+
+        timings = None
+        if histograms is not None:
+            payload["trace"] = {"id": random.getrandbits(64), "sampled_at": sampled_at}
+            timings = {}
 
         # Send data and get server response
-        response = send_data_to_server(payload, binary_data)
+        journal_event(state, REPORT_SENT, seq)
+        try:
+            response = await asyncio.wait_for(
+                send_data_to_server(payload, timings=timings), REPORT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            reset_session()
+            print(f"({hostname}): Report timed out after {REPORT_TIMEOUT}s")
+            response = None
+        if histograms is not None and response:
+            record_trace(histograms, sampled_at, picked_at, timings, response)
 
         # Update current_profile based on server response
         print(f"({hostname}): Starting the phase of decision\n")
         print(f"received response:{response}")
+        if not response and ring is not None:
+            # Controller down or busy: keep the sample for the next upload
+            ring.append(encode_sample(sampled_at, payload))
+            print(f"({hostname}): Buffered sample, {len(ring)} waiting")
+        elif response and ring is not None and len(ring):
+            try:
+                await asyncio.wait_for(upload_backlog(ring), UPLOAD_TIMEOUT)
+            except asyncio.TimeoutError:
+                reset_session()
+                print(f"({hostname}): Backlog upload timed out, {len(ring)} left")
+        if not response and not LOCAL_DECISIONS:
+            # Controller unreachable: fall back to its last policy
+            decide_locally(state, changes, cpu_usage, ram_usage, mbps, seq, sampled_at)
         if response and isinstance(response, dict):
+            if "policy" in response:
+                try:
+                    install_policy(state, response["policy"])
+                except (OSError, ValueError) as e:
+                    print(f"({hostname}): Bad decision policy: {e}")
+            if "min_interval" in response and scheduler is not None:
+                scheduler.rate_cap = float(response["min_interval"])
             if "profile" in response:
                 new_profile = response["profile"]
-                if new_profile != current_profile:  # Only apply if profile changes
-                    current_profile = new_profile
-                    print(
-                        f"({hostname}): Updated current_profile to: {current_profile}"
-                    )
-                    # Trigger the firewall script
-                    if apply_firewall_profile(current_profile):
-                        print(
-                            f"({hostname}): Firewall profile '{current_profile}' applied successfully"
-                        )
-                    else:
-                        print(
-                            f"({hostname}): Failed to apply firewall profile '{current_profile}'"
-                        )
+                journal_event(state, RESPONSE_RECEIVED, seq, profile=new_profile)
+                if scheduler is not None:
+                    scheduler.reported(time.monotonic(), new_profile)
+                if state["local"]:
+                    # Reconcile: the controller overrides local decisions
+                    print(f"({hostname}): Controller reachable, reconciling to {new_profile}")
+                    state["local"] = False
+                # Apply on a change, and retry a target the firewall failed on
+                if new_profile != state["profile"] or state["applied"]["failed"]:
+                    state["profile"] = new_profile
+                    print(f"({hostname}): Updated current_profile to: {new_profile}")
+                    state["cause"] = seq
+                    state["cause_at"] = sampled_at
+                    put_latest(changes, new_profile)
             elif "error" in response:
                 print(f"({hostname}): Server error: {response['error']}")
-        # Ensure the loop runs every period_T
-        elapsed_time = time.time() - start_time
-        if elapsed_time < period_T:
-            time.sleep(period_T - elapsed_time)
-
-
-def apply_firewall_profile(profile):
-    """Trigger the firewall.sh script with the specified profile."""
-    # Map profile names to Bash script arguments
-    profile_map = {
-        "Idle": "idle",
-        "Low Activity": "low",
-        "High Activity": "high",
-        "Critical Task": "critical",
-    }
 
-    if profile not in profile_map:
-        print(f"({hostname}): Error: Unknown profile '{profile}'")
-        return False
 
-    script_arg = profile_map[profile]
+async def firewall_task(changes, applier, state):
+    """Apply profile changes in the background, coalescing to the latest target.
+
+    The outcome is stored in state["applied"] and acknowledged to the
+    controller in the next report instead of an extra round trip.
+    """
+    while True:
+        profile = await changes.get()
+        # Skip intermediate targets that were superseded while we waited
+        while not changes.empty():
+            profile = changes.get_nowait()
+        applied = state["applied"]
+        if profile == applied["profile"] and not applied["failed"]:
+            continue
+        # Swap in the precompiled ruleset through the privileged helper
+        seq = state["cause"]  # Sample behind the latest target
+        journal_event(state, APPLY_STARTED, seq, profile=profile)
+        start = time.perf_counter()
+        ok = await apply_firewall_profile(applier, profile)
+        apply_ms = (time.perf_counter() - start) * 1000
+        journal_event(state, APPLY_FINISHED, seq, profile=profile, value=apply_ms,
+                      flags=0 if ok else FLAG_FAILED)
+        histograms = state["trace"]
+        if histograms is not None and ok:
+            histograms.record("apply", apply_ms)
+            if state["cause_at"]:
+                histograms.record("end to end", (time.time() - state["cause_at"]) * 1000)
+        if ok:
+            state["applied"] = {"profile": profile, "apply_ms": apply_ms, "failed": False}
+            print(f"({hostname}): Firewall profile '{profile}' applied successfully")
+        else:
+            # The previous ruleset stays in force; nft applies batches atomically
+            applied.update(apply_ms=apply_ms, failed=True)
+            print(f"({hostname}): Failed to apply firewall profile '{profile}'")
+
+
+async def run_client(period_T=10):
+    # CPU/RAM are read from /proc in the background; load generators are
+    # started once and reused every period.  Start the workers before the
+    # sampler thread, so no child is created while it holds a lock
+    sampler = ProcSampler()
+    pool = MeasurementPool(sampler=sampler, traffic_sink=TRAFFIC_SINK)
+    sampler.start()
+    scenario = None
+    if SCENARIO_TRACE:
+        scenario = Scenario.from_csv(SCENARIO_TRACE, SCENARIO_COMPRESSION, SCENARIO_LOOP)
+        print(f"({hostname}): Replaying {SCENARIO_TRACE} ({scenario.duration:.0f} s per loop)")
+    reports = asyncio.Queue(maxsize=QUEUE_SIZE)
+    changes = asyncio.Queue(maxsize=1)  # Only the latest target matters
+    state = {
+        "profile": "Low Activity",  # Initial profile
+        # Last firewall apply, acknowledged to the controller in each report
+        "applied": {"profile": None, "apply_ms": 0.0, "failed": False},
+        "policy": load_cached_policy(),  # Controller's policy for local decisions
+        "local": False,  # True while the profile comes from a local decision
+        "cause": 0,  # Sample seq that led to the latest queued profile
+        "cause_at": None,  # ... and when it was sampled (traced runs)
+        "trace": StageHistograms() if TRACE_REPORTS else None,
+        "journal": EventJournal() if EVENT_JOURNAL else None,
+    }
+    applier = NftApplier(nft=NFT_BINARY, use_sudo=USE_SUDO)
+    put_latest(changes, state["profile"])  # Enforce the initial profile too
+    scheduler = None
+    if ADAPTIVE_REPORTING:
+        scheduler = ReportScheduler(period_T, MAX_BACKOFF * period_T)
+    ring = TelemetryRing()
+    if state["trace"] is not None:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGUSR1, lambda: print(state["trace"].dump())
+        )
+
     try:
-        # Run the Bash script with sudo (nftables requires root)
-        result = subprocess.run(
-            ["sudo", FIREWALL_SCRIPT, script_arg],
-            check=True,  # Raise an error if the command fails
-            capture_output=True,  # Capture stdout/stderr
-            text=True,  # Return output as strings
+        await asyncio.gather(
+            sampling_task(pool, period_T, reports, state, scenario),
+            reporting_task(reports, changes, state, scheduler, ring),
+            firewall_task(changes, applier, state),
         )
+    finally:
+        await applier.close()
+        ring.close()
+        if state["journal"] is not None:
+            state["journal"].close()
+        if state["trace"] is not None:
+            print(state["trace"].dump())
+        pool.close()
+        sampler.stop()
+
+
+def client_loop(period_T=10):
+    asyncio.run(run_client(period_T))
+
+
+async def apply_firewall_profile(applier, profile):
+    """Apply the precompiled nftables ruleset for `profile` in one transaction."""
+    try:
+        result = await applier.apply(profile)
+    except (OSError, ValueError, asyncio.TimeoutError) as e:
+        print(f"({hostname}): Error applying firewall profile '{profile}': {e!r}")
+        return False
+
+    if not result["ok"]:
         print(
-            f"({hostname}): Successfully applied firewall profile '{profile}': {result.stdout}"
+            f"({hostname}): Error applying firewall profile '{profile}': {result['error']}"
         )
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"({hostname}): Error applying firewall profile '{profile}': {e.stderr}")
-        return False
-    except FileNotFoundError:
-        print(f"({hostname}): Error: {FIREWALL_SCRIPT} not found or not executable")
         return False
+    print(
+        f"({hostname}): Successfully applied firewall profile '{profile}' "
+        f"({result['mode']} nft {result['apply_ms']:.1f} ms, round trip {result['round_trip_ms']:.1f} ms)"
+    )
+    return True
 
 
 if __name__ == "__main__":
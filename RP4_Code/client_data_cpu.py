@@ -1,8 +1,10 @@
+import os
 import random
 import time
 import psutil
 import hashlib
 import multiprocessing
+from cpu_load import run_load, constant
 
 
 def S_cpu_utilization(d_utilization, t):
@@ -21,31 +23,38 @@ def S_cpu_utilization(d_utilization, t):
 
 
 def M_cpu_utilization(d_utilization, t):
-    num_cores = multiprocessing.cpu_count()
+    # One worker pinned per core, closed-loop on the core's real utilization
     processes = []
-    for i in range(num_cores):
-        p = multiprocessing.Process(target=S_cpu_utilization, args=(d_utilization, t))
+    for core in sorted(os.sched_getaffinity(0)):
+        p = multiprocessing.Process(
+            target=run_load, args=(core, constant(d_utilization, t))
+        )
         p.start()
         processes.append(p)
     for p in processes:
         p.join()
 
 
+def measure_cpu_percentage(t):
+    return psutil.cpu_percent(interval=t)
+
+
 def get_cpu_percentage(t, return_queue):
-    cpu_utilization = psutil.cpu_percent(interval=t)
-    return_queue.put(cpu_utilization)
+    return_queue.put(measure_cpu_percentage(t))
 
 
-def random_data_generation(t, data_queue):
+def generate_random_data(t):
     s_time = time.time()
     binary_data = None
     while time.time() - s_time < t:
         x = bin(random.getrandbits(16))
         binary_data = x.replace("0b", "").zfill(16)
         time.sleep(0.5)
-    cpu_usage = psutil.cpu_percent(interval=0.1)
+    return binary_data
 
-    data_queue.put((binary_data))  # Return binary data
+
+def random_data_generation(t, data_queue):
+    data_queue.put((generate_random_data(t)))  # Return binary data
 
 
 def idle_activity():
@@ -60,7 +69,8 @@ def critical_activity():
     return random.randint(71, 95)
 
 
-def main(t, cpu_queue, data_queue):
+def choose_cpu_target():
+    """Pick a random scenario and return its target CPU utilization."""
     mode = random.choice(["idle", "moderate", "critical"])
 
     if mode == "idle":
@@ -71,6 +81,12 @@ def main(t, cpu_queue, data_queue):
         cpu = critical_activity()
 
     print(f"[+] Simulating {mode.upper()} activity with target CPU: {cpu}%")
+    return cpu
+
+
+def main(t, cpu_queue, data_queue, cpu=None):
+    if cpu is None:
+        cpu = choose_cpu_target()
 
     cpu_monitor_process = multiprocessing.Process(
         target=get_cpu_percentage, args=(t, cpu_queue)
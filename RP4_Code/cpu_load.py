@@ -0,0 +1,147 @@
+import os
+import time
+import multiprocessing
+
+# ======= Configuration =======
+SLICE_MS = 10  # Duty-cycle period; busy for duty * SLICE_MS, then sleep
+CONTROL_INTERVAL = 0.5  # Seconds between utilization readings of the core
+KP = 0.4  # Proportional gain (duty per % of error)
+KI = 0.8  # Integral gain (duty per %-second of accumulated error)
+SPIN_CHUNK = 200  # Loop iterations between clock reads while busy
+# =============================
+
+
+# A load pattern is a list of (duration s, start %, end %) segments: equal
+# start and end hold a level, different ones ramp linearly between them.
+def constant(percent, duration):
+    return [(duration, percent, percent)]
+
+
+def ramp(start, end, duration):
+    return [(duration, start, end)]
+
+
+def steps(*levels):
+    """steps((10, 20), (10, 80)) holds 20% for 10 s, then 80% for 10 s."""
+    return [(duration, percent, percent) for duration, percent in levels]
+
+
+def pattern_duration(pattern):
+    return sum(duration for duration, _, _ in pattern)
+
+
+def target_at(pattern, elapsed):
+    """Target utilization (%) `elapsed` seconds into the pattern."""
+    for duration, start, end in pattern:
+        if elapsed < duration:
+            return start + (end - start) * elapsed / duration
+        elapsed -= duration
+    return pattern[-1][2]
+
+
+def read_core_times(stat_file, core):
+    """(busy, total) jiffies of one core from an open /proc/stat handle."""
+    stat_file.seek(0)
+    prefix = f"cpu{core} ".encode()
+    for line in stat_file.read(16384).splitlines():
+        if line.startswith(prefix):
+            fields = [int(x) for x in line.split()[1:]]
+            total = sum(fields[:8])
+            return total - fields[3] - fields[4], total
+    raise ValueError(f"cpu{core} not found in /proc/stat")
+
+
+def run_load(core, pattern, slice_ms=SLICE_MS):
+    """Hold one core at the pattern's utilization with a PI feedback loop.
+
+    The worker pins itself to `core`, busy-spins for duty * slice_ms of
+    every slice and sleeps the rest; every CONTROL_INTERVAL it reads the
+    core's real utilization (including other processes) and corrects the
+    duty cycle.  Returns the mean achieved and target utilization after
+    the first control interval.
+    """
+    if isinstance(pattern, (int, float)):
+        raise TypeError("pass a pattern, e.g. constant(percent, duration)")
+    os.sched_setaffinity(0, {core})
+    stat_file = open("/proc/stat", "rb", buffering=0)
+    slice_ns = int(slice_ms * 1_000_000)
+    control_ns = int(CONTROL_INTERVAL * 1e9)
+    clock = time.perf_counter_ns
+
+    start = clock()
+    end = start + int(pattern_duration(pattern) * 1e9)
+    duty = target_at(pattern, 0) / 100
+    integral = 0.0
+    prev_busy, prev_total = read_core_times(stat_file, core)
+    next_control = start + control_ns
+    window_target = 0.0
+    window_slices = 0
+    achieved_sum = target_sum = 0.0
+    windows = 0
+
+    try:
+        now = start
+        while now < end:
+            target = target_at(pattern, (now - start) / 1e9)
+            window_target += target
+            window_slices += 1
+
+            busy_until = now + int(duty * slice_ns)
+            while clock() < busy_until:
+                for _ in range(SPIN_CHUNK):
+                    pass
+            rest = now + slice_ns - clock()
+            if rest > 0:
+                time.sleep(rest / 1e9)
+            now = clock()
+
+            if now >= next_control:
+                busy, total = read_core_times(stat_file, core)
+                if total > prev_total:
+                    achieved = 100.0 * (busy - prev_busy) / (total - prev_total)
+                    mean_target = window_target / window_slices
+                    error = mean_target - achieved
+                    # Anti-windup: the integral alone may not exceed full duty
+                    integral = max(-100 / KI, min(100 / KI, integral + error * CONTROL_INTERVAL))
+                    duty = (target + KP * error + KI * integral) / 100
+                    duty = max(0.0, min(1.0, duty))
+                    if windows:  # The first window is spent settling
+                        achieved_sum += achieved
+                        target_sum += mean_target
+                    windows += 1
+                    prev_busy, prev_total = busy, total
+                window_target = 0.0
+                window_slices = 0
+                next_control = now + control_ns
+    finally:
+        stat_file.close()
+
+    counted = max(windows - 1, 1)
+    return {
+        "core": core,
+        "target": round(target_sum / counted, 2),
+        "achieved": round(achieved_sum / counted, 2),
+        "duty": round(duty * 100, 2),
+    }
+
+
+def run_on_cores(pattern, cores=None):
+    """Run the pattern on every core in parallel, one pinned process each."""
+    cores = sorted(os.sched_getaffinity(0)) if cores is None else cores
+    with multiprocessing.Pool(len(cores)) as pool:
+        return pool.starmap(run_load, [(core, pattern) for core in cores])
+
+
+if __name__ == "__main__":
+    # Accuracy of steady targets, then a ramp and a step pattern
+    for percent in (10, 30, 50, 70, 90):
+        for result in run_on_cores(constant(percent, 8)):
+            error = result["achieved"] - result["target"]
+            print(f"target {percent:3d}%  core {result['core']}: achieved "
+                  f"{result['achieved']:6.2f}%  error {error:+5.2f}  duty {result['duty']:.1f}%")
+    for name, pattern in (("ramp 10->90", ramp(10, 90, 16)),
+                          ("steps 20/80/40", steps((6, 20), (6, 80), (6, 40)))):
+        for result in run_on_cores(pattern):
+            error = result["achieved"] - result["target"]
+            print(f"{name:<15} core {result['core']}: mean target {result['target']:6.2f}% "
+                  f"achieved {result['achieved']:6.2f}%  error {error:+5.2f}")
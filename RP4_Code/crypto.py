@@ -1,16 +1,80 @@
 import os
+import hmac
+import asyncio
 import json
+import time
+import zlib
+import socket
+import struct
+import threading
 import ascon
 from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives import hashes
 
-# Global encryption key
-_encryption_key = None
+# Master key from key.conf; every other key is derived from it
+_master_key = None
+# Keys derived directly from the master key, only used for handshakes
+_bootstrap = None
+
+# ======= Wire format =======
+# header = magic | version | msg type | body length | sender id | counter,
+# followed by header tag (8) | ciphertext + AEAD tag (body length).
+# The nonce is rebuilt from (sender id, msg type, counter) and never sent.
+MAGIC = b"AF"
+PROTOCOL_VERSION = 3
+MSG_DATA = 1
+MSG_RESPONSE = 2
+MSG_HELLO = 3
+MSG_BATCH = 4  # Compressed batch of buffered samples (telemetry_codec)
+HEADER_FORMAT = ">2sBBHIQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+NONCE_FORMAT = ">IB3xQ"
+HEADER_TAG_SIZE = 8
+PREAMBLE_SIZE = HEADER_SIZE + HEADER_TAG_SIZE
+AEAD_TAG_SIZE = 16
+SESSION_NONCE_SIZE = 16
+MAX_MESSAGE_SIZE = 4096  # Hard upper bound on a whole message on the wire
+# ===========================
+
+# Stable 32-bit node id; the controller keys its session cache by it
+NODE_ID = zlib.crc32(socket.gethostname().encode())
+SESSION_LIFETIME = 3600  # Seconds before the node rotates its session keys
+_session = None
+
+
+class SessionKeys:
+    """AEAD key, header key and nonce counter for one sender session"""
+
+    def __init__(self, sender_id, aead_key, header_key, counter=0, epoch=0, wall_clock=False):
+        self.sender_id = sender_id
+        self.aead_key = aead_key
+        self.header_key = header_key
+        self.counter = counter
+        self.epoch = epoch
+        self.wall_clock = wall_clock  # Counters never fall behind time.time_ns()
+        self.created = time.monotonic()
+        self.lock = threading.Lock()
+
+    def next_counter(self):
+        with self.lock:
+            self.counter += 1
+            if self.wall_clock:
+                self.counter = max(self.counter, time.time_ns())
+            return self.counter
+
+
+def _hkdf(length, info, salt=None):
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=length,
+        salt=salt,
+        info=info,
+    ).derive(_master_key)
 
 
 def _initialize_key():
-    global _encryption_key
-    if _encryption_key is not None:
+    global _master_key, _bootstrap
+    if _master_key is not None:
         return
 
     try:
@@ -22,15 +86,17 @@ def _initialize_key():
             if len(hex_key) != 64:
                 raise ValueError("Key must be 64 hex chars (32 bytes)")
 
-            master_key = bytes.fromhex(hex_key)
+            _master_key = bytes.fromhex(hex_key)
 
-            # Derive 16-byte key using HKDF
-            _encryption_key = HKDF(
-                algorithm=hashes.SHA256(),
-                length=16,
-                salt=None,
-                info=b"ascon-encryption",
-            ).derive(master_key)
+            # Derive 16-byte keys using HKDF
+            _bootstrap = SessionKeys(
+                sender_id=NODE_ID,
+                aead_key=_hkdf(16, b"ascon-encryption"),
+                header_key=_hkdf(16, b"ascon-header"),
+                # Wall-clock counters let the server reject stale handshakes
+                counter=time.time_ns(),
+                wall_clock=True,
+            )
 
     except FileNotFoundError:
         raise RuntimeError("Missing key.conf file")
@@ -38,9 +104,26 @@ def _initialize_key():
         raise RuntimeError(f"Key error: {str(e)}")
 
 
-def encrypt(data):
-    """Encrypt data (dict/str) with ASCON AEAD"""
+def derive_session(node_id, client_nonce, server_nonce):
+    """Derive per-node, per-session keys with HKDF from the master key"""
     _initialize_key()
+    okm = _hkdf(
+        32,
+        b"ascon-session" + struct.pack(">I", node_id),
+        salt=client_nonce + server_nonce,
+    )
+    return SessionKeys(node_id, okm[:16], okm[16:])
+
+
+def encrypt(data, msg_type=MSG_DATA, reply_to=None, session=None):
+    """Encrypt data (dict/str/bytes) with ASCON AEAD
+
+    reply_to=(sender id, counter) of a received message makes this a
+    MSG_RESPONSE carrying the same counter, so replies need no own state.
+    Without a session the bootstrap keys are used.
+    """
+    _initialize_key()
+    session = session or _bootstrap
     print("start of encryption function\n")
     print("[+] _initialize_key() is ready\n")
 
@@ -49,41 +132,64 @@ def encrypt(data):
         data = json.dumps(data, sort_keys=True, separators=(",", ":"))
     print(f"[+] data =={data} --> ciphertext\n")
     print("payload after encryption")
-    nonce = os.urandom(16)
+    plaintext = data if isinstance(data, bytes) else data.encode()
+    body_len = len(plaintext) + AEAD_TAG_SIZE
+    if PREAMBLE_SIZE + body_len > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message too large ({PREAMBLE_SIZE + body_len} bytes)")
+    if reply_to is not None:
+        msg_type = MSG_RESPONSE
+        sender_id, counter = reply_to
+    else:
+        sender_id, counter = session.sender_id, session.next_counter()
+    header = struct.pack(
+        HEADER_FORMAT, MAGIC, PROTOCOL_VERSION, msg_type, body_len, sender_id, counter
+    )
+    nonce = struct.pack(NONCE_FORMAT, sender_id, msg_type, counter)
     ciphertext = ascon.ascon_encrypt(
-        key=_encryption_key,
+        key=session.aead_key,
         nonce=nonce,
-        associateddata=b"",
-        plaintext=data.encode(),
+        associateddata=header,
+        plaintext=plaintext,
         variant="Ascon-AEAD128",
     )
-    print(f"[+] --> nonce + ciphertext == {(nonce + ciphertext).hex()}\n")
+    message = header + _header_tag(session, header) + ciphertext
+    print(f"[+] --> header + tag + ciphertext == {message.hex()}\n")
     print("#" * 5)
-    return nonce + ciphertext
+    return message
 
 
-def decrypt(encrypted_data):
-    """Decrypt and verify ASCON AEAD data"""
+def decrypt(encrypted_data, raw=False, session=None):
+    """Decrypt and verify ASCON AEAD data (raw=True returns plaintext bytes)"""
     _initialize_key()
+    session = session or _bootstrap
     print("start of decryption function\n")
     print("[+] _initialize_key() is ready\n")
     try:
-        nonce = encrypted_data[:16]
-        ciphertext_with_tag = encrypted_data[16:]
+        body_len = check_preamble(encrypted_data[:PREAMBLE_SIZE], session)
+        if body_len is None or len(encrypted_data) != PREAMBLE_SIZE + body_len:
+            raise ValueError("Rejected message header")
+        header = encrypted_data[:HEADER_SIZE]
+        msg_type, sender_id, counter = message_info(encrypted_data)
+        nonce = struct.pack(NONCE_FORMAT, sender_id, msg_type, counter)
+        ciphertext_with_tag = encrypted_data[PREAMBLE_SIZE:]
         print("payload before decryption\n")
         print(
             f"[+] --> nonce + ciphertext_with_tag == {(nonce + ciphertext_with_tag).hex()}\n"
         )
         plaintext = ascon.ascon_decrypt(
-            key=_encryption_key,
+            key=session.aead_key,
             nonce=nonce,
-            associateddata=b"",
+            associateddata=header,
             ciphertext=ciphertext_with_tag,
             variant="Ascon-AEAD128",
         )
+        if plaintext is None:
+            raise ValueError("Authentication tag mismatch")
         print("payload after decryption\n")
         print(f"[+] --> plaintext == {plaintext.hex()}\n")
 
+        if raw:
+            return plaintext
         try:
             return json.loads(plaintext.decode())
         except json.JSONDecodeError:
@@ -94,6 +200,148 @@ def decrypt(encrypted_data):
         return None
 
 
+def _header_tag(session, header):
+    """Truncated Ascon-PrfShort tag over the fixed header fields"""
+    # PrfShort takes at most 16 bytes: version | type | length | sender | counter
+    return ascon.ascon_mac(
+        session.header_key, header[2:], "Ascon-PrfShort", HEADER_TAG_SIZE
+    )
+
+
+def message_info(message):
+    """Return (msg type, sender id, counter) from a message header"""
+    _, _, msg_type, _, sender_id, counter = struct.unpack_from(HEADER_FORMAT, message)
+    return msg_type, sender_id, counter
+
+
+def check_preamble(preamble, session=None):
+    """Pre-authenticate a message preamble, return its body length or None.
+
+    Costs a single Ascon permutation whatever body size is claimed, so junk
+    is rejected before the body is read or decrypted.
+    """
+    _initialize_key()
+    if len(preamble) != PREAMBLE_SIZE:
+        return None
+    magic, version, _, body_len, _, _ = struct.unpack_from(HEADER_FORMAT, preamble)
+    if magic != MAGIC or version != PROTOCOL_VERSION:
+        return None
+    if body_len < AEAD_TAG_SIZE or PREAMBLE_SIZE + body_len > MAX_MESSAGE_SIZE:
+        return None
+    tag = preamble[HEADER_SIZE:]
+    expected = _header_tag(session or _bootstrap, preamble[:HEADER_SIZE])
+    if not hmac.compare_digest(tag, expected):
+        return None
+    return body_len
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _match_preamble(preamble, lookup):
+    """Return (body length, session) for the first candidate key that verifies"""
+    candidates = [None]
+    if lookup is not None:
+        candidates = lookup(*message_info(preamble)[:2])
+    for session in candidates:
+        body_len = check_preamble(preamble, session)
+        if body_len is not None:
+            return body_len, session or _bootstrap
+    raise ValueError("Rejected message header")
+
+
+def read_message(sock, lookup=None):
+    """Read one framed message, return (message, session) or None on EOF.
+
+    `lookup(msg_type, sender_id)` returns the candidate sessions for the
+    sender (None means the bootstrap keys); the first whose header tag
+    verifies is returned. Raises ValueError for junk headers.
+    """
+    preamble = _recv_exact(sock, PREAMBLE_SIZE)
+    if preamble is None:
+        return None
+    body_len, session = _match_preamble(preamble, lookup)
+    body = _recv_exact(sock, body_len)
+    if body is None:
+        return None
+    return preamble + body, session
+
+
+async def read_message_async(reader, lookup=None):
+    """asyncio counterpart of read_message for an asyncio.StreamReader"""
+    try:
+        preamble = await reader.readexactly(PREAMBLE_SIZE)
+        body_len, session = _match_preamble(preamble, lookup)
+        body = await reader.readexactly(body_len)
+    except asyncio.IncompleteReadError:
+        return None
+    return preamble + body, session
+
+
+def hello_message():
+    """Build a MSG_HELLO carrying a fresh client nonce"""
+    client_nonce = os.urandom(SESSION_NONCE_SIZE)
+    return encrypt(client_nonce, msg_type=MSG_HELLO), client_nonce
+
+
+def complete_handshake(hello, client_nonce, response):
+    """Derive session keys from the server's reply to `hello`, None if invalid"""
+    _, sender_id, counter = message_info(hello)
+    if response is None or message_info(response) != (MSG_RESPONSE, sender_id, counter):
+        return None
+    server_nonce = decrypt(response, raw=True)
+    if server_nonce is None or len(server_nonce) != SESSION_NONCE_SIZE:
+        return None
+    return derive_session(NODE_ID, client_nonce, server_nonce)
+
+
+def _session_due():
+    return _session is None or time.monotonic() - _session.created > SESSION_LIFETIME
+
+
+def current_session(sock):
+    """Session keys for this node, running a handshake on `sock` when due"""
+    global _session
+    if _session_due():
+        hello, client_nonce = hello_message()
+        sock.sendall(hello)
+        result = read_message(sock)
+        session = complete_handshake(hello, client_nonce, result and result[0])
+        if session is None:
+            raise RuntimeError("Session handshake failed")
+        _session = session
+    return _session
+
+
+async def current_session_async(reader, writer):
+    """asyncio counterpart of current_session"""
+    global _session
+    if _session_due():
+        hello, client_nonce = hello_message()
+        writer.write(hello)
+        await writer.drain()
+        result = await read_message_async(reader)
+        session = complete_handshake(hello, client_nonce, result and result[0])
+        if session is None:
+            raise RuntimeError("Session handshake failed")
+        _session = session
+    return _session
+
+
+def reset_session():
+    """Forget the current session so the next report re-handshakes"""
+    global _session
+    _session = None
+
+
 if __name__ == "__main__":
     # Quick test
     test_data = {"status": "secure", "value": 42}
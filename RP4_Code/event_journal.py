@@ -0,0 +1,134 @@
+import os
+import time
+import socket
+import struct
+import threading
+from telemetry_codec import PROFILE_IDS, PROFILE_NAMES, UNKNOWN_PROFILE
+
+# ======= Configuration =======
+JOURNAL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "events.journal")
+BATCH_RECORDS = 64  # Records buffered before one write
+FLUSH_INTERVAL = 5  # Seconds a buffered record may wait for its batch
+# =============================
+
+# Event types; a sample's seq follows it from measurement to enforcement
+SAMPLE = 1  # Node: measurement period finished (value: cpu %)
+REPORT_SENT = 2  # Node: report for the sample handed to the network
+DECISION = 3  # Controller: profile decided (value: ms since the report arrived)
+RESPONSE_RECEIVED = 4  # Node: controller's answer decrypted
+APPLY_STARTED = 5  # Node: firewall swap started
+APPLY_FINISHED = 6  # Node: firewall swap done (value: apply ms)
+LOCAL_DECISION = 7  # Node: profile decided locally from the cached policy
+EVENT_NAMES = {
+    SAMPLE: "sample",
+    REPORT_SENT: "report sent",
+    DECISION: "decision",
+    RESPONSE_RECEIVED: "response received",
+    APPLY_STARTED: "apply started",
+    APPLY_FINISHED: "apply finished",
+    LOCAL_DECISION: "local decision",
+}
+FLAG_FAILED = 1
+
+# header: magic | layout version | record size
+HEADER = struct.Struct("<4sBH")
+MAGIC = b"EVTJ"
+LAYOUT_VERSION = 1
+# event | profile id | flags | node IPv4 | seq | wall ns | monotonic ns | value
+RECORD = struct.Struct("<BBHIIqqf")
+
+
+def ip_to_int(ip):
+    try:
+        return struct.unpack(">I", socket.inet_aton(ip))[0] if ip else 0
+    except OSError:
+        return 0
+
+
+def int_to_ip(value):
+    return socket.inet_ntoa(struct.pack(">I", value))
+
+
+class EventJournal:
+    """Append-only journal of timestamped events in fixed 32-byte records.
+
+    Each record carries both clocks: wall time to line up journals of
+    different hosts, monotonic time for exact intervals on one host.
+    Records are packed into a buffer and written BATCH_RECORDS at a time
+    (or after FLUSH_INTERVAL) with one O_APPEND write; safe across threads.
+    """
+
+    def __init__(self, path=JOURNAL_FILE, batch=BATCH_RECORDS, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if os.fstat(self.fd).st_size == 0:
+            os.write(self.fd, HEADER.pack(MAGIC, LAYOUT_VERSION, RECORD.size))
+        self.buffer = bytearray()
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record(self, event, seq=0, node=None, profile=None, value=0.0, flags=0):
+        """Journal one event now; `node` is an IPv4 string (None = this host)."""
+        mono = time.monotonic_ns()
+        wall = time.time_ns()
+        profile_id = PROFILE_IDS.get(profile, UNKNOWN_PROFILE)
+        data = RECORD.pack(event, profile_id, flags, ip_to_int(node), seq & 0xFFFFFFFF,
+                           wall, mono, value)
+        with self.lock:
+            self.buffer += data
+            self.pending += 1
+            if self.pending >= self.batch or mono / 1e9 - self.last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        if self.buffer:
+            os.write(self.fd, self.buffer)
+            self.buffer = bytearray()
+            self.pending = 0
+        self.last_flush = time.monotonic()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            if self.fd is not None:
+                self._flush()
+                os.close(self.fd)
+                self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, etype, value, traceback):
+        self.close()
+
+
+def read_journal(path):
+    """Events of a journal as dicts, oldest first (a torn record is skipped)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        return []
+    magic, version, record_size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != LAYOUT_VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not an event journal (or an unsupported layout)")
+    body = data[HEADER.size:]
+    body = body[:len(body) - len(body) % RECORD.size]
+    return [
+        {
+            "event": event,
+            "profile": PROFILE_NAMES.get(profile_id),
+            "failed": bool(flags & FLAG_FAILED),
+            "node": int_to_ip(node) if node else None,
+            "seq": seq,
+            "wall": wall / 1e9,
+            "mono": mono / 1e9,
+            "value": value,
+        }
+        for event, profile_id, flags, node, seq, wall, mono, value in RECORD.iter_unpack(body)
+    ]
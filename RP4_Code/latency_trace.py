@@ -0,0 +1,100 @@
+import time
+import bisect
+
+# ======= Configuration =======
+# Bucket upper edges in ms, roughly 1-2-5 per decade from 50 us to 10 s
+BUCKET_EDGES_MS = (
+    0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000,
+)
+WINDOW = 600  # Seconds per histogram generation; a dump covers 1-2 windows
+# =============================
+
+# Stages of a traced report, in the order a sample goes through them
+STAGES = (
+    "queue",  # Sample ready -> reporting task picks it up
+    "serialize",  # encode_report
+    "encrypt",  # AEAD + header tag of the report
+    "network",  # Round trip minus the controller's own time
+    "server decide",  # Controller: report received -> profile decided
+    "server reply",  # Controller: decided -> response sent
+    "decrypt",  # Response verification and parsing on the node
+    "apply",  # Firewall swap of the new profile
+    "end to end",  # Sample ready -> new profile enforced
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; record() is one bisect and an add."""
+
+    __slots__ = ("counts", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_EDGES_MS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms):
+        self.counts[bisect.bisect_left(BUCKET_EDGES_MS, ms)] += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def merge(self, other):
+        merged = LatencyHistogram()
+        merged.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        merged.total = self.total + other.total
+        merged.max = max(self.max, other.max)
+        return merged
+
+    def count(self):
+        return sum(self.counts)
+
+    def percentile(self, p):
+        """Upper edge (ms) of the bucket holding the p-th percentile, capped
+        at the largest value seen."""
+        n = self.count()
+        if not n:
+            return 0.0
+        rank = p / 100 * n
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(BUCKET_EDGES_MS[index], self.max) if index < len(BUCKET_EDGES_MS) else self.max
+        return self.max
+
+
+class StageHistograms:
+    """Rolling per-stage histograms: two generations of WINDOW seconds, so
+    a dump always covers between one and two recent windows."""
+
+    def __init__(self, stages=STAGES, window=WINDOW):
+        self.stages = stages
+        self.window = window
+        self.current = {stage: LatencyHistogram() for stage in stages}
+        self.previous = {stage: LatencyHistogram() for stage in stages}
+        self.rotate_at = time.monotonic() + window
+
+    def record(self, stage, ms):
+        now = time.monotonic()
+        if now >= self.rotate_at:
+            self.previous = self.current
+            self.current = {name: LatencyHistogram() for name in self.stages}
+            self.rotate_at = now + self.window
+        self.current[stage].record(ms)
+
+    def dump(self):
+        """Text table of count, mean, p50/p90/p99 (bucket edges) and max."""
+        lines = [f"{'stage':<15}{'n':>7}{'mean':>10}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>10}  (ms)"]
+        for stage in self.stages:
+            histogram = self.current[stage].merge(self.previous[stage])
+            n = histogram.count()
+            if not n:
+                lines.append(f"{stage:<15}{0:>7}")
+                continue
+            lines.append(
+                f"{stage:<15}{n:>7}{histogram.total / n:10.2f}"
+                + "".join(f"{histogram.percentile(p):9.2f}" for p in (50, 90, 99))
+                + f"{histogram.max:10.2f}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,197 @@
+import os
+import time
+import multiprocessing
+from client_data_cpu import measure_cpu_percentage, choose_cpu_target
+from cpu_load import run_load, constant
+from ram import consume_ram, average_ram_utilization, choose_ram_target
+from proc_sampler import TrafficMeter
+from scenario_replay import replay_ram, run_traffic
+
+# ======= Configuration =======
+# Workers are started from a clean forkserver process rather than forked
+# from the caller, which may already run threads (ProcSampler) or an event
+# loop whose locks a forked child could inherit in a held state
+START_METHOD = "forkserver"
+# =============================
+
+# Tasks a pool worker can run; each returns its result instead of using a Queue
+TASKS = {
+    "cpu_load": run_load,
+    "cpu_monitor": measure_cpu_percentage,
+    "ram_load": consume_ram,
+    "ram_monitor": average_ram_utilization,
+    "ram_replay": replay_ram,
+    "traffic_load": run_traffic,
+}
+
+
+def _worker_loop(conn):
+    """Run one task per command received on `conn` until None arrives."""
+    while True:
+        command = conn.recv()
+        if command is None:
+            break
+        name, args = command
+        try:
+            conn.send(("ok", TASKS[name](*args)))
+        except Exception as e:
+            conn.send(("error", f"{name}: {e}"))
+    conn.close()
+
+
+class MeasurementPool:
+    """Long-lived worker processes for the per-period load and measurements.
+
+    Workers are started once (one pinned CPU load worker per core plus the RAM
+    consumer and, without a ProcSampler, the CPU and RAM monitors) and
+    receive commands over pipes, so a period no longer pays 8-10 forks.
+    Traffic is metered from /proc/net/dev, by the sampler if there is one.
+    With a `traffic_sink` (host, port) one more worker sends UDP traffic
+    during scenario replay.
+    """
+
+    def __init__(self, num_cores=None, sampler=None, traffic_sink=None,
+                 start_method=START_METHOD):
+        self.cores = sorted(os.sched_getaffinity(0))
+        self.num_cores = num_cores or len(self.cores)
+        self.traffic_sink = traffic_sink
+        # With a ProcSampler the blocking psutil monitor workers are not needed
+        self.sampler = sampler
+        self.meter = None
+        roles = ["ram_load"]
+        if sampler is None:
+            roles += ["cpu_monitor", "ram_monitor"]
+            self.meter = TrafficMeter()
+        if traffic_sink is not None:
+            roles.append("traffic_load")
+        roles += ["cpu_load"] * self.num_cores
+        context = multiprocessing.get_context(start_method)
+        self.workers = []
+        for role in roles:
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_worker_loop, args=(child_conn,), daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self.workers.append((role, parent_conn, process))
+
+    def run_period(self, t, cpu_target=None, ram_target=None, scenario=None):
+        """Drive one measurement period, return (cpu %, traffic, ram %).
+
+        The load follows the next `t` seconds of `scenario` (a Scenario) if
+        given, otherwise constant targets, random when not passed.  traffic
+        is TrafficMeter.summary(): Mbps, packets/s and burstiness.
+        """
+        if scenario is not None:
+            cpu_pattern, ram_pattern, traffic_pattern = scenario.window(t)
+            ram_task = ("ram_replay", (ram_pattern,))
+        else:
+            if cpu_target is None:
+                cpu_target = choose_cpu_target()
+            if ram_target is None:
+                ram_target = choose_ram_target()
+            cpu_pattern, traffic_pattern = constant(cpu_target, t), constant(0, t)
+            ram_task = ("ram_load", (ram_target, t))
+        args = {
+            "cpu_load": (None, cpu_pattern),
+            "cpu_monitor": (t,),
+            "ram_load": ram_task[1],
+            "ram_monitor": (t,),
+            "traffic_load": (traffic_pattern, self.traffic_sink),
+        }
+        if self.sampler is not None:
+            self.sampler.snapshot(reset=True)
+        else:
+            # Without a sampler the period is a single metering interval
+            self.meter.measure()
+            self.meter.reset()
+        cpu_workers = 0
+        for role, conn, _ in self.workers:
+            if role == "cpu_load":
+                # Each load worker pins itself to its own core
+                core = self.cores[cpu_workers % len(self.cores)]
+                conn.send((role, (core,) + args[role][1:]))
+                cpu_workers += 1
+            elif role == "ram_load":
+                conn.send(ram_task)
+            else:
+                conn.send((role, args[role]))
+
+        results = {}
+        for role, conn, _ in self.workers:
+            status, value = conn.recv()
+            if status != "ok":
+                raise RuntimeError(value)
+            results[role] = value
+        if self.sampler is not None:
+            snap = self.sampler.snapshot()
+            results["cpu_monitor"] = round(snap["cpu"]["mean"], 2)
+            results["ram_monitor"] = round(snap["ram"]["mean"], 2)
+            traffic = snap["traffic"]
+        else:
+            self.meter.update()
+            traffic = self.meter.summary()
+        return results["cpu_monitor"], traffic, results["ram_monitor"]
+
+    def close(self):
+        for _, conn, process in self.workers:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+        self.workers = []
+        if self.meter is not None:
+            self.meter.close()
+            self.meter = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, stype, value, traceback):
+        self.close()
+
+
+def benchmark(periods=5, t=1, cpu_target=10, ram_target=0):
+    """Per-period overhead (wall time beyond t) of fresh processes vs the pool."""
+    from client_data_cpu import main as cpu_main
+    from ram import main as ram_main
+
+    cpu_queue = multiprocessing.Queue()
+    data_queue = multiprocessing.Queue()
+    ram_queue = multiprocessing.Queue()
+    spawned = []
+    for _ in range(periods):
+        start = time.perf_counter()
+        cpu_process = multiprocessing.Process(
+            target=cpu_main, args=(t, cpu_queue, data_queue, cpu_target)
+        )
+        ram_process = multiprocessing.Process(
+            target=ram_main, args=(t, ram_queue, ram_target)
+        )
+        cpu_process.start()
+        ram_process.start()
+        cpu_process.join()
+        ram_process.join()
+        cpu_queue.get(), data_queue.get(), ram_queue.get()
+        spawned.append(time.perf_counter() - start - t)
+
+    pooled = []
+    start = time.perf_counter()
+    with MeasurementPool() as pool:
+        startup = time.perf_counter() - start
+        for _ in range(periods):
+            start = time.perf_counter()
+            pool.run_period(t, cpu_target, ram_target)
+            pooled.append(time.perf_counter() - start - t)
+
+    print(f"Per-period overhead, spawn per period: {1000 * sum(spawned) / periods:.1f} ms")
+    print(f"Per-period overhead, persistent pool:  {1000 * sum(pooled) / periods:.1f} ms")
+    print(f"One-time pool startup:                 {1000 * startup:.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
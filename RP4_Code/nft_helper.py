@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# Long-lived privileged firewall helper, started once by the client with
+#   sudo -n /usr/bin/python3 /usr/local/lib/nft_profiles/nft_helper.py
+# after `sudo python3 nft_rulesets.py --install`.  Let the client user run
+# exactly that command (no arguments) without a password in sudoers.
+# As root it takes no paths from the caller: it runs /usr/sbin/nft and only
+# loads rulesets from its own root-owned install.  --dir/--nft are for
+# non-root test runs with a stand-in nft.
+#
+# Protocol: one command per stdin line ("apply <idle|low|high|critical>"),
+# one JSON result per stdout line.  The first apply loads the full ruleset;
+# later ones load only the precompiled delta from the active profile.
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from nft_rulesets import (BASE_DIR, RULESET_DIR, MANIFEST, SYSTEM_NFT, HELPER_MODULES,
+                          read_manifest, sha256_file, delta_file)
+
+LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "firewall_profiles.csv")
+
+
+def log_profile(name):
+    """Append the applied profile to firewall_profiles.csv like firewall.sh."""
+    new_file = not os.path.isfile(LOG_FILE)
+    with open(LOG_FILE, "a") as f:
+        if new_file:
+            f.write("date,time,profile\n")
+        f.write(f"{time.strftime('%Y-%m-%d,%H:%M:%S')},{name}\n")
+
+
+def load_batch(nft, ruleset_dir, checksums, filename):
+    """Verify one precompiled batch and load it as a single nft transaction.
+
+    Returns (error or None, apply_ms).
+    """
+    path = os.path.join(ruleset_dir, filename)
+    if filename not in checksums:
+        return "unknown ruleset", 0.0
+    if sha256_file(path) != checksums[filename]:
+        return "checksum mismatch", 0.0
+
+    start = time.perf_counter()
+    try:
+        result = subprocess.run([nft, "-f", path], capture_output=True, text=True)
+    except OSError as e:
+        return str(e), 0.0
+    apply_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        return result.stderr.strip() or f"nft exited with {result.returncode}", apply_ms
+    return None, apply_ms
+
+
+def apply_ruleset(nft, ruleset_dir, checksums, name, active=None):
+    """Switch from profile `active` to `name`, by delta when possible."""
+    mode = "full"
+    error = "no active profile"
+    if active is not None and active != name:
+        mode = "delta"
+        error, apply_ms = load_batch(nft, ruleset_dir, checksums, delta_file(active, name))
+    if error:
+        # Unknown starting point or a failed delta: replace the whole ruleset
+        mode = "full"
+        error, apply_ms = load_batch(nft, ruleset_dir, checksums, f"{name}.nft")
+    if error:
+        return {"ok": False, "profile": name, "apply_ms": apply_ms, "error": error}
+
+    if name == "critical":
+        # DPI for the Critical Task profile, as in firewall.sh
+        try:
+            subprocess.run(["systemctl", "restart", "suricata"], capture_output=True)
+        except OSError:
+            pass
+    log_profile(name)
+    return {"ok": True, "profile": name, "mode": mode, "apply_ms": apply_ms}
+
+
+def untrusted(path):
+    """Why a non-root user could replace `path`, or None if they cannot."""
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        return str(e)
+    if st.st_uid != 0:
+        return f"{path} is not owned by root"
+    if st.st_mode & 0o022:
+        return f"{path} is writable by group or others"
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Privileged nftables ruleset helper")
+    parser.add_argument("--dir", help="precompiled ruleset directory (non-root only)")
+    parser.add_argument("--nft", help="nft executable or a stand-in (non-root only)")
+    args = parser.parse_args(argv)
+
+    # Checksums are read once at startup so later tampering is detected
+    if os.geteuid() == 0:
+        if args.dir or args.nft:
+            parser.error("--dir and --nft are refused when running as root")
+        nft, ruleset_dir = SYSTEM_NFT, RULESET_DIR
+        checksums = read_manifest(ruleset_dir)
+        paths = [BASE_DIR, ruleset_dir, os.path.join(ruleset_dir, MANIFEST)]
+        paths += [os.path.join(BASE_DIR, f) for f in HELPER_MODULES]
+        paths += [os.path.join(ruleset_dir, f) for f in checksums]
+        for path in paths:
+            reason = untrusted(path)
+            if reason:
+                sys.exit(f"nft_helper: refusing to run as root: {reason} "
+                         "(install with `sudo python3 nft_rulesets.py --install`)")
+    else:
+        nft, ruleset_dir = args.nft or "nft", args.dir or RULESET_DIR
+        checksums = read_manifest(ruleset_dir)
+
+    active = None  # Unknown until the first full load
+    for line in sys.stdin:
+        command = line.split()
+        if len(command) == 2 and command[0] == "apply":
+            result = apply_ruleset(nft, ruleset_dir, checksums, command[1], active)
+            # After a failed full load the kernel state is unknown again
+            active = command[1] if result["ok"] else None
+        else:
+            result = {"ok": False, "error": f"bad command: {line.strip()}"}
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+from proc_sampler import RunningStat
+
+# ======= Configuration (mirrors firewall.sh) =======
+WHITELIST_IP = "192.168.30.114"
+CONTROL_PORT = 9999
+SSH_PORT = 22
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RULESET_DIR = os.path.join(BASE_DIR, "nft_rulesets")
+MANIFEST = "rulesets.sha256"  # sha256sum format, checkable with `sha256sum -c`
+HELPER_SCRIPT = os.path.join(BASE_DIR, "nft_helper.py")
+# Under sudo only a root-owned install is run (see install()); sudoers must
+# allow exactly `SYSTEM_PYTHON SYSTEM_DIR/nft_helper.py` with no arguments
+SYSTEM_DIR = "/usr/local/lib/nft_profiles"
+SYSTEM_PYTHON = "/usr/bin/python3"
+SYSTEM_NFT = "/usr/sbin/nft"
+HELPER_MODULES = ("nft_helper.py", "nft_rulesets.py", "proc_sampler.py")
+APPLY_TIMEOUT = 30  # Seconds to wait for the helper to answer one apply
+# ===================================================
+
+# Profile names used by the controller -> firewall.sh argument / file name
+PROFILE_FILES = {
+    "Idle": "idle",
+    "Low Activity": "low",
+    "High Activity": "high",
+    "Critical Task": "critical",
+}
+
+# Named sets shared by every profile: {set name: nft element type}
+SETS = {
+    "whitelist": "ipv4_addr",  # Peers allowed through the control rules
+    "peer_ports": "inet_service",  # Ports open towards the whitelisted peers
+}
+
+# Each rule group lives in its own feature chain per hook (e.g. high_in), so
+# switching profiles only flushes/fills the chains and set elements that
+# differ.  The base chains always jump to every feature chain in this order;
+# an empty feature chain simply returns.
+COMMON_RULES = [
+    ("input", "iif lo accept"),
+    ("output", "oif lo accept"),
+    # Allow outgoing traffic to RP5 and incoming response
+    ("output", "ip daddr @whitelist tcp dport @peer_ports ct state new,established accept"),
+    ("input", "ip saddr @whitelist tcp sport @peer_ports ct state established accept"),
+]
+IDLE_RULES = [
+    # Block ICMP
+    ("input", "ip protocol icmp drop"),
+]
+HIGH_RULES = [
+    # Enable connection tracking
+    ("input", "ct state established,related accept"),
+    ("output", "ct state established,related accept"),
+]
+CRITICAL_RULES = [
+    # Restrict to only the RP5 IP
+    ("input", "ip saddr != @whitelist drop"),
+    ("output", "ip daddr != @whitelist drop"),
+]
+RULE_GROUPS = {
+    "common": COMMON_RULES,
+    "idle": IDLE_RULES,
+    "high": HIGH_RULES,
+    "critical": CRITICAL_RULES,
+}
+GROUP_ELEMENTS = {
+    "common": {"whitelist": [WHITELIST_IP], "peer_ports": [CONTROL_PORT]},
+    # SSH to RP5 allowed
+    "high": {"peer_ports": [SSH_PORT]},
+}
+PROFILE_GROUPS = {
+    "idle": ("common", "idle"),
+    "low": ("common",),
+    "high": ("common", "high"),
+    "critical": ("common", "high", "critical"),
+}
+BASE_CHAINS = {"input": "in", "output": "out"}
+
+
+def feature_chains():
+    """Feature chain names in jump order, e.g. common_in, common_out, ..."""
+    return [f"{group}_{suffix}" for group in RULE_GROUPS for suffix in BASE_CHAINS.values()]
+
+
+def profile_state(name):
+    """({feature chain: rules}, {set: elements}) that profile `name` enforces."""
+    chains = {chain: [] for chain in feature_chains()}
+    elements = {set_name: set() for set_name in SETS}
+    for group in PROFILE_GROUPS[name]:
+        for base, rule in RULE_GROUPS[group]:
+            chains[f"{group}_{BASE_CHAINS[base]}"].append(rule)
+        for set_name, values in GROUP_ELEMENTS.get(group, {}).items():
+            elements[set_name].update(values)
+    return chains, elements
+
+
+def _elements(values):
+    return "{ " + ", ".join(str(v) for v in sorted(values)) + " }"
+
+
+def build_ruleset(name):
+    """Render one profile as an `nft -f` batch that replaces the whole ruleset."""
+    chains, elements = profile_state(name)
+    lines = ["flush ruleset", "table inet firewall {"]
+    for set_name, set_type in SETS.items():
+        lines.append(f"    set {set_name} {{")
+        lines.append(f"        type {set_type}")
+        if elements[set_name]:
+            lines.append(f"        elements = {_elements(elements[set_name])}")
+        lines.append("    }")
+    for chain, rules in chains.items():
+        lines.append(f"    chain {chain} {{")
+        lines.extend(f"        {rule}" for rule in rules)
+        lines.append("    }")
+    for base in ("input", "forward", "output"):
+        lines.append(f"    chain {base} {{")
+        lines.append(f"        type filter hook {base} priority 0; policy drop;")
+        if base in BASE_CHAINS:
+            for group in RULE_GROUPS:
+                lines.append(f"        jump {group}_{BASE_CHAINS[base]}")
+        lines.append("    }")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def build_delta(src, dst):
+    """Minimal batch that turns profile `src` into `dst` in one transaction.
+
+    Returns (batch text, churn) where churn counts the rules and set elements
+    added and deleted.  Only feature chains whose rules differ are flushed and
+    refilled; the table, base chains, sets and untouched chains stay in place.
+    """
+    src_chains, src_elements = profile_state(src)
+    dst_chains, dst_elements = profile_state(dst)
+    churn = {"rules_added": 0, "rules_deleted": 0, "elements_added": 0, "elements_deleted": 0}
+    lines = []
+    # New elements go in before any rule that depends on them ...
+    for set_name in SETS:
+        added = dst_elements[set_name] - src_elements[set_name]
+        if added:
+            lines.append(f"add element inet firewall {set_name} {_elements(added)}")
+            churn["elements_added"] += len(added)
+    for chain in feature_chains():
+        if src_chains[chain] == dst_chains[chain]:
+            continue
+        if src_chains[chain]:
+            lines.append(f"flush chain inet firewall {chain}")
+            churn["rules_deleted"] += len(src_chains[chain])
+        for rule in dst_chains[chain]:
+            lines.append(f"add rule inet firewall {chain} {rule}")
+        churn["rules_added"] += len(dst_chains[chain])
+    # ... and stale ones are removed after the rules have changed
+    for set_name in SETS:
+        removed = src_elements[set_name] - dst_elements[set_name]
+        if removed:
+            lines.append(f"delete element inet firewall {set_name} {_elements(removed)}")
+            churn["elements_deleted"] += len(removed)
+    return "\n".join(lines) + "\n", churn
+
+
+def full_churn(src, dst):
+    """Churn of replacing `src` with `dst` through a full ruleset reload."""
+    churn = {}
+    for key, name in (("deleted", src), ("added", dst)):
+        chains, elements = profile_state(name)
+        churn[f"rules_{key}"] = sum(len(rules) for rules in chains.values())
+        churn[f"elements_{key}"] = sum(len(values) for values in elements.values())
+    return churn
+
+
+def delta_file(src, dst):
+    return f"{src}-{dst}.nft"
+
+
+def sha256_file(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_manifest(ruleset_dir=RULESET_DIR):
+    """{file name: sha256} from the manifest, empty if it does not exist."""
+    checksums = {}
+    path = os.path.join(ruleset_dir, MANIFEST)
+    if os.path.isfile(path):
+        with open(path) as f:
+            for line in f:
+                digest, _, filename = line.strip().partition("  ")
+                checksums[filename] = digest
+    return checksums
+
+
+def compile_rulesets(ruleset_dir=RULESET_DIR):
+    """Write each profile's full batch and every pairwise delta batch once;
+    rewrite only what changed."""
+    os.makedirs(ruleset_dir, exist_ok=True)
+    checksums = read_manifest(ruleset_dir)
+    changed = False
+    batches = {f"{name}.nft": build_ruleset(name) for name in PROFILE_GROUPS}
+    for src in PROFILE_GROUPS:
+        for dst in PROFILE_GROUPS:
+            if src != dst:
+                batches[delta_file(src, dst)] = build_delta(src, dst)[0]
+    for filename, text in batches.items():
+        path = os.path.join(ruleset_dir, filename)
+        text = text.encode()
+        digest = hashlib.sha256(text).hexdigest()
+        cached = checksums.get(filename) == digest and os.path.isfile(path)
+        if cached and sha256_file(path) == digest:
+            continue
+        with open(path, "wb") as f:
+            f.write(text)
+        checksums[filename] = digest
+        changed = True
+    if changed:
+        with open(os.path.join(ruleset_dir, MANIFEST), "w") as f:
+            for filename, digest in sorted(checksums.items()):
+                f.write(f"{digest}  {filename}\n")
+    return checksums
+
+
+class NftApplier:
+    """Client side of the long-lived privileged nft helper.
+
+    The helper is started once (one sudo for the client's lifetime) and
+    applies each precompiled ruleset as a single `nft -f` transaction: the
+    full ruleset the first time, then only the delta from the active profile.
+    With use_sudo the helper and rulesets must have been installed with
+    `sudo python3 nft_rulesets.py --install`; pass `nft=` a stand-in
+    executable and use_sudo=False to test it.
+    """
+
+    def __init__(self, ruleset_dir=RULESET_DIR, nft=None, use_sudo=True):
+        self.ruleset_dir = ruleset_dir
+        self.nft = nft
+        self.use_sudo = use_sudo
+        self.process = None
+        self.lock = asyncio.Lock()
+        self.latency_ms = RunningStat()
+
+    async def start(self):
+        if self.use_sudo:
+            # The root helper takes no paths from us: it loads the rulesets
+            # installed next to it and runs SYSTEM_NFT
+            cmd = ["sudo", "-n", SYSTEM_PYTHON, os.path.join(SYSTEM_DIR, "nft_helper.py")]
+        else:
+            compile_rulesets(self.ruleset_dir)
+            cmd = [sys.executable, HELPER_SCRIPT, "--dir", self.ruleset_dir]
+            if self.nft:
+                cmd += ["--nft", self.nft]
+        self.process = await asyncio.create_subprocess_exec(
+            *cmd, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+        )
+
+    async def apply(self, profile):
+        """Apply `profile` atomically; returns the helper's result dict."""
+        if profile not in PROFILE_FILES:
+            return {"ok": False, "profile": profile, "error": "unknown profile"}
+        async with self.lock:
+            if self.process is None or self.process.returncode is not None:
+                await self.start()
+            start = time.perf_counter()
+            try:
+                self.process.stdin.write(f"apply {PROFILE_FILES[profile]}\n".encode())
+                await self.process.stdin.drain()
+                line = await asyncio.wait_for(self.process.stdout.readline(), APPLY_TIMEOUT)
+                if not line:
+                    await self.kill()
+                    return {"ok": False, "profile": profile, "error": "helper exited"}
+                result = json.loads(line)
+            except BaseException:
+                # A late reply would be read as the next apply's result:
+                # drop the helper, the next call starts a fresh one
+                await self.kill()
+                raise
+            result["round_trip_ms"] = (time.perf_counter() - start) * 1000
+            if result.get("ok"):
+                self.latency_ms.add(result["round_trip_ms"])
+            return result
+
+    async def kill(self):
+        """Stop the helper (SIGTERM first: sudo relays it, not SIGKILL)."""
+        process, self.process = self.process, None
+        if process is None or process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), 5)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+        except ProcessLookupError:
+            pass
+
+    async def close(self):
+        if self.process is not None and self.process.returncode is None:
+            self.process.stdin.close()
+            await self.process.wait()
+        self.process = None
+
+
+def install(dest=SYSTEM_DIR):
+    """Copy the helper and freshly compiled rulesets to a root-owned `dest`.
+
+    Run as root after every change to the profiles; the helper refuses to
+    run as root from anywhere a non-root user could write to.
+    """
+    import shutil
+
+    if os.geteuid() != 0:
+        raise PermissionError("install must run as root")
+    ruleset_dir = os.path.join(dest, "nft_rulesets")
+    os.makedirs(ruleset_dir, mode=0o755, exist_ok=True)
+    for filename in HELPER_MODULES:
+        shutil.copyfile(os.path.join(BASE_DIR, filename), os.path.join(dest, filename))
+    compile_rulesets(ruleset_dir)
+    for directory in (dest, ruleset_dir):
+        os.chown(directory, 0, 0)
+        os.chmod(directory, 0o755)
+    for path in ([os.path.join(dest, f) for f in HELPER_MODULES]
+                 + [os.path.join(ruleset_dir, f) for f in os.listdir(ruleset_dir)]):
+        os.chown(path, 0, 0)
+        os.chmod(path, 0o644)
+    print(f"Installed helper and rulesets to {dest}")
+
+
+def benchmark(nft="nft", ruleset_dir=RULESET_DIR, repeats=5):
+    """Compare full reloads with delta batches for every profile pair.
+
+    Needs root (or a stand-in `nft`); prints mean apply time and rule churn.
+    """
+    import subprocess
+
+    compile_rulesets(ruleset_dir)
+
+    def load(filename):
+        start = time.perf_counter()
+        subprocess.run([nft, "-f", os.path.join(ruleset_dir, filename)], check=True)
+        return (time.perf_counter() - start) * 1000
+
+    print(f"{'from -> to':<18}{'full ms':>9}{'delta ms':>10}{'full churn':>12}{'delta churn':>13}")
+    for src in PROFILE_GROUPS:
+        for dst in PROFILE_GROUPS:
+            if src == dst:
+                continue
+            full_ms = delta_ms = 0.0
+            for _ in range(repeats):
+                load(f"{src}.nft")
+                full_ms += load(f"{dst}.nft")
+                load(f"{src}.nft")
+                delta_ms += load(delta_file(src, dst))
+            full = sum(full_churn(src, dst).values())
+            delta = sum(build_delta(src, dst)[1].values())
+            print(f"{src + ' -> ' + dst:<18}{full_ms / repeats:>9.2f}"
+                  f"{delta_ms / repeats:>10.2f}{full:>12}{delta:>13}")
+
+
+if __name__ == "__main__":
+    # nft_rulesets.py [profile]            compile and print one ruleset
+    # nft_rulesets.py --benchmark [nft]    time full vs delta applies
+    # nft_rulesets.py --install [dir]      install the root helper (as root)
+    if len(sys.argv) > 1 and sys.argv[1] == "--install":
+        install(sys.argv[2] if len(sys.argv) > 2 else SYSTEM_DIR)
+        sys.exit()
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        benchmark(nft=sys.argv[2] if len(sys.argv) > 2 else "nft")
+        sys.exit()
+    for filename, digest in compile_rulesets().items():
+        print(f"{digest}  {filename}")
+    print(build_ruleset(sys.argv[1] if len(sys.argv) > 1 else "critical"))
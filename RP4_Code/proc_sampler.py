@@ -0,0 +1,376 @@
+import os
+import time
+import threading
+
+# ======= Configuration =======
+SAMPLE_INTERVAL = 0.25  # Seconds between /proc reads
+EWMA_ALPHA = 0.2  # Weight of the newest sample in the moving average
+STAT_READ_SIZE = 16384  # Enough of /proc/stat for the cpu lines of 200+ cores
+MEMINFO_READ_SIZE = 512  # MemTotal and MemAvailable are in the first lines
+RESCAN_INTERVAL = 1.0  # Seconds between /proc scans for new watched processes
+# While one of these runs, /proc is rescanned at every sample: the firewall
+# helper forks short-lived nft processes that a 1 s scan would miss
+FAST_RESCAN_WHILE = ("nft_helper.py",)
+SETTLE_TIME = 1.0  # Seconds a new non-matching pid is re-checked (exec pending)
+# =============================
+
+
+class RunningStat:
+    """Streaming mean / max / EWMA in constant memory."""
+
+    __slots__ = ("count", "total", "max", "ewma", "last", "alpha")
+
+    def __init__(self, alpha=EWMA_ALPHA):
+        self.alpha = alpha
+        self.ewma = None
+        self.last = None
+        self.reset()
+
+    def reset(self):
+        """Start a new window; the EWMA carries over between windows."""
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.last = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            self.ewma += self.alpha * (value - self.ewma)
+
+    def snapshot(self):
+        mean = self.total / self.count if self.count else self.last
+        return {"last": self.last, "mean": mean, "max": self.max, "ewma": self.ewma}
+
+
+class TrafficMeter:
+    """Per-interface byte and packet rates read from /proc/net/dev.
+
+    Every update() costs one read of the open handle and a few subtractions
+    per interface; rates are folded into RunningStats, so burstiness
+    (peak / mean throughput over the window) needs no stored history.
+    """
+
+    def __init__(self, alpha=EWMA_ALPHA, skip=(b"lo",)):
+        self.file = open("/proc/net/dev", "rb", buffering=0)
+        self.skip = skip
+        self.rx_bps = RunningStat(alpha)
+        self.tx_bps = RunningStat(alpha)
+        self.rx_pps = RunningStat(alpha)
+        self.tx_pps = RunningStat(alpha)
+        self.total_bps = RunningStat(alpha)
+        self.per_interface = {}  # name -> (rx bps, tx bps, rx pps, tx pps), last interval
+        self._prev = self.read_counters()
+        self._prev_time = time.monotonic()
+
+    def read_counters(self):
+        """{interface: (rx bytes, rx packets, tx bytes, tx packets)}"""
+        f = self.file
+        f.seek(0)
+        counters = {}
+        for line in f.readall().splitlines()[2:]:
+            name, _, values = line.partition(b":")
+            name = name.strip()
+            if name in self.skip:
+                continue
+            fields = values.split()
+            counters[name.decode()] = (
+                int(fields[0]), int(fields[1]), int(fields[8]), int(fields[9])
+            )
+        return counters
+
+    def measure(self, now=None):
+        """Read the counters; return per-interface rates since the last call."""
+        now = time.monotonic() if now is None else now
+        counters = self.read_counters()
+        elapsed = max(now - self._prev_time, 1e-6)
+        rates = {}
+        for name, values in counters.items():
+            prev = self._prev.get(name, values)
+            # A counter that went backwards (interface reset) counts as zero
+            rx_b, rx_p, tx_b, tx_p = (max(v - p, 0) for v, p in zip(values, prev))
+            rates[name] = (rx_b * 8 / elapsed, tx_b * 8 / elapsed, rx_p / elapsed, tx_p / elapsed)
+        self._prev, self._prev_time = counters, now
+        return rates
+
+    def add(self, rates):
+        """Fold one interval's per-interface rates into the aggregates."""
+        rx_bps = sum(r[0] for r in rates.values())
+        tx_bps = sum(r[1] for r in rates.values())
+        self.rx_bps.add(rx_bps)
+        self.tx_bps.add(tx_bps)
+        self.rx_pps.add(sum(r[2] for r in rates.values()))
+        self.tx_pps.add(sum(r[3] for r in rates.values()))
+        self.total_bps.add(rx_bps + tx_bps)
+        self.per_interface = rates
+
+    def update(self, now=None):
+        self.add(self.measure(now))
+
+    def reset(self):
+        for stat in (self.rx_bps, self.tx_bps, self.rx_pps, self.tx_pps, self.total_bps):
+            stat.reset()
+
+    def summary(self):
+        """Throughput (Mbps), packet rate and burstiness over the window."""
+        total = self.total_bps.snapshot()
+        mean = total["mean"] or 0.0
+        peak = total["max"] or 0.0
+        pps = (self.rx_pps.snapshot()["mean"] or 0.0) + (self.tx_pps.snapshot()["mean"] or 0.0)
+        return {
+            "mbps": round(mean / 1_000_000, 4),
+            "pps": round(pps, 1),
+            "burstiness": round(peak / mean, 2) if mean > 0 else 1.0,
+        }
+
+    def close(self):
+        self.file.close()
+
+
+class ProcessSampler:
+    """CPU % and RSS of named processes from /proc/<pid>/stat.
+
+    A process matches a name by its comm (e.g. "nft", "suricata") or by the
+    base name of a command-line argument (e.g. "client-socket.py" run by
+    python3).  The stat file of each match is opened once and re-read with
+    seek(0); /proc is only rescanned every `rescan_interval` seconds, or at
+    every sample while a `fast_rescan_while` process runs, so a sample
+    costs one read per watched process.  Values are summed per name.
+
+    A freshly forked child still carries its parent's comm and cmdline
+    until it execs, so non-matching pids are re-checked for `settle_time`
+    seconds before they are ignored for good.
+    """
+
+    def __init__(self, names, rescan_interval=RESCAN_INTERVAL,
+                 fast_rescan_while=FAST_RESCAN_WHILE, settle_time=SETTLE_TIME):
+        self.names = tuple(names)
+        self.fast_names = tuple(fast_rescan_while)
+        self.rescan_interval = rescan_interval
+        self.settle_time = settle_time
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.page_mb = os.sysconf("SC_PAGE_SIZE") / 2**20
+        self.watched = {}  # pid -> [name index, stat handle, cpu ticks, time]
+        self.ignored = {}  # pid -> when it was first seen not matching
+        self.fast = set()  # pids of running fast_rescan_while processes
+        self.next_scan = 0.0
+
+    def _match(self, pid):
+        try:
+            with open(f"/proc/{pid}/comm", "rb") as f:
+                comm = f.read().strip().decode(errors="replace")
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                args = [os.path.basename(a.decode(errors="replace")) for a in f.read().split(b"\0")[:3]]
+        except OSError:
+            return None
+        for index, name in enumerate(self.names + self.fast_names):
+            if name == comm or name in args:
+                return index
+        return None
+
+    def rescan(self, now=None):
+        now = time.monotonic() if now is None else now
+        pids = {entry for entry in os.listdir("/proc") if entry.isdigit()}
+        self.ignored = {pid: seen for pid, seen in self.ignored.items() if pid in pids}
+        self.fast &= pids
+        for pid in pids - self.watched.keys() - self.fast:
+            seen = self.ignored.get(pid)
+            if seen is not None and now - seen >= self.settle_time:
+                continue
+            index = self._match(pid)
+            if index is None:
+                if seen is None:
+                    self.ignored[pid] = now
+                continue
+            self.ignored.pop(pid, None)
+            if index >= len(self.names):
+                self.fast.add(pid)
+                continue
+            try:
+                handle = open(f"/proc/{pid}/stat", "rb", buffering=0)
+            except OSError:
+                continue
+            self.watched[pid] = [index, handle, None, None]
+
+    def sample(self, now=None):
+        """[(cpu %, RSS MB)] per name, cpu over the time since the last call."""
+        now = time.monotonic() if now is None else now
+        if self.fast or now >= self.next_scan:
+            self.rescan(now)
+            self.next_scan = now + self.rescan_interval
+        stats = [[0.0, 0.0] for _ in self.names]
+        for pid, entry in list(self.watched.items()):
+            index, handle, prev_ticks, prev_time = entry
+            try:
+                handle.seek(0)
+                data = handle.read(1024)
+            except OSError:
+                data = b""
+            if not data:  # The process exited
+                handle.close()
+                del self.watched[pid]
+                continue
+            # Fields after "(comm)": utime and stime are 11 and 12, rss is 21
+            fields = data[data.rindex(b")") + 2:].split()
+            ticks = int(fields[11]) + int(fields[12])
+            if prev_ticks is not None and now > prev_time:
+                stats[index][0] += 100.0 * (ticks - prev_ticks) / self.ticks / (now - prev_time)
+            stats[index][1] += int(fields[21]) * self.page_mb
+            entry[2], entry[3] = ticks, now
+        return [tuple(stat) for stat in stats]
+
+    def close(self):
+        for _, handle, _, _ in self.watched.values():
+            handle.close()
+        self.watched = {}
+
+
+class ProcSampler:
+    """Background sampler for CPU, RAM and network counters read from /proc.
+
+    The /proc files are opened once, unbuffered, and re-read with
+    seek(0); aggregates are updated in place, so snapshot() never blocks on a
+    measurement interval the way psutil.cpu_percent(interval=t) does.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL, alpha=EWMA_ALPHA):
+        self.interval = interval
+        self.stat_file = open("/proc/stat", "rb", buffering=0)
+        self.meminfo_file = open("/proc/meminfo", "rb", buffering=0)
+        self.cpu = RunningStat(alpha)
+        self.ram = RunningStat(alpha)
+        self.traffic = TrafficMeter(alpha)
+        self.per_core = []
+        self.samples = 0
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+        self.cpu_time = 0.0  # CPU seconds spent by the sampling thread itself
+        self.started = None
+        self._prev_cpu = self.read_cpu_times()
+
+    # --- raw readers (reuse the open handles) ---
+
+    def read_cpu_times(self):
+        """(busy, total) jiffies for the whole system followed by each core."""
+        f = self.stat_file
+        f.seek(0)
+        times = []
+        for line in f.read(STAT_READ_SIZE).splitlines():
+            if not line.startswith(b"cpu"):
+                break
+            fields = [int(x) for x in line.split()[1:]]
+            idle = fields[3] + fields[4]  # idle + iowait
+            total = sum(fields[:8])  # guest time is already counted in user
+            times.append((total - idle, total))
+        return times
+
+    def read_ram_percent(self):
+        """Used RAM in percent, computed like psutil (total - available)."""
+        f = self.meminfo_file
+        f.seek(0)
+        total = available = None
+        for line in f.read(MEMINFO_READ_SIZE).splitlines():
+            if line.startswith(b"MemTotal:"):
+                total = int(line.split()[1])
+            elif line.startswith(b"MemAvailable:"):
+                available = int(line.split()[1])
+                break
+        return (total - available) * 100.0 / total
+
+    # --- sampling ---
+
+    def sample(self):
+        """Take one sample and fold it into the running aggregates."""
+        cpu_times = self.read_cpu_times()
+        rates = self.traffic.measure()
+        ram = self.read_ram_percent()
+
+        utils = []
+        for (busy, total), (prev_busy, prev_total) in zip(cpu_times, self._prev_cpu):
+            delta = total - prev_total
+            utils.append(100.0 * (busy - prev_busy) / delta if delta > 0 else 0.0)
+        self._prev_cpu = cpu_times
+
+        with self.lock:
+            self.cpu.add(utils[0])
+            self.per_core = utils[1:]
+            self.ram.add(ram)
+            self.traffic.add(rates)
+            self.samples += 1
+
+    def snapshot(self, reset=False):
+        """Non-blocking view of the aggregates since the last reset."""
+        with self.lock:
+            snap = {
+                "cpu": self.cpu.snapshot(),
+                "ram": self.ram.snapshot(),
+                "rx_bps": self.traffic.rx_bps.snapshot(),
+                "tx_bps": self.traffic.tx_bps.snapshot(),
+                "traffic": self.traffic.summary(),
+                "per_core": list(self.per_core),
+                "samples": self.cpu.count,
+            }
+            if reset:
+                for stat in (self.cpu, self.ram):
+                    stat.reset()
+                self.traffic.reset()
+        return snap
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while self.running:
+            start = time.thread_time()
+            self.sample()
+            self.cpu_time += time.thread_time() - start
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
+
+    def start(self):
+        self.running = True
+        self.started = time.monotonic()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2 * self.interval + 1)
+        for f in (self.stat_file, self.meminfo_file):
+            f.close()
+        self.traffic.close()
+
+    def overhead(self):
+        """Fraction of one core used by the sampler since start()."""
+        wall = time.monotonic() - self.started if self.started else 0
+        return self.cpu_time / wall if wall > 0 else 0.0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, stype, value, traceback):
+        self.stop()
+
+
+if __name__ == "__main__":
+    # Measure the sampler's own CPU cost at a sub-second rate
+    duration = 10
+    with ProcSampler(interval=0.1) as sampler:
+        time.sleep(duration)
+        snap = sampler.snapshot()
+        print(f"CPU: {snap['cpu']}")
+        print(f"RAM: {snap['ram']}")
+        print(f"Traffic: {snap['traffic']}")
+        print(f"Samples: {snap['samples']} in {duration} s")
+        print(f"Sampler CPU cost: {sampler.overhead() * 100:.3f}% of one core "
+              f"({sampler.cpu_time / max(sampler.samples, 1) * 1e6:.0f} us per sample)")
@@ -2,9 +2,10 @@ import psutil
 import time
 import multiprocessing
 import random
+from ram_pressure import RamPressure
 
 
-def get_average_ram_utilization(duration, result_queue):
+def average_ram_utilization(duration):
     interval = 1
     start_time = time.time()
     utilization_values = []
@@ -13,12 +14,16 @@ def get_average_ram_utilization(duration, result_queue):
         utilization_values.append(ram_usage)
         time.sleep(interval)
     avg_utilization = sum(utilization_values) / len(utilization_values)
-    result_queue.put(avg_utilization)
     print(
         f"[+] Allocated {avg_utilization:.2f}% of available RAM for {duration} seconds..."
     )
     print("#" * 5)
     # print('ysfc',avg_utilization)
+    return avg_utilization
+
+
+def get_average_ram_utilization(duration, result_queue):
+    result_queue.put(average_ram_utilization(duration))
 
 
 def consume_ram(target_percentage, duration):
@@ -29,21 +34,28 @@ def consume_ram(target_percentage, duration):
     target_memory = available_memory * (target_percentage / 100)
     # target_memory = total_memory * (target_percentage / 100)
 
-    allocated_memory = bytearray(int(target_memory))
-
+    # Touch every page so the memory is really resident, not just reserved
     start_time = time.time()
-    while time.time() - start_time < duration:
-        time.sleep(0.5)
-    del allocated_memory
+    pressure = RamPressure()
+    try:
+        pressure.grow(int(target_memory), budget_s=duration)
+        while time.time() - start_time < duration:
+            time.sleep(0.5)
+    finally:
+        pressure.release()
     print("RAM utilization released.")
 
 
-def main(duration, result_queue):
-
+def choose_ram_target():
+    """Pick a random RAM target below or above the 50% decision threshold."""
     if random.random() < 0.5:
-        target_ram = random.randint(5, 10)  # Below 50%
-    else:
-        target_ram = random.randint(51, 70)  # Above 50%
+        return random.randint(5, 10)  # Below 50%
+    return random.randint(51, 70)  # Above 50%
+
+
+def main(duration, result_queue, target_ram=None):
+    if target_ram is None:
+        target_ram = choose_ram_target()
 
     process_1 = multiprocessing.Process(target=consume_ram, args=(target_ram, duration))
     process_2 = multiprocessing.Process(
@@ -0,0 +1,150 @@
+import os
+import mmap
+import time
+from cpu_load import constant, ramp, steps, pattern_duration, target_at
+
+# ======= Configuration =======
+CHUNK_BYTES = 64 * 1024 * 1024  # Size of each anonymous mmap region
+TOUCH_RATE_MB = 512  # MB/s of new pages touched; bounds how fast RSS grows
+CONTROL_INTERVAL = 0.5  # Seconds between target updates in run_pressure()
+RESERVE_MB = 256  # Never push MemAvailable below this (OOM guard)
+PAGE_SIZE = mmap.PAGESIZE
+# =============================
+
+
+def read_meminfo():
+    """(MemTotal, MemAvailable) in bytes."""
+    total = available = None
+    with open("/proc/meminfo", "rb") as f:
+        for line in f:
+            if line.startswith(b"MemTotal:"):
+                total = int(line.split()[1]) * 1024
+            elif line.startswith(b"MemAvailable:"):
+                available = int(line.split()[1]) * 1024
+                break
+    return total, available
+
+
+def read_rss():
+    """Resident set size of this process in bytes."""
+    with open("/proc/self/statm", "rb") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+
+class RamPressure:
+    """Resident memory held in anonymous mmap regions.
+
+    Pages are written one by one as they are added, so they are really
+    committed (RSS grows), at no more than `touch_rate_mb` MB/s.  Shrinking
+    unmaps whole regions, which returns the memory at once.
+    """
+
+    def __init__(self, chunk_bytes=CHUNK_BYTES, touch_rate_mb=TOUCH_RATE_MB):
+        self.chunk_bytes = chunk_bytes - chunk_bytes % PAGE_SIZE
+        self.touch_rate = touch_rate_mb * 1024 * 1024
+        self.regions = []  # [mmap, touched bytes]
+        self.held = 0  # Bytes committed through touched pages
+
+    def _touch(self, region, start, end):
+        for offset in range(start, end, PAGE_SIZE):
+            region[offset] = 1  # Non-zero, so the page cannot stay shared
+
+    def grow(self, nbytes, budget_s=None):
+        """Commit up to `nbytes` more; stops early when `budget_s` runs out."""
+        deadline = None if budget_s is None else time.monotonic() + budget_s
+        remaining = nbytes - nbytes % PAGE_SIZE
+        step = max(PAGE_SIZE, int(self.touch_rate * 0.01) // PAGE_SIZE * PAGE_SIZE)
+        while remaining > 0:
+            if not self.regions or self.regions[-1][1] == len(self.regions[-1][0]):
+                size = min(self.chunk_bytes, remaining + (-remaining % PAGE_SIZE))
+                self.regions.append([mmap.mmap(-1, max(size, PAGE_SIZE)), 0])
+            region, touched = self.regions[-1]
+            count = min(step, remaining, len(region) - touched)
+            started = time.monotonic()
+            self._touch(region, touched, touched + count)
+            self.regions[-1][1] += count
+            self.held += count
+            remaining -= count
+            # Rate limit: each step of `count` bytes takes at least count / rate
+            pause = count / self.touch_rate - (time.monotonic() - started)
+            if pause > 0:
+                time.sleep(pause)
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+
+    def shrink(self, nbytes):
+        """Release at least `nbytes` (whole regions, newest first)."""
+        while nbytes > 0 and self.regions:
+            region, touched = self.regions.pop()
+            region.close()
+            self.held -= touched
+            nbytes -= touched
+
+    def resize(self, target_bytes, budget_s=None):
+        if target_bytes > self.held:
+            self.grow(target_bytes - self.held, budget_s)
+        elif target_bytes < self.held - self.chunk_bytes:
+            # Keep up to one region of slack instead of thrashing at the boundary
+            self.shrink(self.held - target_bytes)
+
+    def release(self):
+        self.shrink(self.held)
+
+
+def run_pressure(pattern, interval=CONTROL_INTERVAL, report=print, pressure=None):
+    """Drive system RAM utilization (%) along `pattern`.
+
+    Each interval the memory other processes use is re-measured and the
+    held region is resized so the system total tracks the target.  Returns
+    per-interval (elapsed s, target %, achieved %, target held MB, RSS MB).
+    The memory is released at the end unless a caller-owned `pressure` is
+    passed in to carry it over to the next pattern.
+    """
+    owned = pressure is None
+    if owned:
+        pressure = RamPressure()
+    history = []
+    start = time.monotonic()
+    end = start + pattern_duration(pattern)
+    try:
+        while True:
+            now = time.monotonic()
+            if now >= end:
+                break
+            target = target_at(pattern, now - start)
+            total, available = read_meminfo()
+            others = total - available - pressure.held
+            wanted = max(0, int(total * target / 100) - others)
+            # OOM guard: leave RESERVE_MB available whatever the target says
+            ceiling = pressure.held + available - RESERVE_MB * 1024 * 1024
+            wanted = min(wanted, max(ceiling, 0))
+            pressure.resize(wanted, budget_s=interval)
+
+            total, available = read_meminfo()
+            achieved = 100.0 * (total - available) / total
+            row = (round(now - start, 1), round(target, 2), round(achieved, 2),
+                   round(wanted / 2**20), round(read_rss() / 2**20))
+            history.append(row)
+            if report:
+                report(f"[RAM] t={row[0]:5.1f}s target {row[1]:5.1f}% achieved {row[2]:5.1f}% "
+                       f"held target {row[3]} MB, RSS {row[4]} MB")
+            time.sleep(max(0.0, interval - (time.monotonic() - now)))
+    finally:
+        if owned:
+            pressure.release()
+    return history
+
+
+if __name__ == "__main__":
+    # Hold, ramp and release around the 50% decision threshold
+    total, available = read_meminfo()
+    base = 100.0 * (total - available) / total
+    print(f"MemTotal {total / 2**20:.0f} MB, baseline use {base:.1f}%")
+    low, high = base + 10, min(base + 40, 90)
+    pattern = steps((4, low)) + ramp(low, high, 6) + constant(high, 4) + steps((3, base))
+    history = run_pressure(pattern)
+    settled = [row for row in history if row[0] >= 1.0]
+    errors = [abs(row[2] - row[1]) for row in settled]
+    print(f"Mean |achieved - target|: {sum(errors) / len(errors):.2f} points, "
+          f"max {max(errors):.2f} over {len(errors)} intervals")
+    print(f"RSS after release: {read_rss() / 2**20:.0f} MB")
@@ -0,0 +1,151 @@
+import os
+import csv
+import sys
+import time
+
+# ======= Configuration =======
+MIN_INTERVAL = 10  # Seconds; the reporting interval while metrics move
+MAX_INTERVAL = 120  # Seconds; the back-off ceiling while metrics are flat
+BACKOFF = 2.0  # Interval multiplier after each report of a stable period
+EWMA_ALPHA = 0.3  # Weight of the newest sample in the smoothed metrics
+STABLE_DELTA = (5.0, 2.0, 1.0)  # Max cpu %, ram %, traffic Mbps off the EWMA
+# =============================
+
+
+class ReportScheduler:
+    """Decides, sample by sample, whether the node should report now.
+
+    Flat metrics stretch the interval from MIN_INTERVAL up to MAX_INTERVAL;
+    a sample off its EWMA by more than STABLE_DELTA resets it, and a sample
+    whose predicted profile differs from the last reported one is sent at
+    once.  The controller can cap the rate with a minimum gap (rate_cap).
+    """
+
+    def __init__(self, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 backoff=BACKOFF, alpha=EWMA_ALPHA, stable_delta=STABLE_DELTA):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.alpha = alpha
+        self.stable_delta = stable_delta
+        self.rate_cap = 0.0
+        self.interval = min_interval
+        self.ewma = None
+        self.last_report = None
+        self.last_profile = None
+
+    def observe(self, now, metrics, predicted=None):
+        """Fold in one (cpu, ram, traffic) sample; return why to report, or None."""
+        if self.ewma is None:
+            self.ewma = list(metrics)
+            volatile = False
+        else:
+            volatile = any(
+                abs(value - smooth) > delta
+                for value, smooth, delta in zip(metrics, self.ewma, self.stable_delta)
+            )
+            self.ewma = [
+                smooth + self.alpha * (value - smooth)
+                for value, smooth in zip(metrics, self.ewma)
+            ]
+        if volatile:
+            self.interval = self.min_interval
+
+        if self.last_report is None:
+            return "first"
+        elapsed = now - self.last_report
+        if elapsed < self.rate_cap:
+            return None
+        if predicted is not None and predicted != self.last_profile:
+            return "profile change"
+        if elapsed >= self.interval:
+            return "volatile" if volatile else "interval"
+        return None
+
+    def reported(self, now, profile):
+        """Record a delivered report and the profile the controller answered."""
+        if self.last_report is not None and now - self.last_report >= self.interval:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        self.last_report = now
+        self.last_profile = profile
+
+
+def load_trace(path):
+    """(seconds since start, cpu, ram) rows of a resources_log CSV."""
+    rows = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            stamp = time.mktime(time.strptime(f"{row['Date']} {row['Time']}", "%Y-%m-%d %H:%M:%S"))
+            rows.append((stamp, float(row["CPU (%)"]), float(row["RAM (%)"])))
+    start = rows[0][0] if rows else 0
+    return [(stamp - start, cpu, ram) for stamp, cpu, ram in rows]
+
+
+def replay(trace, policy, scheduler=None, predict=True):
+    """Replay a trace; returns (reports sent, samples the controller was stale,
+    list of reaction delays in seconds for each profile change).
+
+    predict=False models a node without a policy copy (thresholds only).
+    """
+    reports = stale = 0
+    delays = []
+    view = None  # Profile the controller last decided for this node
+    changed_at = None
+    truth_prev = None
+    for now, cpu, ram in trace:
+        truth = policy.decide(cpu, ram)
+        if truth != truth_prev:
+            changed_at = now
+            truth_prev = truth
+        send = scheduler is None or scheduler.observe(
+            now, (cpu, ram, 0.0), truth if predict else None
+        )
+        if send:
+            reports += 1
+            view = truth  # The controller runs the same policy
+            if scheduler is not None:
+                scheduler.reported(now, view)
+        if view != truth:
+            stale += 1
+        elif changed_at is not None:
+            delays.append(now - changed_at)
+            changed_at = None
+    return reports, stale, delays
+
+
+def drift_trace(hours=2, step=10, rate=0.5):
+    """Synthetic (seconds, cpu, ram) trace whose cpu drifts `rate` % per
+    sample between 10 and 90 %: never volatile, yet crossing thresholds."""
+    rows = []
+    cpu, direction = 10.0, 1
+    for i in range(int(hours * 3600 / step)):
+        rows.append((i * step, cpu, 40.0))
+        if not 10 <= cpu + direction * rate <= 90:
+            direction = -direction
+        cpu += direction * rate
+    return rows
+
+
+if __name__ == "__main__":
+    # Fixed 10 s reporting vs the adaptive scheduler.  Recorded profile
+    # changes come with cpu jumps, which the volatility check alone catches;
+    # the slow drift shows what the policy's prediction adds
+    from decision_policy import DEFAULT_POLICY
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    paths = sys.argv[1:] or [
+        os.path.join(here, "system_stats_log.csv"),
+        os.path.join(here, "..", "RP5_Code", "system_stats_log.csv"),
+    ]
+    traces = [(os.path.relpath(path), load_trace(path)) for path in paths]
+    traces.append(("synthetic slow drift", drift_trace()))
+    for name, trace in traces:
+        fixed, _, _ = replay(trace, DEFAULT_POLICY)
+        print(f"{name}: {len(trace)} samples over {trace[-1][0] / 3600:.1f} h")
+        print(f"  fixed:     {fixed} reports")
+        for label, predict in (("adaptive", True), ("no policy", False)):
+            sent, stale, delays = replay(trace, DEFAULT_POLICY, ReportScheduler(), predict)
+            worst = max(delays) if delays else 0
+            print(f"  {label + ':':<11}{sent} reports ({100 * (1 - sent / fixed):.0f}% fewer), "
+                  f"{len(delays)} profile changes, worst reaction {worst:.0f} s, "
+                  f"{stale} stale samples")
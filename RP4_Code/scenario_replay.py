@@ -0,0 +1,185 @@
+import os
+import csv
+import bisect
+import itertools
+import time
+import socket
+import argparse
+import multiprocessing
+from cpu_load import run_on_cores, pattern_duration, target_at
+from ram_pressure import RamPressure, run_pressure
+
+# ======= Configuration =======
+MAX_GAP = 60  # Seconds; longer recording gaps (e.g. overnight) collapse to one interval
+TRAFFIC_PACKET = 1400  # UDP payload bytes of the traffic replay
+TRAFFIC_TICK = 0.01  # Seconds between pacing decisions of the traffic replay
+# =============================
+
+
+def load_timeline(path):
+    """[(seconds since start, cpu %, ram %, traffic Mbps)] from a resources_log
+    CSV or a binary log exported with `binary_log.py export` (--ms too).
+
+    Traffic is "RX (Mbps)" + "TX (Mbps)"; the plain CSV log has no network
+    columns, so replaying it leaves traffic at 0.
+    """
+    rows = []
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        if "RX (Mbps)" not in (reader.fieldnames or ()):
+            print(f"{path} has no RX/TX columns, replaying without traffic")
+        for row in reader:
+            clock, _, millis = row["Time"].partition(".")
+            stamp = time.mktime(
+                time.strptime(f"{row['Date']} {clock}", "%Y-%m-%d %H:%M:%S")
+            ) + float(f"0.{millis or 0}")
+            traffic = float(row.get("RX (Mbps)") or 0.0) + float(row.get("TX (Mbps)") or 0.0)
+            rows.append((stamp, float(row["CPU (%)"]), float(row["RAM (%)"]), traffic))
+    if not rows:
+        raise ValueError(f"{path} holds no samples")
+    start = rows[0][0]
+    return [(stamp - start, cpu, ram, traffic) for stamp, cpu, ram, traffic in rows]
+
+
+class Scenario:
+    """A recorded timeline replayed as load patterns.
+
+    Each recorded sample is an interval mean, so it is held until the next
+    sample.  `compression` divides all durations (10 = ten times faster);
+    with `loop` the timeline restarts at the end, otherwise the last values
+    are held.  window(t) hands out the next t seconds as (cpu, ram,
+    traffic) patterns in the cpu_load segment format.
+    """
+
+    def __init__(self, timeline, compression=1.0, loop=True, max_gap=MAX_GAP):
+        self.compression = compression
+        self.loop = loop
+        self.segments = []  # (duration s, cpu %, ram %, traffic Mbps)
+        step = None  # Last regular sampling interval
+        for (t0, cpu, ram, traffic), (t1, *_) in zip(timeline, timeline[1:]):
+            gap = t1 - t0
+            if gap > max_gap:
+                gap = step or max_gap  # Logger was down: skip the outage
+            elif gap < 0:
+                # Local clock went back (DST fall-back, clock step): the
+                # sample still stood for one regular interval
+                gap = step or max_gap
+            else:
+                step = gap
+            self.segments.append((gap / compression, cpu, ram, traffic))
+        last = timeline[-1]
+        self.segments.append(((step or 1.0) / compression, last[1], last[2], last[3]))
+        self.starts = list(itertools.accumulate((s[0] for s in self.segments), initial=0.0))
+        self.duration = self.starts.pop()
+        self.position = 0.0
+        self.loops = 0
+
+    @classmethod
+    def from_csv(cls, path, compression=1.0, loop=True):
+        return cls(load_timeline(path), compression, loop)
+
+    def window(self, t):
+        """Patterns for the next `t` seconds of replay; advances the position."""
+        cpu, ram, traffic = [], [], []
+        remaining = t
+        while remaining > 1e-9:
+            if self.position >= self.duration:
+                if not self.loop:
+                    _, c, r, n = self.segments[-1]
+                    for pattern, value in ((cpu, c), (ram, r), (traffic, n)):
+                        pattern.append((remaining, value, value))
+                    break
+                self.position -= self.duration
+                self.loops += 1
+            index = bisect.bisect_right(self.starts, self.position) - 1
+            duration, c, r, n = self.segments[index]
+            take = min(self.starts[index] + duration - self.position, remaining)
+            for pattern, value in ((cpu, c), (ram, r), (traffic, n)):
+                pattern.append((take, value, value))
+            self.position += take
+            remaining -= take
+        return cpu, ram, traffic
+
+
+# Memory held by a pool worker across periods, so RSS does not saw-tooth
+_replay_pressure = None
+
+
+def replay_ram(pattern):
+    """Pool task: follow a RAM pattern, keeping the memory for the next one."""
+    global _replay_pressure
+    if _replay_pressure is None:
+        _replay_pressure = RamPressure()
+    history = run_pressure(pattern, report=None, pressure=_replay_pressure)
+    return history[-1] if history else None
+
+
+def run_traffic(pattern, sink):
+    """Send paced UDP datagrams to `sink` (host, port) at the pattern's Mbps."""
+    payload = bytes(TRAFFIC_PACKET)
+    sent = 0
+    start = time.monotonic()
+    end = start + pattern_duration(pattern)
+    budget = 0.0
+    last = start
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        while True:
+            now = time.monotonic()
+            if now >= end:
+                break
+            budget += target_at(pattern, now - start) * 1_000_000 / 8 * (now - last)
+            last = now
+            while budget >= len(payload):
+                try:
+                    sock.sendto(payload, sink)
+                except OSError:
+                    pass  # Unreachable sink: keep pacing, the meter sees what left
+                sent += len(payload)
+                budget -= len(payload)
+            time.sleep(TRAFFIC_TICK)
+    elapsed = time.monotonic() - start
+    return round(sent * 8 / elapsed / 1_000_000, 4) if elapsed > 0 else 0.0
+
+
+def replay(path, compression=1.0, loops=1, sink=None, window=10.0):
+    """Replay a trace standalone (no controller), `window` seconds at a time."""
+    scenario = Scenario.from_csv(path, compression, loop=True)
+    total = scenario.duration * loops
+    print(f"Replaying {path}: {len(scenario.segments)} samples, "
+          f"{scenario.duration:.1f} s per loop x {loops}")
+    elapsed = 0.0
+    with multiprocessing.Pool(1) as ram_pool:
+        while elapsed < total - 1e-9:
+            t = min(window, total - elapsed)
+            cpu, ram, traffic = scenario.window(t)
+            ram_result = ram_pool.apply_async(replay_ram, (ram,))
+            traffic_process = None
+            if sink and any(value for _, value, _ in traffic):
+                traffic_process = multiprocessing.Process(target=run_traffic, args=(traffic, sink))
+                traffic_process.start()
+            results = run_on_cores(cpu)
+            last_ram = ram_result.get()
+            if traffic_process is not None:
+                traffic_process.join()
+            cpu_target = sum(d * v for d, v, _ in cpu) / t
+            achieved = sum(r["achieved"] for r in results) / len(results)
+            print(f"t={elapsed:7.1f}s  CPU target {cpu_target:5.1f}% achieved {achieved:5.1f}%"
+                  + (f"  RAM target {last_ram[1]:5.1f}% achieved {last_ram[2]:5.1f}%"
+                     if last_ram else ""))
+            elapsed += t
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded cpu/ram/traffic trace")
+    parser.add_argument("trace", nargs="?", default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "system_stats_log.csv"))
+    parser.add_argument("--compress", type=float, default=1.0, help="time compression factor")
+    parser.add_argument("--loops", type=int, default=1, help="times to play the trace")
+    parser.add_argument("--sink", help="host:port receiving the UDP traffic replay")
+    parser.add_argument("--window", type=float, default=10.0, help="seconds per control window")
+    args = parser.parse_args()
+    sink = None
+    if args.sink:
+        host, _, port = args.sink.rpartition(":")
+        sink = (host, int(port))
+    replay(args.trace, args.compress, args.loops, sink, args.window)
@@ -0,0 +1,152 @@
+import os
+import mmap
+import time
+import struct
+from telemetry_codec import SAMPLE_SIZE
+
+# ======= Configuration =======
+BUFFER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "telemetry_buffer.bin")
+BUFFER_CAPACITY = 8640  # Samples kept while the controller is down (a day at 10 s)
+# =============================
+
+# header: magic | layout version | record size | capacity | head | count
+HEADER = struct.Struct(">4sBHIII")
+MAGIC = b"TBUF"
+LAYOUT_VERSION = 1
+
+
+class TelemetryRing:
+    """Bounded on-disk FIFO of fixed-size sample records, memory-mapped.
+
+    When full, the oldest sample is overwritten.  A record is written
+    before the header that publishes it, so a crash loses at most the
+    sample being appended.
+    """
+
+    def __init__(self, path=BUFFER_FILE, capacity=BUFFER_CAPACITY, record_size=SAMPLE_SIZE):
+        self.path = path
+        self.capacity = capacity
+        self.record_size = record_size
+        self.dropped = 0  # Samples overwritten because the ring was full
+        size = HEADER.size + capacity * record_size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        magic, version, rec_size, cap, self.head, self.count = HEADER.unpack_from(self.map)
+        if (magic, version, rec_size, cap) != (MAGIC, LAYOUT_VERSION, record_size, capacity):
+            # New file or a different layout: start empty
+            self.head = self.count = 0
+            self._write_header()
+
+    def _write_header(self):
+        HEADER.pack_into(
+            self.map, 0, MAGIC, LAYOUT_VERSION, self.record_size,
+            self.capacity, self.head, self.count,
+        )
+
+    def _offset(self, index):
+        return HEADER.size + (index % self.capacity) * self.record_size
+
+    def __len__(self):
+        return self.count
+
+    def append(self, record):
+        """Queue one encoded sample, overwriting the oldest when full."""
+        if len(record) != self.record_size:
+            raise ValueError(f"Record is {len(record)} bytes, expected {self.record_size}")
+        offset = self._offset(self.head + self.count)
+        self.map[offset:offset + self.record_size] = record
+        if self.count == self.capacity:
+            self.head = (self.head + 1) % self.capacity
+            self.dropped += 1
+        else:
+            self.count += 1
+        self._write_header()
+
+    def peek(self, n):
+        """Up to `n` oldest records back to back, without removing them."""
+        n = min(n, self.count)
+        first = min(n, self.capacity - self.head)
+        start = self._offset(self.head)
+        data = self.map[start:start + first * self.record_size]
+        if n > first:
+            # Wrapped around the end of the ring
+            data += self.map[HEADER.size:HEADER.size + (n - first) * self.record_size]
+        return data
+
+    def drop(self, n):
+        """Remove the `n` oldest records once they have been delivered."""
+        n = min(n, self.count)
+        self.head = (self.head + n) % self.capacity
+        self.count -= n
+        self._write_header()
+
+    def flush(self):
+        self.map.flush()
+
+    def close(self):
+        if not self.map.closed:
+            self.map.flush()
+            self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, etype, value, traceback):
+        self.close()
+
+
+def benchmark(samples=512, batch_size=128):
+    """Per-sample cost of one encrypted report per sample vs buffered batches."""
+    import tempfile
+    import ascon
+    from telemetry_codec import encode_report, decode_report, encode_sample, encode_batch, decode_batch
+
+    key = os.urandom(16)
+    report = {
+        "cpu": 63.4,
+        "ram": 41.25,
+        "traffic": 1.37,
+        "current_profile": "High Activity",
+        "source_ip": "192.168.30.109",
+        "source_port": 51544,
+    }
+
+    start = time.perf_counter()
+    wire = 0
+    for _ in range(samples):
+        nonce = os.urandom(16)
+        ct = ascon.ascon_encrypt(key, nonce, b"", encode_report(report))
+        wire += len(ct)
+        decode_report(ascon.ascon_decrypt(key, nonce, b"", ct))
+    single = (time.perf_counter() - start) / samples
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with TelemetryRing(os.path.join(tmp, "ring.bin"), capacity=samples) as ring:
+            start = time.perf_counter()
+            batched_wire = 0
+            now = time.time()
+            for i in range(samples):
+                report["cpu"] = 60 + i % 7  # Realistic, not perfectly repetitive
+                ring.append(encode_sample(now + 10 * i, report))
+            while len(ring):
+                data = ring.peek(batch_size)
+                nonce = os.urandom(16)
+                ct = ascon.ascon_encrypt(key, nonce, b"", encode_batch(data))
+                batched_wire += len(ct)
+                decode_batch(ascon.ascon_decrypt(key, nonce, b"", ct))
+                ring.drop(len(data) // SAMPLE_SIZE)
+            batched = (time.perf_counter() - start) / samples
+
+    print(f" single: {single * 1e6:8.1f} us/sample, {wire / samples:5.1f} bytes/sample")
+    print(f"batched: {batched * 1e6:8.1f} us/sample, {batched_wire / samples:5.1f} bytes/sample "
+          f"({batch_size} samples/message)")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,196 @@
+import json
+import time
+import zlib
+import socket
+import struct
+
+# ======= Report layout (codec version 3) =======
+# version | cpu % | ram % | traffic Mbps | profile id | source ip | source port
+# Version 2 appends the firewall acknowledgement for the last apply:
+# applied profile id | apply duration ms | ack flags
+# Version 3 (traced reports only) appends the trace context:
+# trace id | sample unix time
+CODEC_VERSION = 3
+REPORT_FORMAT = ">BfffBIH"
+REPORT_SIZE = struct.calcsize(REPORT_FORMAT)
+ACK_FORMAT = ">BfB"
+ACK_SIZE = struct.calcsize(ACK_FORMAT)
+ACK_FAILED = 0x01  # The last apply failed; the applied profile is still enforced
+ACK_PENDING = 0x02  # A newer target is queued but not applied yet
+TRACE_FORMAT = ">Qd"
+TRACE_SIZE = struct.calcsize(TRACE_FORMAT)
+
+PROFILE_IDS = {
+    "Idle": 0,
+    "Low Activity": 1,
+    "High Activity": 2,
+    "Critical Task": 3,
+}
+PROFILE_NAMES = {v: k for k, v in PROFILE_IDS.items()}
+UNKNOWN_PROFILE = 0xFF
+# ===============================================
+
+# ======= Buffered samples and batches =======
+# sample: unix time | cpu % | ram % | traffic Mbps | profile id
+# batch:  batch version | sample count | zlib(samples back to back)
+SAMPLE_FORMAT = ">dfffB"
+SAMPLE_SIZE = struct.calcsize(SAMPLE_FORMAT)
+BATCH_VERSION = 1
+BATCH_HEADER_FORMAT = ">BH"
+BATCH_HEADER_SIZE = struct.calcsize(BATCH_HEADER_FORMAT)
+# ============================================
+
+
+def parse_traffic(value):
+    """Traffic in Mbps from either a float or the legacy "12.3Mbps" string."""
+    if isinstance(value, str):
+        return float(value.replace("Mbps", ""))
+    return float(value)
+
+
+def _ip_to_int(ip):
+    return int.from_bytes(socket.inet_aton(ip or "0.0.0.0"), "big")
+
+
+def _int_to_ip(value):
+    return socket.inet_ntoa(value.to_bytes(4, "big"))
+
+
+def encode_report(report, use_json=False):
+    """Serialize a telemetry report dict; JSON is kept as a debug fallback.
+
+    Reports carrying "applied_profile" are written as version 2 with the
+    firewall acknowledgement appended, traced reports (a "trace" dict with
+    "id" and "sampled_at") as version 3; others keep the version 1 layout.
+    """
+    if use_json:
+        return json.dumps(report, sort_keys=True, separators=(",", ":")).encode()
+    trace = report.get("trace")
+    has_ack = "applied_profile" in report or trace is not None
+    data = struct.pack(
+        REPORT_FORMAT,
+        CODEC_VERSION if trace is not None else 2 if has_ack else 1,
+        float(report["cpu"]),
+        float(report["ram"]),
+        parse_traffic(report.get("traffic", 0.0)),
+        PROFILE_IDS.get(report.get("current_profile"), UNKNOWN_PROFILE),
+        _ip_to_int(report.get("source_ip")),
+        int(report.get("source_port", 0)),
+    )
+    if has_ack:
+        flags = 0
+        if report.get("apply_failed"):
+            flags |= ACK_FAILED
+        if report.get("apply_pending"):
+            flags |= ACK_PENDING
+        data += struct.pack(
+            ACK_FORMAT,
+            PROFILE_IDS.get(report.get("applied_profile"), UNKNOWN_PROFILE),
+            float(report.get("apply_ms", 0.0)),
+            flags,
+        )
+    if trace is not None:
+        data += struct.pack(TRACE_FORMAT, trace["id"], trace["sampled_at"])
+    return data
+
+
+def decode_report(data):
+    """Parse a report produced by encode_report (binary or JSON) into a dict."""
+    if data[:1] == b"{":
+        return json.loads(data.decode())
+    version = data[0] if data else None
+    sizes = {1: REPORT_SIZE, 2: REPORT_SIZE + ACK_SIZE, 3: REPORT_SIZE + ACK_SIZE + TRACE_SIZE}
+    if sizes.get(version) != len(data):
+        raise ValueError(f"Unsupported report ({len(data)} bytes, version {version})")
+    _, cpu, ram, traffic, profile_id, ip, port = struct.unpack_from(REPORT_FORMAT, data)
+    report = {
+        "cpu": round(cpu, 2),
+        "ram": round(ram, 2),
+        "traffic": round(traffic, 4),
+        "current_profile": PROFILE_NAMES.get(profile_id),
+        "source_ip": _int_to_ip(ip),
+        "source_port": port,
+    }
+    if version >= 2:
+        applied_id, apply_ms, flags = struct.unpack_from(ACK_FORMAT, data, REPORT_SIZE)
+        report["applied_profile"] = PROFILE_NAMES.get(applied_id)
+        report["apply_ms"] = round(apply_ms, 2)
+        report["apply_failed"] = bool(flags & ACK_FAILED)
+        report["apply_pending"] = bool(flags & ACK_PENDING)
+    if version == 3:
+        trace_id, sampled_at = struct.unpack_from(TRACE_FORMAT, data, REPORT_SIZE + ACK_SIZE)
+        report["trace"] = {"id": trace_id, "sampled_at": sampled_at}
+    return report
+
+
+def encode_sample(timestamp, report):
+    """Fixed-size record of one sample for the on-node ring buffer."""
+    return struct.pack(
+        SAMPLE_FORMAT,
+        timestamp,
+        float(report["cpu"]),
+        float(report["ram"]),
+        parse_traffic(report.get("traffic", 0.0)),
+        PROFILE_IDS.get(report.get("current_profile"), UNKNOWN_PROFILE),
+    )
+
+
+def encode_batch(samples):
+    """Compress back-to-back encoded samples into one batch message body."""
+    count, rest = divmod(len(samples), SAMPLE_SIZE)
+    if rest:
+        raise ValueError(f"Batch of {len(samples)} bytes is not whole samples")
+    return struct.pack(BATCH_HEADER_FORMAT, BATCH_VERSION, count) + zlib.compress(samples, 9)
+
+
+def decode_batch(data):
+    """[(time, cpu, ram, traffic, profile)] from encode_batch, in one pass."""
+    if len(data) < BATCH_HEADER_SIZE:
+        raise ValueError(f"Batch too short ({len(data)} bytes)")
+    version, count = struct.unpack_from(BATCH_HEADER_FORMAT, data)
+    if version != BATCH_VERSION:
+        raise ValueError(f"Unsupported batch version {version}")
+    try:
+        # Bounded, so a small message cannot inflate into a huge buffer
+        samples = zlib.decompressobj().decompress(
+            data[BATCH_HEADER_SIZE:], count * SAMPLE_SIZE + 1
+        )
+    except zlib.error as e:
+        raise ValueError(f"Corrupt batch: {e}") from e
+    if len(samples) != count * SAMPLE_SIZE:
+        raise ValueError(f"Batch holds {len(samples)} bytes, expected {count} samples")
+    return [
+        (timestamp, cpu, ram, traffic, PROFILE_NAMES.get(profile_id))
+        for timestamp, cpu, ram, traffic, profile_id in struct.iter_unpack(SAMPLE_FORMAT, samples)
+    ]
+
+
+def benchmark(rounds=200):
+    """Time encode+encrypt+decrypt+decode for the binary and JSON encodings."""
+    import os
+    import ascon
+
+    key = os.urandom(16)
+    report = {
+        "cpu": 63.4,
+        "ram": 41.25,
+        "traffic": 1.37,
+        "current_profile": "High Activity",
+        "source_ip": "192.168.30.109",
+        "source_port": 51544,
+    }
+    legacy = dict(report, traffic=f"{report['traffic']}Mbps")
+    cases = [("binary", report, False), ("json", legacy, True)]
+    for name, payload, use_json in cases:
+        size = len(encode_report(payload, use_json))
+        start = time.perf_counter()
+        for _ in range(rounds):
+            nonce = os.urandom(16)
+            ct = ascon.ascon_encrypt(key, nonce, b"", encode_report(payload, use_json))
+            decode_report(ascon.ascon_decrypt(key, nonce, b"", ct))
+        per_msg = (time.perf_counter() - start) / rounds * 1e6
+        print(f"{name:>6}: {size:4d} bytes/report, {per_msg:8.1f} us end-to-end")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,127 @@
+import csv
+import os
+import struct
+import subprocess
+import sys
+
+import pytest
+
+from binary_log import (
+    FLAG_NETWORK,
+    MAGIC,
+    BinaryLogWriter,
+    RecordRing,
+    export_csv,
+    iter_records,
+    load,
+    read_header,
+    record_format,
+)
+
+T0 = 1_700_000_000 * 10**9
+
+
+def write_v1_log(path, rows, cores=2):
+    """A log as the first layout wrote it: 16-byte header, no process names."""
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4sBHB8x", MAGIC, 1, cores, FLAG_NETWORK))
+        record = struct.Struct(record_format(cores, network=True))
+        for row in rows:
+            f.write(record.pack(*row))
+
+
+V1_ROWS = [(T0 + i * 10**10, 10.0 * i, 50.0, 1.0, 2.0, 0.5, 0.25) for i in range(3)]
+
+
+def test_v1_log_is_read(tmp_path):
+    path = str(tmp_path / "v1.rlog")
+    write_v1_log(path, V1_ROWS)
+    with open(path, "rb") as f:
+        assert read_header(f) == (2, True, ())
+    assert list(iter_records(path)) == V1_ROWS
+
+
+def test_v1_log_loads_and_accepts_appends(tmp_path):
+    np = pytest.importorskip("numpy")
+    path = str(tmp_path / "v1.rlog")
+    write_v1_log(path, V1_ROWS)
+    with BinaryLogWriter(path, cores=2, network=True) as log:
+        log.append(T0 + 3 * 10**10, 30.0, 50.0, [1.0, 2.0], 0.5, 0.25)
+    data = load(path)
+    assert data.dtype.names == ("t_ns", "cpu", "ram", "cpu0", "cpu1", "rx_mbps", "tx_mbps")
+    assert np.allclose(data["cpu"], [0.0, 10.0, 20.0, 30.0])
+
+
+def test_v2_log_with_processes(tmp_path):
+    np = pytest.importorskip("numpy")
+    path = str(tmp_path / "v2.rlog")
+    processes = ("nft", "client-socket.py")
+    with BinaryLogWriter(path, cores=1, network=False, processes=processes) as log:
+        log.append(T0, 12.0, 34.0, [12.0], process_stats=[(1.5, 8.0), (20.0, 64.0)])
+    with open(path, "rb") as f:
+        assert read_header(f) == (1, False, processes)
+    data = load(path)
+    assert np.allclose(data["nft_cpu"], [1.5])
+    assert np.allclose(data["client-socket.py_rss_mb"], [64.0])
+    with pytest.raises(ValueError):
+        BinaryLogWriter(path, cores=1, network=False, processes=("nft",))
+
+
+def test_torn_record_is_cut_on_reopen(tmp_path):
+    path = str(tmp_path / "torn.rlog")
+    write_v1_log(path, V1_ROWS)
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03")
+    assert len(list(iter_records(path))) == 3
+    BinaryLogWriter(path, cores=2, network=True).close()
+    assert list(iter_records(path)) == V1_ROWS
+
+
+def test_not_a_log_is_value_error(tmp_path):
+    path = tmp_path / "junk.rlog"
+    path.write_bytes(b"RLOG\x09" + bytes(11))
+    with open(path, "rb") as f, pytest.raises(ValueError):
+        read_header(f)
+
+
+def test_export_matches_records(tmp_path):
+    path = str(tmp_path / "v1.rlog")
+    write_v1_log(path, V1_ROWS)
+    out = str(tmp_path / "v1.csv")
+    assert export_csv(path, out, millis=True) == 3
+    with open(out, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [float(row["CPU (%)"]) for row in rows] == [0.0, 10.0, 20.0]
+    assert rows[0]["Time"].endswith(".000")
+    assert float(rows[0]["RX (Mbps)"]) == 0.5
+
+
+def test_record_ring_drains_in_order_and_counts_drops():
+    ring = RecordRing("<qf", capacity=3)
+    for i in range(5):
+        ring.append(i, float(i))
+    assert ring.dropped == 2
+    assert [i for i, _ in struct.iter_unpack("<qf", ring.drain())] == [2, 3, 4]
+    assert ring.drain() == b""
+
+
+def run_cli(*args):
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "binary_log.py")
+    return subprocess.run([sys.executable, script, *args], capture_output=True, text=True, timeout=60)
+
+
+@pytest.mark.parametrize("args", [(), ("export",), ("exprot", "x.rlog"), ("benchmark", "ten")])
+def test_cli_rejects_incomplete_or_unknown_commands(args):
+    result = run_cli(*args)
+    assert result.returncode == 2
+    assert "usage:" in result.stderr
+
+
+def test_cli_export(tmp_path):
+    path = str(tmp_path / "v1.rlog")
+    write_v1_log(path, V1_ROWS)
+    result = run_cli("export", path, "--ms")
+    assert result.returncode == 0, result.stderr
+    assert "Exported 3 records" in result.stdout
+    with open(tmp_path / "v1.csv", newline="") as f:
+        assert next(csv.DictReader(f))["Time"].endswith(".000")
@@ -0,0 +1,31 @@
+import os
+import time
+
+from csv_logger import RotatingCsvWriter
+
+HEADER = ["Date", "Time", "Profile"]
+
+
+def test_size_counts_encoded_bytes(tmp_path):
+    path = str(tmp_path / "log.csv")
+    with RotatingCsvWriter(path, HEADER, rotate_daily=False) as writer:
+        writer.writerow(["2026-10-19", "12:00:00", "Kritische Aufgabe – µs"])
+        writer.flush()
+        assert writer.size == os.path.getsize(path)
+    with open(path, "rb") as f:
+        assert f.read().endswith("µs\r\n".encode())
+    with RotatingCsvWriter(path, HEADER, rotate_daily=False) as writer:
+        assert writer.size == os.path.getsize(path)
+
+
+def test_rotates_past_max_bytes(tmp_path):
+    path = str(tmp_path / "log.csv")
+    row = ["2026-10-19", "12:00:00", "ü" * 40]  # 80 bytes, 40 characters
+    with RotatingCsvWriter(path, HEADER, max_bytes=200, rotate_daily=False) as writer:
+        for _ in range(3):
+            writer.writerow(row)
+    day = time.strftime("%Y%m%d")
+    rotated = tmp_path / f"log-{day}.csv"
+    assert rotated.stat().st_size >= 200
+    with open(path, encoding="utf-8", newline="") as f:
+        assert f.read().splitlines()[0] == ",".join(HEADER)
@@ -0,0 +1,63 @@
+import math
+import struct
+
+import pytest
+
+from decision_policy import DEFAULT_POLICY, HEADER_FORMAT, DecisionPolicy, Rule, above
+
+
+def legacy(cpu, ram):
+    """The controller's original if/elif chain."""
+    if cpu > 70 and ram > 50:
+        return "Critical Task"
+    elif cpu > 70 and ram < 50:
+        return "High Activity"
+    elif 30 < cpu <= 70 and ram > 50:
+        return "High Activity"
+    elif 30 < cpu <= 70 and ram <= 50:
+        return "Low Activity"
+    elif cpu < 20 and ram < 25:
+        return "Idle"
+    return "Low Activity"
+
+
+def test_default_policy_matches_legacy_chain():
+    policy = DecisionPolicy.decode(DEFAULT_POLICY.encode())
+    # Quarter steps hit every boundary (20, 25, 30, 50, 70) exactly
+    grid = [x / 4 for x in range(-4, 404)] + [math.nan, math.inf, -math.inf]
+    for cpu in grid:
+        for ram in grid:
+            assert policy.decide(cpu, ram) == legacy(cpu, ram), (cpu, ram)
+
+
+def test_round_trip_keeps_rules():
+    policy = DecisionPolicy(7, [Rule("Idle", traffic=above(2.5))], default="High Activity")
+    decoded = DecisionPolicy.decode(policy.encode())
+    assert decoded.version == 7
+    assert decoded.default == "High Activity"
+    assert decoded.decide(0, 0, 3.0) == "Idle"
+    assert decoded.decide(0, 0, 2.5) == "High Activity"
+
+
+@pytest.mark.parametrize("size", [0, 1, struct.calcsize(HEADER_FORMAT) - 1])
+def test_truncated_header_is_value_error(size):
+    with pytest.raises(ValueError):
+        DecisionPolicy.decode(DEFAULT_POLICY.encode()[:size])
+
+
+def test_truncated_rules_are_value_error():
+    with pytest.raises(ValueError):
+        DecisionPolicy.decode(DEFAULT_POLICY.encode()[:-1])
+
+
+def test_unknown_profile_ids_are_value_error():
+    data = bytearray(DEFAULT_POLICY.encode())
+    header = struct.calcsize(HEADER_FORMAT)
+    bad_rule = data[:]
+    bad_rule[header] = 0xEE
+    with pytest.raises(ValueError):
+        DecisionPolicy.decode(bytes(bad_rule))
+    bad_default = data[:]
+    bad_default[3] = 0xEE
+    with pytest.raises(ValueError):
+        DecisionPolicy.decode(bytes(bad_default))
@@ -0,0 +1,88 @@
+import asyncio
+import importlib.util
+import os
+
+import pytest
+
+import latency_trace
+from decision_policy import DEFAULT_POLICY
+from latency_trace import BUCKET_EDGES_MS, LatencyHistogram, StageHistograms
+
+
+@pytest.fixture(scope="module")
+def client():
+    """client-socket.py, which cannot be imported by name."""
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "client-socket.py")
+    spec = importlib.util.spec_from_file_location("client_socket", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def histogram(*values):
+    h = LatencyHistogram()
+    for ms in values:
+        h.record(ms)
+    return h
+
+
+def test_percentile_is_the_bucket_edge_capped_at_max():
+    h = histogram(*([0.3] * 90 + [7.0] * 9 + [12.0]))
+    assert h.percentile(50) == 0.5
+    assert h.percentile(90) == 0.5
+    assert h.percentile(99) == 10
+    assert h.percentile(100) == 12.0
+    assert histogram(0.3).percentile(50) == 0.3
+    assert histogram(BUCKET_EDGES_MS[-1] * 3).percentile(50) == BUCKET_EDGES_MS[-1] * 3
+    assert LatencyHistogram().percentile(99) == 0.0
+
+
+def test_merge_adds_counts_and_keeps_max():
+    merged = histogram(1.0, 3.0).merge(histogram(40.0))
+    assert merged.count() == 3
+    assert merged.total == 44.0
+    assert merged.max == 40.0
+    assert merged.percentile(100) == 40.0
+
+
+def test_generations_rotate(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(latency_trace.time, "monotonic", lambda: now[0])
+    stages = StageHistograms(stages=("queue",), window=10)
+    stages.record("queue", 1.0)
+    now[0] += 10
+    stages.record("queue", 2.0)  # Rotates: 1.0 is now in the previous generation
+    assert (stages.previous["queue"].count(), stages.current["queue"].count()) == (1, 1)
+    assert "queue" in stages.dump().splitlines()[1]
+    now[0] += 10
+    stages.record("queue", 3.0)  # Rotates again: 1.0 is gone
+    merged = stages.current["queue"].merge(stages.previous["queue"])
+    assert (merged.count(), merged.total) == (2, 5.0)
+
+
+def test_record_trace_splits_the_round_trip(client):
+    stages = StageHistograms()
+    timings = {"serialize": 0.1, "encrypt": 0.2, "round_trip": 30.0, "decrypt": 0.3}
+    response = {"profile": "Idle", "trace": {"id": 1, "recv": 100.0, "decide": 100.002, "send": 100.005}}
+    client.record_trace(stages, 99.0, 99.5, timings, response)
+    assert stages.current["queue"].total == pytest.approx(500.0)
+    assert stages.current["server decide"].total == pytest.approx(2.0)
+    assert stages.current["server reply"].total == pytest.approx(3.0)
+    assert stages.current["network"].total == pytest.approx(25.0)
+    assert stages.current["decrypt"].total == pytest.approx(0.3)
+
+
+def test_record_trace_without_a_reply(client):
+    stages = StageHistograms()
+    client.record_trace(stages, 99.0, 99.5, {"serialize": 0.1, "encrypt": 0.2}, None)
+    assert stages.current["encrypt"].count() == 1
+    assert stages.current["network"].count() == 0
+
+
+def test_local_decision_records_its_sample_time(client):
+    state = {"policy": DEFAULT_POLICY, "profile": "Idle", "local": False,
+             "cause": 0, "cause_at": None}
+    changes = asyncio.Queue(maxsize=1)
+    client.decide_locally(state, changes, 95.0, 90.0, 50.0, seq=7, sampled_at=1234.5)
+    assert changes.get_nowait() == state["profile"] != "Idle"
+    assert (state["cause"], state["cause_at"]) == (7, 1234.5)
@@ -0,0 +1,61 @@
+import io
+import json
+import os
+
+import pytest
+
+import nft_helper
+from nft_rulesets import compile_rulesets
+
+
+@pytest.fixture
+def stand_in(tmp_path, monkeypatch):
+    """A compiled ruleset dir and an nft that accepts everything."""
+    nft = tmp_path / "nft"
+    nft.write_text("#!/bin/sh\nexit 0\n")
+    nft.chmod(0o755)
+    ruleset_dir = str(tmp_path / "rules")
+    compile_rulesets(ruleset_dir)
+    monkeypatch.setattr(nft_helper, "LOG_FILE", str(tmp_path / "profiles.csv"))
+    return str(nft), ruleset_dir
+
+
+def run(monkeypatch, capsys, argv, commands):
+    monkeypatch.setattr("sys.stdin", io.StringIO(commands))
+    nft_helper.main(argv)
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_stand_in_nft_without_root(stand_in, monkeypatch, capsys):
+    nft, ruleset_dir = stand_in
+    monkeypatch.setattr(os, "geteuid", lambda: 1000)
+    results = run(monkeypatch, capsys, ["--dir", ruleset_dir, "--nft", nft],
+                  "apply idle\napply high\n")
+    assert [(r["ok"], r["mode"]) for r in results] == [(True, "full"), (True, "delta")]
+
+
+def test_tampered_ruleset_is_not_loaded(stand_in, monkeypatch, capsys):
+    nft, ruleset_dir = stand_in
+    monkeypatch.setattr(os, "geteuid", lambda: 1000)
+    with open(os.path.join(ruleset_dir, "idle.nft"), "a") as f:
+        f.write("flush ruleset\n")
+    [result] = run(monkeypatch, capsys, ["--dir", ruleset_dir, "--nft", nft], "apply idle\n")
+    assert result == {"ok": False, "profile": "idle", "apply_ms": 0.0, "error": "checksum mismatch"}
+
+
+@pytest.mark.parametrize("argv", [["--nft", "/tmp/nft"], ["--dir", "/tmp/rules"]])
+def test_caller_paths_are_refused_as_root(argv, monkeypatch):
+    monkeypatch.setattr(os, "geteuid", lambda: 0)
+    with pytest.raises(SystemExit) as exc:
+        nft_helper.main(argv)
+    assert exc.value.code == 2
+
+
+def test_writable_install_is_refused_as_root(stand_in, monkeypatch):
+    _, ruleset_dir = stand_in
+    os.chmod(ruleset_dir, 0o777)
+    monkeypatch.setattr(os, "geteuid", lambda: 0)
+    monkeypatch.setattr(nft_helper, "RULESET_DIR", ruleset_dir)
+    with pytest.raises(SystemExit, match="refusing to run as root"):
+        nft_helper.main([])
+    assert nft_helper.untrusted(ruleset_dir) is not None
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from proc_sampler import ProcessSampler, RunningStat
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="needs Linux /proc")
+
+
+def test_running_stat():
+    stat = RunningStat(alpha=0.5)
+    for value in (1.0, 3.0, 2.0):
+        stat.add(value)
+    assert stat.count == 3
+    assert stat.max == 3.0
+    assert stat.last == 2.0
+
+
+def test_process_matched_after_exec():
+    # Before exec the child is still "python"; it must not be ignored for good
+    child = subprocess.Popen([sys.executable, "-c",
+                              "import os, time; time.sleep(0.3); os.execvp('sleep', ['sleep', '5'])"])
+    try:
+        sampler = ProcessSampler(["sleep"], rescan_interval=0.05, fast_rescan_while=())
+        sampler.rescan()
+        assert str(child.pid) in sampler.ignored
+        deadline = time.monotonic() + 3
+        while str(child.pid) not in sampler.watched and time.monotonic() < deadline:
+            time.sleep(0.05)
+            sampler.sample()
+        assert str(child.pid) in sampler.watched
+        assert sampler.sample()[0][1] > 0  # RSS of the sleep
+        sampler.close()
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_fast_rescan_while_helper_runs():
+    helper = subprocess.Popen(["sleep", "5"])
+    late = None
+    try:
+        sampler = ProcessSampler(["cat"], rescan_interval=100, fast_rescan_while=["sleep"])
+        time.sleep(0.1)  # Let the helper finish its exec
+        sampler.sample(now=0.0)
+        assert str(helper.pid) in sampler.fast
+        late = subprocess.Popen(["cat"], stdin=subprocess.PIPE)
+        time.sleep(0.1)
+        sampler.sample(now=0.1)  # Long before the regular rescan is due
+        assert str(late.pid) in sampler.watched
+        sampler.close()
+    finally:
+        for process in (helper, late):
+            if process is not None:
+                process.kill()
+                process.wait()
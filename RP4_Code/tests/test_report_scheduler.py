@@ -0,0 +1,25 @@
+from decision_policy import DEFAULT_POLICY
+from report_scheduler import ReportScheduler, drift_trace, replay
+
+
+def test_prediction_reports_slow_threshold_crossings_at_once():
+    trace = drift_trace()
+    fixed, _, _ = replay(trace, DEFAULT_POLICY)
+    sent, stale, delays = replay(trace, DEFAULT_POLICY, ReportScheduler(), predict=True)
+    assert sent < fixed / 5
+    assert stale == 0 and max(delays) == 0
+
+    _, stale, delays = replay(trace, DEFAULT_POLICY, ReportScheduler(), predict=False)
+    assert stale > 0 and max(delays) > 0
+
+
+def test_volatile_sample_resets_the_interval():
+    scheduler = ReportScheduler(min_interval=10, max_interval=80)
+    assert scheduler.observe(0, (20.0, 40.0, 0.0)) == "first"
+    scheduler.reported(0, "Low Activity")
+    for now in range(10, 200, 10):
+        if scheduler.observe(now, (20.0, 40.0, 0.0)):
+            scheduler.reported(now, "Low Activity")
+    assert scheduler.interval == 80
+    assert scheduler.observe(200, (60.0, 40.0, 0.0)) == "volatile"
+    assert scheduler.interval == 10
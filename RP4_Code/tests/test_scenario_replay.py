@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from binary_log import BinaryLogWriter, export_csv
+from csv_logger import RotatingCsvWriter
+from resources_log import LOG_HEADER
+from scenario_replay import Scenario, load_timeline
+
+SAMPLES = [  # cpu %, ram %, rx Mbps, tx Mbps, one every 10 s
+    (10.0, 20.0, 1.0, 0.5),
+    (50.0, 30.0, 4.0, 2.0),
+    (90.0, 40.0, 0.0, 0.0),
+]
+
+
+def record_log(path):
+    start_ns = (int(time.time()) - 3600) * 10**9
+    with BinaryLogWriter(str(path), cores=2, network=True) as log:
+        for i, (cpu, ram, rx, tx) in enumerate(SAMPLES):
+            log.append(start_ns + i * 10 * 10**9, cpu, ram, [cpu, cpu], rx, tx)
+
+
+@pytest.mark.parametrize("millis", [False, True])
+def test_exported_binary_log_replays_its_traffic(tmp_path, millis):
+    record_log(tmp_path / "stats.rlog")
+    export_csv(str(tmp_path / "stats.rlog"), str(tmp_path / "stats.csv"), millis)
+
+    timeline = load_timeline(str(tmp_path / "stats.csv"))
+    assert [t for t, *_ in timeline] == pytest.approx([0.0, 10.0, 20.0])
+    assert [traffic for *_, traffic in timeline] == pytest.approx([1.5, 6.0, 0.0])
+
+    scenario = Scenario(timeline, compression=10, loop=False)
+    cpu, ram, traffic = scenario.window(3.0)
+    assert [value for _, value, _ in cpu] == pytest.approx([10.0, 50.0, 90.0])
+    assert [value for _, value, _ in traffic] == pytest.approx([1.5, 6.0, 0.0])
+    assert sum(duration for duration, _, _ in traffic) == pytest.approx(3.0)
+
+
+def test_plain_csv_log_replays_without_traffic(tmp_path):
+    path = str(tmp_path / "system_stats_log.csv")
+    start = time.time() - 3600
+    with RotatingCsvWriter(path, LOG_HEADER, rotate_daily=False) as log:
+        for i, (cpu, ram, _, _) in enumerate(SAMPLES):
+            tm = time.localtime(start + i * 10)
+            log.writerow([*log.stamp(tm), cpu, ram], tm)
+
+    timeline = load_timeline(path)
+    assert [cpu for _, cpu, _, _ in timeline] == [10.0, 50.0, 90.0]
+    assert all(traffic == 0.0 for *_, traffic in timeline)
+
+
+def test_clock_going_back_keeps_durations_positive(tmp_path, monkeypatch):
+    # Europe/Berlin falls back from 03:00 CEST to 02:00 CET on 2026-10-25
+    monkeypatch.setenv("TZ", "Europe/Berlin")
+    time.tzset()
+    try:
+        path = tmp_path / "system_stats_log.csv"
+        path.write_text(
+            "Date,Time,CPU (%),RAM (%)\r\n"
+            "2026-10-25,02:59:40,10.0,20.0\r\n"
+            "2026-10-25,02:59:50,20.0,20.0\r\n"
+            "2026-10-25,02:00:00,30.0,20.0\r\n"
+            "2026-10-25,02:00:10,40.0,20.0\r\n"
+        )
+        timeline = load_timeline(str(path))
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    assert min(b[0] - a[0] for a, b in zip(timeline, timeline[1:])) < 0
+
+    scenario = Scenario(timeline, loop=False)
+    assert [duration for duration, *_ in scenario.segments] == [10.0] * 4
+    cpu, _, _ = scenario.window(40.0)
+    assert [value for _, value, _ in cpu] == [10.0, 20.0, 30.0, 40.0]
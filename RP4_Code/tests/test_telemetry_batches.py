@@ -0,0 +1,58 @@
+import struct
+import zlib
+
+import pytest
+
+from telemetry_codec import (
+    BATCH_HEADER_FORMAT,
+    BATCH_VERSION,
+    SAMPLE_SIZE,
+    decode_batch,
+    encode_batch,
+    encode_sample,
+)
+
+
+def samples(count):
+    return b"".join(
+        encode_sample(1_700_000_000 + 10 * i, {"cpu": i % 100, "ram": 40.0, "traffic": 1.5,
+                                               "current_profile": "Idle"})
+        for i in range(count)
+    )
+
+
+def test_batch_round_trip():
+    decoded = decode_batch(encode_batch(samples(128)))
+    assert len(decoded) == 128
+    assert decoded[5] == (1_700_000_050.0, 5.0, 40.0, 1.5, "Idle")
+
+
+def test_partial_samples_are_rejected():
+    with pytest.raises(ValueError):
+        encode_batch(samples(2)[:-1])
+
+
+def test_decompression_is_bounded_by_the_declared_count():
+    # 16 MB of zeros compress to ~16 kB; a batch claiming 2 samples must not
+    # inflate it all
+    bomb = struct.pack(BATCH_HEADER_FORMAT, BATCH_VERSION, 2) + zlib.compress(bytes(16 << 20), 9)
+    with pytest.raises(ValueError, match="expected 2 samples"):
+        decode_batch(bomb)
+
+
+def test_count_larger_than_content_is_rejected():
+    data = encode_batch(samples(3))
+    forged = struct.pack(BATCH_HEADER_FORMAT, BATCH_VERSION, 4) + data[struct.calcsize(BATCH_HEADER_FORMAT):]
+    with pytest.raises(ValueError):
+        decode_batch(forged)
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"\x01",
+    struct.pack(BATCH_HEADER_FORMAT, BATCH_VERSION + 1, 1) + zlib.compress(bytes(SAMPLE_SIZE)),
+    struct.pack(BATCH_HEADER_FORMAT, BATCH_VERSION, 1) + b"not zlib",
+])
+def test_malformed_batches_are_value_errors(data):
+    with pytest.raises(ValueError):
+        decode_batch(data)
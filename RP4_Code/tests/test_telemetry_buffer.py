@@ -0,0 +1,73 @@
+import struct
+
+import pytest
+
+from telemetry_buffer import HEADER, TelemetryRing
+
+
+def record(i):
+    return struct.pack(">I", i)
+
+
+def records(data):
+    return [i for (i,) in struct.iter_unpack(">I", data)]
+
+
+@pytest.fixture
+def ring(tmp_path):
+    with TelemetryRing(str(tmp_path / "ring.bin"), capacity=4, record_size=4) as ring:
+        yield ring
+
+
+def test_peek_wraps_around_the_end(ring):
+    for i in range(3):
+        ring.append(record(i))
+    ring.drop(2)
+    for i in range(3, 6):
+        ring.append(record(i))  # 4 and 5 land at the start of the file
+    assert ring.head == 2 and len(ring) == 4
+    assert records(ring.peek(10)) == [2, 3, 4, 5]
+    assert records(ring.peek(3)) == [2, 3, 4]
+    assert len(ring) == 4  # peek does not remove
+
+
+def test_drop_across_the_wrap(ring):
+    for i in range(7):
+        ring.append(record(i))
+    ring.drop(3)
+    assert (ring.head, len(ring)) == (2, 1)
+    assert records(ring.peek(4)) == [6]
+    ring.drop(5)  # More than queued
+    assert len(ring) == 0 and ring.peek(4) == b""
+
+
+def test_full_ring_overwrites_the_oldest(ring):
+    for i in range(6):
+        ring.append(record(i))
+    assert ring.dropped == 2
+    assert records(ring.peek(4)) == [2, 3, 4, 5]
+    with pytest.raises(ValueError):
+        ring.append(b"\0" * 5)
+
+
+def test_state_survives_close_and_reopen(tmp_path):
+    path = str(tmp_path / "ring.bin")
+    with TelemetryRing(path, capacity=4, record_size=4) as ring:
+        for i in range(6):
+            ring.append(record(i))
+        ring.drop(1)
+        ring.flush()
+    with open(path, "rb") as f:
+        assert HEADER.unpack(f.read(HEADER.size))[4:] == (3, 3)
+    with TelemetryRing(path, capacity=4, record_size=4) as ring:
+        assert records(ring.peek(4)) == [3, 4, 5]
+        ring.append(record(6))
+        assert records(ring.peek(4)) == [3, 4, 5, 6]
+
+
+def test_other_layout_starts_empty(tmp_path):
+    path = str(tmp_path / "ring.bin")
+    with TelemetryRing(path, capacity=4, record_size=4) as ring:
+        ring.append(record(1))
+    with TelemetryRing(path, capacity=8, record_size=4) as ring:
+        assert len(ring) == 0
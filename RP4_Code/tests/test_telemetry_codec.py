@@ -0,0 +1,64 @@
+import pytest
+
+from telemetry_codec import (
+    REPORT_SIZE,
+    decode_report,
+    encode_report,
+    parse_traffic,
+)
+
+REPORT = {
+    "cpu": 63.4,
+    "ram": 41.25,
+    "traffic": 1.37,
+    "current_profile": "High Activity",
+    "source_ip": "192.168.30.109",
+    "source_port": 51544,
+}
+
+
+def test_binary_round_trip():
+    data = encode_report(REPORT)
+    assert len(data) == REPORT_SIZE
+    decoded = decode_report(data)
+    for key in ("current_profile", "source_ip", "source_port"):
+        assert decoded[key] == REPORT[key]
+    for key in ("cpu", "ram", "traffic"):
+        assert decoded[key] == pytest.approx(REPORT[key], abs=1e-4)
+    assert "applied_profile" not in decoded and "trace" not in decoded
+
+
+def test_json_fallback_round_trip():
+    legacy = dict(REPORT, traffic="1.37Mbps")
+    assert decode_report(encode_report(legacy, use_json=True)) == legacy
+    assert parse_traffic(legacy["traffic"]) == 1.37
+
+
+def test_acknowledgement_round_trip():
+    report = dict(REPORT, applied_profile="Idle", apply_ms=12.5, apply_failed=True)
+    decoded = decode_report(encode_report(report))
+    assert decoded["applied_profile"] == "Idle"
+    assert decoded["apply_ms"] == pytest.approx(12.5)
+    assert decoded["apply_failed"] is True
+
+
+def test_trace_round_trip():
+    trace = {"id": 2**64 - 1, "sampled_at": 1792422440.9126184}
+    decoded = decode_report(encode_report(dict(REPORT, trace=trace)))
+    assert decoded["trace"] == trace
+
+
+def test_unknown_profile_decodes_as_none():
+    decoded = decode_report(encode_report(dict(REPORT, current_profile="Bogus")))
+    assert decoded["current_profile"] is None
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    encode_report(REPORT)[:-1],
+    encode_report(REPORT) + b"\0",
+    b"\x09" + encode_report(REPORT)[1:],
+])
+def test_malformed_reports_are_value_errors(data):
+    with pytest.raises(ValueError):
+        decode_report(data)
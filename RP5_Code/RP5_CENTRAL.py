@@ -1,7 +1,33 @@
+import os
+import time
+import base64
 import socket
 import threading
 import logging
-from encryption_decryption import encrypt, decrypt
+from encryption_decryption import (
+    encrypt,
+    decrypt,
+    read_message,
+    message_info,
+    derive_session,
+    MSG_HELLO,
+    MSG_BATCH,
+    SESSION_NONCE_SIZE,
+)
+from admission_control import AdmissionController
+from replay_window import ReplayWindow
+from session_cache import SessionCache
+from telemetry_codec import decode_report, decode_batch, parse_traffic
+from decision_policy import DEFAULT_POLICY
+from event_journal import EventJournal, DECISION
+
+STATS_INTERVAL = 60  # Seconds between shed-load counter log lines
+RECV_TIMEOUT = 5  # Seconds a client may take to deliver one message
+CONNECTION_DEADLINE = 30  # Seconds one connection may stay open in total
+MAX_FRAMES = 32  # Messages served per connection (handshake + backlog batches)
+HELLO_MAX_AGE = 300  # Seconds of clock skew/delay tolerated in handshake counters
+MIN_REPORT_INTERVAL = 5  # Seconds; caps each node's adaptive report rate
+EVENT_JOURNAL = True  # Journal decisions (events.journal) for journal_latency.py
 
 
 class CentralServer:
@@ -9,9 +35,20 @@ class CentralServer:
         self.host = host
         self.port = port
         self.profiles = {}
+        self.enforced = {}  # What each node's firewall reports as applied
+        self.policy = DEFAULT_POLICY
+        self.policy_sent = {}  # node id -> (session epoch, policy version)
         self.active_threads = []
         self.running = False
         self.lock = threading.Lock()
+        self.admission = AdmissionController()
+        self.replay = ReplayWindow()
+        self.hello_replay = ReplayWindow()
+        # hello_replay starts empty, so handshakes from before this process
+        # started are refused by their (wall clock) counter instead
+        self.started_ns = time.time_ns()
+        self.sessions = SessionCache()
+        self.journal = EventJournal() if EVENT_JOURNAL else None
 
         # Configure logging
         logging.basicConfig(
@@ -31,15 +68,27 @@ class CentralServer:
 
             logging.info(f"Server started on {self.host}:{self.port}")
             print(f"[+] Server running on {self.host}:{self.port}\n")
+            next_stats = time.monotonic() + STATS_INTERVAL
 
             while self.running:
                 try:
+                    if time.monotonic() >= next_stats:
+                        self.log_admission_stats()
+                        next_stats = time.monotonic() + STATS_INTERVAL
+
                     conn, addr = sock.accept()
+                    # Shed load before spending a thread or any crypto work
+                    if not self.admission.try_admit(addr[0]):
+                        conn.close()
+                        continue
                     print(f"[+] Connection accepted from {addr}")
                     client_thread = threading.Thread(
                         target=self.handle_client, args=(conn, addr), daemon=True
                     )
                     with self.lock:
+                        self.active_threads = [
+                            t for t in self.active_threads if t.is_alive()
+                        ]
                         self.active_threads.append(client_thread)
                     client_thread.start()
 
@@ -57,36 +106,51 @@ class CentralServer:
         try:
 
             print(f"[+] Connection from {addr}")
-            encrypted_data = conn.recv(4096)
-            print(f"[+] Received {len(encrypted_data)} bytes")
-            if not encrypted_data:
-                logging.warning(f"[!] Empty data from {addr}")
+            conn.settimeout(RECV_TIMEOUT)
+            deadline = time.monotonic() + CONNECTION_DEADLINE
+            uploaded = False  # A backlog upload ends with the client closing
+            for _ in range(MAX_FRAMES):
+                try:
+                    result = read_message(conn, self.session_candidates, deadline)
+                    received = time.time()
+                except ValueError as e:
+                    # Junk header: drop it without touching the body or replying
+                    logging.warning(f"[!] {e} from {addr}")
+                    self.admission.penalize(addr[0])
+                    return
+                if not result:
+                    if not uploaded:
+                        logging.warning(f"[!] Empty data from {addr}")
+                    return
+                encrypted_data, session = result
+                print(f"[+] Received {len(encrypted_data)} bytes")
+                # The connection was admitted once; every frame still costs
+                if not self.admission.charge(addr[0]):
+                    logging.warning(f"[!] Frame rate exceeded by {addr}")
+                    return
+                msg_type, node_id, counter = message_info(encrypted_data)
+                if msg_type == MSG_HELLO:
+                    # A handshake is followed by a report on the same connection
+                    if not self.handle_hello(conn, addr, encrypted_data):
+                        return
+                    continue
+                if msg_type == MSG_BATCH:
+                    # Buffered samples arrive as several batches on one connection
+                    if not self.handle_batch(conn, addr, encrypted_data, session):
+                        return
+                    uploaded = True
+                    continue
+                self.handle_report(conn, addr, encrypted_data, session, received)
                 return
-
-            try:
-                data = decrypt(encrypted_data)
-                print(f"[+] Edge Node Decrypted Payload: {data}\n")
-                source_ip = data.get("source_ip")
-                if not source_ip:
-                    raise ValueError("[!] Missing source_ip in payload")
-
-                new_profile = self.decide_profile(data)
-                print(f"Profile Set to >>>>> {new_profile}\n")
-                with self.lock:
-                    self.profiles[source_ip] = new_profile
-                    logging.info(f"Updated {source_ip} to {new_profile}")
-
-                encrypted_res = encrypt({"profile": new_profile})
-                conn.sendall(encrypted_res)  # Ensure full transmission
-                print(f"{encrypted_res}")
-
-            except Exception as e:
-                logging.error(f"[!] Processing error from {addr}: {str(e)}")
-                conn.sendall(encrypt({"error": str(e)}))
+            logging.warning(f"[!] {addr} reached {MAX_FRAMES} messages on one connection")
 
         except ConnectionResetError:
             logging.warning(f"Connection reset by {addr}")
+        except socket.timeout:
+            logging.warning(f"Timed out waiting for {addr}")
+            self.admission.penalize(addr[0])
         finally:
+            self.admission.release()
             try:
                 conn.shutdown(socket.SHUT_RDWR)
             except OSError:
@@ -94,6 +158,186 @@ class CentralServer:
             conn.close()
             print(f"[+] Connection with {addr} closed\n")
 
+    def session_candidates(self, msg_type, node_id):
+        """Keys a message header may be tagged with (None = bootstrap keys)"""
+        if msg_type == MSG_HELLO:
+            return [None]
+        return self.sessions.candidates(node_id)
+
+    def handle_hello(self, conn, addr, encrypted_data):
+        """Derive and cache a new session for the node, reply with our nonce"""
+        _, node_id, counter = message_info(encrypted_data)
+        now = time.time_ns()
+        max_age = HELLO_MAX_AGE * 10**9
+        if not max(self.started_ns, now - max_age) <= counter <= now + max_age:
+            # Possibly a capture replayed after a restart; genuine nodes
+            # with a sane clock simply handshake again with a fresh counter
+            logging.warning(f"[!] Stale handshake from {addr}")
+            return False
+        if self.hello_replay.is_replay(node_id, counter):
+            logging.warning(f"[!] Replayed handshake from {addr}")
+            self.admission.penalize(addr[0])
+            return False
+        client_nonce = decrypt(encrypted_data, raw=True)
+        if client_nonce is None or len(client_nonce) != SESSION_NONCE_SIZE:
+            logging.warning(f"[!] Invalid handshake from {addr}")
+            self.admission.penalize(addr[0])
+            return False
+        if not self.hello_replay.accept(node_id, counter):
+            return False
+
+        server_nonce = os.urandom(SESSION_NONCE_SIZE)
+        self.sessions.install(node_id, derive_session(node_id, client_nonce, server_nonce))
+        logging.info(f"New session for node {node_id:08x} ({addr[0]})")
+        conn.sendall(encrypt(server_nonce, reply_to=(node_id, counter)))
+        return True
+
+    def handle_report(self, conn, addr, encrypted_data, session, received=None):
+        """Decrypt one telemetry report, decide and send back the profile.
+
+        A traced report gets its trace id echoed with our receive, decide
+        and send times (wall clock, `received` taken off the socket).
+        """
+        arrived = time.perf_counter()
+        _, node_id, counter = message_info(encrypted_data)
+        reply_to = (node_id, counter)
+        # Counters restart with every session, so windows are per session
+        window_key = (node_id << 32) | session.epoch
+        if self.replay.is_replay(window_key, counter):
+            logging.warning(f"[!] Replayed counter {counter} from {addr}")
+            self.admission.penalize(addr[0])
+            return
+
+        plaintext = decrypt(encrypted_data, raw=True, session=session)
+        if plaintext is None:
+            # Never answer unauthenticated input: a reply would use the
+            # (node, counter) nonce the genuine message still needs
+            logging.warning(f"[!] Decryption failed for report from {addr}")
+            self.admission.penalize(addr[0])
+            return
+        if not self.replay.accept(window_key, counter):
+            logging.warning(f"[!] Replayed counter {counter} from {addr}")
+            return
+
+        # The counter is now consumed, so replies below are safe to encrypt
+        try:
+            data = decode_report(plaintext)
+            print(f"[+] Edge Node Decrypted Payload: {data}\n")
+            source_ip = data.get("source_ip")
+            if not source_ip:
+                raise ValueError("[!] Missing source_ip in payload")
+
+            if "applied_profile" in data:
+                self.record_enforcement(source_ip, data)
+
+            new_profile = self.decide_profile(data)
+            decided = time.time()
+            if self.journal is not None:
+                self.journal.record(DECISION, node=source_ip, profile=new_profile,
+                                    value=(time.perf_counter() - arrived) * 1000)
+            print(f"Profile Set to >>>>> {new_profile}\n")
+            with self.lock:
+                self.profiles[source_ip] = new_profile
+                logging.info(f"Updated {source_ip} to {new_profile}")
+
+            response = {"profile": new_profile}
+            # Ship the decision policy and report rate cap once per session so
+            # the node can decide locally while we are unreachable
+            sent = (session.epoch, self.policy.version)
+            if self.policy_sent.get(node_id) != sent:
+                response["policy"] = base64.b64encode(self.policy.encode()).decode()
+                response["min_interval"] = MIN_REPORT_INTERVAL
+                self.policy_sent[node_id] = sent
+            if "trace" in data:
+                response["trace"] = {
+                    "id": data["trace"]["id"],
+                    "recv": received or decided,
+                    "decide": decided,
+                    "send": time.time(),
+                }
+            encrypted_res = encrypt(response, reply_to=reply_to, session=session)
+            conn.sendall(encrypted_res)  # Ensure full transmission
+            print(f"{encrypted_res}")
+
+        except Exception as e:
+            logging.error(f"[!] Processing error from {addr}: {str(e)}")
+            self.admission.penalize(addr[0])
+            conn.sendall(encrypt({"error": str(e)}, reply_to=reply_to, session=session))
+
+    def handle_batch(self, conn, addr, encrypted_data, session):
+        """Ingest one compressed batch of samples the node buffered offline"""
+        _, node_id, counter = message_info(encrypted_data)
+        window_key = (node_id << 32) | session.epoch
+        if self.replay.is_replay(window_key, counter):
+            logging.warning(f"[!] Replayed counter {counter} from {addr}")
+            self.admission.penalize(addr[0])
+            return False
+        plaintext = decrypt(encrypted_data, raw=True, session=session)
+        if plaintext is None or not self.replay.accept(window_key, counter):
+            logging.warning(f"[!] Invalid batch from {addr}")
+            self.admission.penalize(addr[0])
+            return False
+        try:
+            samples = decode_batch(plaintext)
+        except ValueError as e:
+            logging.error(f"[!] Bad batch from {addr}: {str(e)}")
+            self.admission.penalize(addr[0])
+            return False
+
+        self.ingest_samples(node_id, addr, samples)
+        conn.sendall(
+            encrypt(
+                {"ingested": len(samples)}, reply_to=(node_id, counter), session=session
+            )
+        )
+        return True
+
+    def ingest_samples(self, node_id, addr, samples):
+        """Summarize a batch in one pass and log it"""
+        if not samples:
+            return
+        cpu_total = ram_total = 0.0
+        cpu_max = ram_max = 0.0
+        for _, cpu, ram, _, _ in samples:
+            cpu_total += cpu
+            ram_total += ram
+            cpu_max = max(cpu_max, cpu)
+            ram_max = max(ram_max, ram)
+        first, last = samples[0][0], samples[-1][0]
+        logging.info(
+            f"Backlog from node {node_id:08x} ({addr[0]}): {len(samples)} samples "
+            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(first))} to "
+            f"{time.strftime('%H:%M:%S', time.localtime(last))}, "
+            f"CPU mean {cpu_total / len(samples):.1f}% max {cpu_max:.1f}%, "
+            f"RAM mean {ram_total / len(samples):.1f}% max {ram_max:.1f}%"
+        )
+        print(f"[+] Ingested {len(samples)} buffered samples from {addr[0]}")
+
+    def record_enforcement(self, source_ip, data):
+        """Track the firewall state a node acknowledged in its report"""
+        applied = data["applied_profile"]
+        with self.lock:
+            decided = self.profiles.get(source_ip)
+            previous = self.enforced.get(source_ip, {}).get("profile")
+            self.enforced[source_ip] = {
+                "profile": applied,
+                "apply_ms": data.get("apply_ms", 0.0),
+                "failed": data.get("apply_failed", False),
+                "pending": data.get("apply_pending", False),
+            }
+        if data.get("apply_failed"):
+            logging.warning(
+                f"[!] {source_ip} failed to apply {data.get('current_profile')}, "
+                f"still enforcing {applied}"
+            )
+        elif decided and applied != decided and not data.get("apply_pending"):
+            logging.warning(f"[!] {source_ip} enforces {applied}, decided {decided}")
+        elif applied != previous:
+            logging.info(
+                f"{source_ip} now enforces {applied} "
+                f"(applied in {data.get('apply_ms', 0.0):.1f} ms)"
+            )
+
     def decide_profile(self, data):
         """Enhanced decision logic with validation"""
         try:
@@ -101,28 +345,26 @@ class CentralServer:
             print(f"CPU: {cpu}\n")
             ram = float(data["ram"])
             print(f"RAM: {ram}\n")
-            traffic = float(data["traffic"].replace("Mbps", ""))
-
-            if cpu > 70 and ram > 50:
-                return "Critical Task"
-            elif cpu > 70 and ram < 50:
-                return "High Activity"
-            elif 30 < cpu <= 70 and ram > 50:
-                return "High Activity"
-            elif 30 < cpu <= 70 and ram <= 50:
-                return "Low Activity"
-            elif cpu < 20 and ram < 25:
-                return "Idle"
+            traffic = parse_traffic(data["traffic"])
 
-            return "Low Activity"
+            # Same table the nodes evaluate locally (see decision_policy.py)
+            return self.policy.decide(cpu, ram, traffic)
 
         except KeyError as e:
             logging.error(f"[!] Missing metric: {str(e)}")
             return "Low Activity"
 
+    def log_admission_stats(self):
+        """Log shed-load counters and expire old blocks"""
+        self.admission.purge_expired()
+        stats = self.admission.stats()
+        logging.info(f"Admission stats: {stats}")
+        print(f"[+] Admission stats: {stats}")
+
     def cleanup(self):
         """Graceful shutdown procedure"""
         logging.info("Initiating shutdown sequence")
+        self.log_admission_stats()
         with self.lock:
             logging.info(f"Active threads: {len(self.active_threads)}")
             for t in self.active_threads:
@@ -131,6 +373,8 @@ class CentralServer:
                         t.join(timeout=1)
                 except Exception as e:
                     logging.error(f"Thread join error: {str(e)}")
+        if self.journal is not None:
+            self.journal.close()
         logging.info("Server shutdown complete")
 
     def stop(self):
@@ -0,0 +1,166 @@
+import time
+import socket
+import threading
+from collections import OrderedDict
+
+# ======= Configuration =======
+RATE_PER_SEC = 1.0  # Sustained connections per second allowed for one source
+BURST = 5  # Bucket capacity (connections that may arrive back to back)
+MAX_CONCURRENT = 32  # Global budget of in-flight client handlers
+MAX_STRIKES = 10  # Violations before a source is blocked
+BLOCK_SECONDS = 60  # How long an offender stays blocked
+MAX_TRACKED_SOURCES = 4096  # Upper bound on per-source state kept in memory
+FRAME_COST = 0.1  # Tokens each message on an admitted connection costs
+# =============================
+
+
+def _ip_key(ip):
+    """Pack an IPv4 address into an int so table keys stay small."""
+    try:
+        return int.from_bytes(socket.inet_aton(ip), "big")
+    except OSError:
+        return ip
+
+
+class AdmissionController:
+    """Per-source token buckets, temporary blocks and a global concurrency budget.
+
+    All checks run on the accept path, before a thread is started or any
+    Ascon work is done, so a flooding node only costs a dict lookup.
+    """
+
+    def __init__(
+        self,
+        rate=RATE_PER_SEC,
+        burst=BURST,
+        max_concurrent=MAX_CONCURRENT,
+        max_strikes=MAX_STRIKES,
+        block_seconds=BLOCK_SECONDS,
+        max_sources=MAX_TRACKED_SOURCES,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_strikes = max_strikes
+        self.block_seconds = block_seconds
+        self.max_sources = max_sources
+        # key -> [tokens, last_refill, strikes]
+        self.buckets = OrderedDict()
+        # key -> monotonic expiry time
+        self.blocked = {}
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.lock = threading.Lock()
+        self.counters = {
+            "admitted": 0,
+            "shed_blocked": 0,
+            "shed_rate": 0,
+            "shed_busy": 0,
+            "shed_frames": 0,
+            "blocks": 0,
+        }
+
+    def try_admit(self, ip):
+        """Return True and take a concurrency slot if `ip` may be served now."""
+        key = _ip_key(ip)
+        now = time.monotonic()
+        with self.lock:
+            expiry = self.blocked.get(key)
+            if expiry is not None:
+                if now < expiry:
+                    self.counters["shed_blocked"] += 1
+                    return False
+                del self.blocked[key]
+
+            bucket = self._refill(key, now)
+            if bucket[0] < 1.0:
+                self.counters["shed_rate"] += 1
+                self._strike(key, bucket, now)
+                return False
+            bucket[0] -= 1.0
+
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.counters["shed_busy"] += 1
+            return False
+
+        with self.lock:
+            self.counters["admitted"] += 1
+        return True
+
+    def charge(self, ip, cost=FRAME_COST):
+        """Take `cost` tokens for one message on an admitted connection.
+
+        False means the source's bucket is empty and the connection should
+        be closed.  Not a strike: a long backlog upload may run dry.
+        """
+        key = _ip_key(ip)
+        now = time.monotonic()
+        with self.lock:
+            bucket = self._refill(key, now)
+            if bucket[0] < cost:
+                self.counters["shed_frames"] += 1
+                return False
+            bucket[0] -= cost
+        return True
+
+    def _refill(self, key, now):
+        """Bucket of `key` topped up to `now` (created full); holds the lock."""
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = [float(self.burst), now, 0]
+            self.buckets[key] = bucket
+            if len(self.buckets) > self.max_sources:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        return bucket
+
+    def release(self):
+        """Give back the concurrency slot taken by a successful try_admit."""
+        self.slots.release()
+
+    def penalize(self, ip):
+        """Record a protocol violation (bad tag, malformed payload) for `ip`."""
+        key = _ip_key(ip)
+        now = time.monotonic()
+        with self.lock:
+            self._strike(key, self._refill(key, now), now)
+
+    def _strike(self, key, bucket, now):
+        bucket[2] += 1
+        if bucket[2] >= self.max_strikes:
+            self.blocked[key] = now + self.block_seconds
+            self.counters["blocks"] += 1
+            bucket[2] = 0
+            bucket[0] = 0.0
+
+    def purge_expired(self):
+        """Drop block entries whose expiry has passed."""
+        now = time.monotonic()
+        with self.lock:
+            expired = [k for k, exp in self.blocked.items() if exp <= now]
+            for k in expired:
+                del self.blocked[k]
+        return len(expired)
+
+    def stats(self):
+        """Snapshot of the shed-load counters plus current table sizes."""
+        with self.lock:
+            snapshot = dict(self.counters)
+            snapshot["tracked_sources"] = len(self.buckets)
+            snapshot["blocked_sources"] = len(self.blocked)
+        return snapshot
+
+
+if __name__ == "__main__":
+    # Quick test: one flooding source next to a well-behaved one
+    ac = AdmissionController(rate=2, burst=3, max_strikes=5, block_seconds=2)
+    for _ in range(50):
+        if ac.try_admit("10.0.0.66"):
+            ac.release()
+    good = ac.try_admit("10.0.0.7")
+    if good:
+        ac.release()
+    print(f"Legit node admitted: {good}")
+    print(f"Stats: {ac.stats()}")
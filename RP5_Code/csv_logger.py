@@ -0,0 +1,149 @@
+import io
+import os
+import csv
+import time
+import signal
+
+# ======= Configuration =======
+FLUSH_INTERVAL = 30  # Seconds between flushes of buffered rows to the OS
+MAX_BYTES = 16 * 1024 * 1024  # Rotate when the active file grows past this
+BUFFER_BYTES = 64 * 1024  # Userspace write buffer
+# =============================
+
+
+class RotatingCsvWriter:
+    """Long-lived, buffered CSV appender with size and day rotation.
+
+    Rows go through one open file and csv.writer (CRLF rows, as before)
+    and reach the OS every `flush_interval` seconds, so a sample costs a
+    buffered write instead of an open/close.  Each row is formatted and
+    encoded before the write, so the size used for rotation is in bytes.  When the day changes or the
+    file exceeds `max_bytes`, it is renamed to <name>-YYYYMMDD[.N].csv and
+    a new file with the header is started under the original name.
+    """
+
+    def __init__(self, path, header, flush_interval=FLUSH_INTERVAL,
+                 max_bytes=MAX_BYTES, rotate_daily=True):
+        self.path = path
+        self.header = header
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.file = None
+        self._date_key = None  # (year, yday) of the cached date string
+        self._date = None
+        self._open()
+
+    def _open(self):
+        exists = os.path.isfile(self.path) and os.path.getsize(self.path) > 0
+        self.file = open(self.path, mode="ab", buffering=BUFFER_BYTES)
+        self.line = io.StringIO(newline="")  # One formatted row at a time
+        self.writer = csv.writer(self.line)
+        if exists:
+            self.size = os.path.getsize(self.path)
+            self.day = time.localtime(os.path.getmtime(self.path))[:3]
+        else:
+            self.size = 0
+            self._write(self.header)
+            self.day = time.localtime()[:3]
+        self.last_flush = time.monotonic()
+
+    def _rotated_name(self):
+        stem, ext = os.path.splitext(self.path)
+        base = f"{stem}-{self.day[0]:04d}{self.day[1]:02d}{self.day[2]:02d}"
+        name, n = base + ext, 0
+        while os.path.exists(name):
+            n += 1
+            name = f"{base}.{n}{ext}"
+        return name
+
+    def rotate(self):
+        """Close the active file, move it aside and start a new one."""
+        self.close()
+        os.replace(self.path, self._rotated_name())
+        self._open()
+
+    def stamp(self, tm=None):
+        """("YYYY-MM-DD", "HH:MM:SS") of a struct_time; the date string is
+        only formatted once a day."""
+        tm = tm or time.localtime()
+        if self._date_key != (tm.tm_year, tm.tm_yday):
+            self._date_key = (tm.tm_year, tm.tm_yday)
+            self._date = f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}"
+        return self._date, f"{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}"
+
+    def writerow(self, row, tm=None):
+        """Append one row; `tm` (struct_time) decides the day for rotation."""
+        if self.rotate_daily and (tm or time.localtime())[:3] != self.day:
+            self.rotate()
+        elif self.size >= self.max_bytes:
+            self.rotate()
+        self._write(row)
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def _write(self, row):
+        self.writer.writerow(row)
+        data = self.line.getvalue().encode()
+        self.line.seek(0)
+        self.line.truncate()
+        self.file.write(data)
+        self.size += len(data)
+
+    def flush(self, sync=False):
+        self.file.flush()
+        if sync:
+            os.fsync(self.file.fileno())
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if self.file is not None and not self.file.closed:
+            self.flush(sync=True)
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, etype, value, traceback):
+        self.close()
+
+
+def exit_on_sigterm():
+    """Turn SIGTERM (systemd stop, kill) into SystemExit so `finally` and
+    `with` blocks run and buffered rows are flushed before exiting."""
+
+    def handler(signum, frame):
+        raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, handler)
+
+
+def benchmark(rows=20000):
+    """Per-row cost of open/append/close per sample vs the buffered writer."""
+    import tempfile
+
+    header = ["Date", "Time", "CPU (%)", "RAM (%)"]
+    row = ["2026-10-19", "12:00:00", 42.5, 37.1]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log.csv")
+        start = time.perf_counter()
+        for _ in range(rows):
+            stamp = [time.strftime("%Y-%m-%d"), time.strftime("%H:%M:%S")]
+            with open(path, mode="a", newline="") as file:
+                csv.writer(file).writerow(stamp + row[2:])
+        per_open = (time.perf_counter() - start) / rows
+
+        path = os.path.join(tmp, "buffered.csv")
+        start = time.perf_counter()
+        with RotatingCsvWriter(path, header) as writer:
+            for _ in range(rows):
+                tm = time.localtime()
+                writer.writerow(list(writer.stamp(tm)) + row[2:], tm)
+        buffered = (time.perf_counter() - start) / rows
+
+    print(f"open per row:    {per_open * 1e6:7.1f} us/row")
+    print(f"buffered writer: {buffered * 1e6:7.1f} us/row (incl. timestamp)")
+
+
+if __name__ == "__main__":
+    benchmark()
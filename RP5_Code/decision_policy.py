@@ -0,0 +1,153 @@
+import math
+import time
+import struct
+from telemetry_codec import PROFILE_IDS, PROFILE_NAMES
+
+# ======= Policy wire format (format version 1) =======
+# header: format version | policy version | default profile id | rule count
+# rule:   profile id | bound flags | cpu lo, hi | ram lo, hi | traffic lo, hi
+# Unbounded limits are sent as +/-inf; a set flag bit makes that bound
+# inclusive (<=, >=), a clear bit makes it strict (<, >).
+POLICY_FORMAT = 1
+HEADER_FORMAT = ">BHBB"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RULE_FORMAT = ">BBffffff"
+RULE_SIZE = struct.calcsize(RULE_FORMAT)
+METRICS = ("cpu", "ram", "traffic")
+# =====================================================
+
+# Bounds as (lo, lo_inclusive, hi, hi_inclusive)
+ANY = (-math.inf, True, math.inf, True)
+
+
+def above(x):
+    return (x, False, math.inf, True)
+
+
+def below(x):
+    return (-math.inf, True, x, False)
+
+
+def at_most(x):
+    return (-math.inf, True, x, True)
+
+
+def above_up_to(lo, hi):
+    return (lo, False, hi, True)
+
+
+class Rule:
+    """One row of the decision table: every bound must hold for it to match."""
+
+    __slots__ = ("profile", "bounds")
+
+    def __init__(self, profile, **bounds):
+        # bounds: metric=(lo, lo_inclusive, hi, hi_inclusive); missing = any value
+        self.profile = profile
+        self.bounds = [bounds.get(m, ANY) for m in METRICS]
+
+    def matches(self, values):
+        # Written as positive tests so NaN never matches, as in the if/elif chain
+        for value, (lo, lo_inc, hi, hi_inc) in zip(values, self.bounds):
+            if not (value > lo or (lo_inc and value == lo)):
+                return False
+            if not (value < hi or (hi_inc and value == hi)):
+                return False
+        return True
+
+
+class DecisionPolicy:
+    """Versioned, first-match decision table shared by the controller and nodes."""
+
+    def __init__(self, version, rules, default="Low Activity"):
+        self.version = version
+        self.rules = rules
+        self.default = default
+
+    def decide(self, cpu, ram, traffic=0.0):
+        values = (cpu, ram, traffic)
+        for rule in self.rules:
+            if rule.matches(values):
+                return rule.profile
+        return self.default
+
+    def encode(self):
+        data = struct.pack(
+            HEADER_FORMAT, POLICY_FORMAT, self.version, PROFILE_IDS[self.default], len(self.rules)
+        )
+        for rule in self.rules:
+            flags = 0
+            limits = []
+            for i, (lo, lo_inc, hi, hi_inc) in enumerate(rule.bounds):
+                flags |= (lo_inc << (2 * i)) | (hi_inc << (2 * i + 1))
+                limits += [lo, hi]
+            data += struct.pack(RULE_FORMAT, PROFILE_IDS[rule.profile], flags, *limits)
+        return data
+
+    @classmethod
+    def decode(cls, data):
+        """Parse an encoded policy; ValueError if it is truncated or unknown."""
+        if len(data) < HEADER_SIZE:
+            raise ValueError(f"Truncated policy ({len(data)} bytes)")
+        fmt, version, default_id, count = struct.unpack_from(HEADER_FORMAT, data)
+        if fmt != POLICY_FORMAT or len(data) != HEADER_SIZE + count * RULE_SIZE:
+            raise ValueError(f"Unsupported policy ({len(data)} bytes, format {fmt})")
+        if default_id not in PROFILE_NAMES:
+            raise ValueError(f"Unknown default profile id {default_id}")
+        rules = []
+        for offset in range(HEADER_SIZE, len(data), RULE_SIZE):
+            profile_id, flags, *limits = struct.unpack_from(RULE_FORMAT, data, offset)
+            if profile_id not in PROFILE_NAMES:
+                raise ValueError(f"Unknown profile id {profile_id} in rule {len(rules)}")
+            rule = Rule(PROFILE_NAMES[profile_id])
+            rule.bounds = []
+            for i in range(len(METRICS)):
+                lo_inc = bool(flags >> (2 * i) & 1)
+                hi_inc = bool(flags >> (2 * i + 1) & 1)
+                rule.bounds.append((limits[2 * i], lo_inc, limits[2 * i + 1], hi_inc))
+            rules.append(rule)
+        return cls(version, rules, PROFILE_NAMES[default_id])
+
+
+# The controller's decision logic as a table (same order, same strict and
+# inclusive bounds, same "Low Activity" fallback).  Bump the version on change.
+DEFAULT_POLICY = DecisionPolicy(
+    version=1,
+    rules=[
+        Rule("Critical Task", cpu=above(70), ram=above(50)),
+        Rule("High Activity", cpu=above(70), ram=below(50)),
+        Rule("High Activity", cpu=above_up_to(30, 70), ram=above(50)),
+        Rule("Low Activity", cpu=above_up_to(30, 70), ram=at_most(50)),
+        Rule("Idle", cpu=below(20), ram=below(25)),
+    ],
+)
+
+
+if __name__ == "__main__":
+    # Check the table against the original if/elif chain, boundaries included
+    def legacy(cpu, ram):
+        if cpu > 70 and ram > 50:
+            return "Critical Task"
+        elif cpu > 70 and ram < 50:
+            return "High Activity"
+        elif 30 < cpu <= 70 and ram > 50:
+            return "High Activity"
+        elif 30 < cpu <= 70 and ram <= 50:
+            return "Low Activity"
+        elif cpu < 20 and ram < 25:
+            return "Idle"
+        return "Low Activity"
+
+    policy = DecisionPolicy.decode(DEFAULT_POLICY.encode())
+    grid = [x / 4 for x in range(-4, 404)] + [math.nan, math.inf]
+    mismatches = sum(
+        policy.decide(cpu, ram) != legacy(cpu, ram) for cpu in grid for ram in grid
+    )
+    print(f"Policy v{policy.version}: {len(DEFAULT_POLICY.encode())} bytes, "
+          f"{len(grid) ** 2} points checked, {mismatches} mismatches")
+
+    rounds = 100_000
+    start = time.perf_counter()
+    for i in range(rounds):
+        policy.decide(i % 100, (i * 7) % 100)
+    print(f"Local decision: {(time.perf_counter() - start) / rounds * 1e6:.2f} us")
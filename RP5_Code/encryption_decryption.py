@@ -1,16 +1,73 @@
 import os
+import hmac
 import json
+import time
+import socket
+import struct
+import threading
 import ascon
 from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives import hashes
 
-# Global encryption key
-_encryption_key = None
+# Master key from key.conf; every other key is derived from it
+_master_key = None
+# Keys derived directly from the master key, only used for handshakes
+_bootstrap = None
+
+# ======= Wire format =======
+# header = magic | version | msg type | body length | sender id | counter,
+# followed by header tag (8) | ciphertext + AEAD tag (body length).
+# The nonce is rebuilt from (sender id, msg type, counter) and never sent.
+MAGIC = b"AF"
+PROTOCOL_VERSION = 3
+MSG_DATA = 1
+MSG_RESPONSE = 2
+MSG_HELLO = 3
+MSG_BATCH = 4  # Compressed batch of buffered samples (telemetry_codec)
+HEADER_FORMAT = ">2sBBHIQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+NONCE_FORMAT = ">IB3xQ"
+HEADER_TAG_SIZE = 8
+PREAMBLE_SIZE = HEADER_SIZE + HEADER_TAG_SIZE
+AEAD_TAG_SIZE = 16
+SESSION_NONCE_SIZE = 16
+MAX_MESSAGE_SIZE = 4096  # Hard upper bound on a whole message on the wire
+# ===========================
+
+
+class SessionKeys:
+    """AEAD key, header key and nonce counter for one sender session"""
+
+    def __init__(self, sender_id, aead_key, header_key, counter=0, epoch=0, wall_clock=False):
+        self.sender_id = sender_id
+        self.aead_key = aead_key
+        self.header_key = header_key
+        self.counter = counter
+        self.epoch = epoch
+        self.wall_clock = wall_clock  # Counters never fall behind time.time_ns()
+        self.created = time.monotonic()
+        self.lock = threading.Lock()
+
+    def next_counter(self):
+        with self.lock:
+            self.counter += 1
+            if self.wall_clock:
+                self.counter = max(self.counter, time.time_ns())
+            return self.counter
+
+
+def _hkdf(length, info, salt=None):
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=length,
+        salt=salt,
+        info=info,
+    ).derive(_master_key)
 
 
 def _initialize_key():
-    global _encryption_key
-    if _encryption_key is not None:
+    global _master_key, _bootstrap
+    if _master_key is not None:
         return
 
     try:
@@ -22,15 +79,17 @@ def _initialize_key():
             if len(hex_key) != 64:
                 raise ValueError("Key must be 64 hex chars (32 bytes)")
 
-            master_key = bytes.fromhex(hex_key)
+            _master_key = bytes.fromhex(hex_key)
 
-            # Derive 16-byte key using HKDF
-            _encryption_key = HKDF(
-                algorithm=hashes.SHA256(),
-                length=16,
-                salt=None,
-                info=b"ascon-encryption",
-            ).derive(master_key)
+            # Derive 16-byte keys using HKDF
+            _bootstrap = SessionKeys(
+                sender_id=struct.unpack(">I", os.urandom(4))[0],
+                aead_key=_hkdf(16, b"ascon-encryption"),
+                header_key=_hkdf(16, b"ascon-header"),
+                # Wall-clock counters let the server reject stale handshakes
+                counter=time.time_ns(),
+                wall_clock=True,
+            )
 
     except FileNotFoundError:
         raise RuntimeError("Missing key.conf file")
@@ -38,46 +97,86 @@ def _initialize_key():
         raise RuntimeError(f"Key error: {str(e)}")
 
 
-def encrypt(data):
-    """Encrypt data (dict/str) with ASCON AEAD"""
+def derive_session(node_id, client_nonce, server_nonce):
+    """Derive per-node, per-session keys with HKDF from the master key"""
+    _initialize_key()
+    okm = _hkdf(
+        32,
+        b"ascon-session" + struct.pack(">I", node_id),
+        salt=client_nonce + server_nonce,
+    )
+    return SessionKeys(node_id, okm[:16], okm[16:])
+
+
+def encrypt(data, msg_type=MSG_DATA, reply_to=None, session=None):
+    """Encrypt data (dict/str/bytes) with ASCON AEAD
+
+    reply_to=(sender id, counter) of a received message makes this a
+    MSG_RESPONSE carrying the same counter, so replies need no own state.
+    Without a session the bootstrap keys are used.
+    """
     _initialize_key()
+    session = session or _bootstrap
     print("#########################################################\n")
     print("[+]_initialize_key() is ready\n")
 
     if isinstance(data, dict):
         data = json.dumps(data, sort_keys=True, separators=(",", ":"))
     print(f"[+] data =={data} --> ciphertext\n")
-    nonce = os.urandom(16)
+    plaintext = data if isinstance(data, bytes) else data.encode()
+    body_len = len(plaintext) + AEAD_TAG_SIZE
+    if PREAMBLE_SIZE + body_len > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message too large ({PREAMBLE_SIZE + body_len} bytes)")
+    if reply_to is not None:
+        msg_type = MSG_RESPONSE
+        sender_id, counter = reply_to
+    else:
+        sender_id, counter = session.sender_id, session.next_counter()
+    header = struct.pack(
+        HEADER_FORMAT, MAGIC, PROTOCOL_VERSION, msg_type, body_len, sender_id, counter
+    )
+    nonce = struct.pack(NONCE_FORMAT, sender_id, msg_type, counter)
     ciphertext = ascon.ascon_encrypt(
-        key=_encryption_key,
+        key=session.aead_key,
         nonce=nonce,
-        associateddata=b"",
-        plaintext=data.encode(),
+        associateddata=header,
+        plaintext=plaintext,
         variant="Ascon-AEAD128",
     )
-    print(f"[+]--> nonce + ciphertext == {(nonce + ciphertext).hex()}\n")
-    return nonce + ciphertext
+    message = header + _header_tag(session, header) + ciphertext
+    print(f"[+]--> header + tag + ciphertext == {message.hex()}\n")
+    return message
 
 
-def decrypt(encrypted_data):
-    """Decrypt and verify ASCON AEAD data"""
+def decrypt(encrypted_data, raw=False, session=None):
+    """Decrypt and verify ASCON AEAD data (raw=True returns plaintext bytes)"""
     _initialize_key()
+    session = session or _bootstrap
     print("[+]_initialize_key() is ready\n")
     try:
-        nonce = encrypted_data[:16]
-        ciphertext_with_tag = encrypted_data[16:]
+        body_len = check_preamble(encrypted_data[:PREAMBLE_SIZE], session)
+        if body_len is None or len(encrypted_data) != PREAMBLE_SIZE + body_len:
+            raise ValueError("Rejected message header")
+        header = encrypted_data[:HEADER_SIZE]
+        msg_type, sender_id, counter = message_info(encrypted_data)
+        nonce = struct.pack(NONCE_FORMAT, sender_id, msg_type, counter)
+        ciphertext_with_tag = encrypted_data[PREAMBLE_SIZE:]
         print(
             f"[+]--> nonce + ciphertext_with_tag == {(nonce + ciphertext_with_tag).hex()}\n"
         )
         plaintext = ascon.ascon_decrypt(
-            key=_encryption_key,
+            key=session.aead_key,
             nonce=nonce,
-            associateddata=b"",
+            associateddata=header,
             ciphertext=ciphertext_with_tag,
             variant="Ascon-AEAD128",
         )
+        if plaintext is None:
+            raise ValueError("Authentication tag mismatch")
         print(f"[+]--> plaintext == {plaintext.hex()}\n")
 
+        if raw:
+            return plaintext
         try:
             return json.loads(plaintext.decode())
         except json.JSONDecodeError:
@@ -88,6 +187,95 @@ def decrypt(encrypted_data):
         return None
 
 
+def _header_tag(session, header):
+    """Truncated Ascon-PrfShort tag over the fixed header fields"""
+    # PrfShort takes at most 16 bytes: version | type | length | sender | counter
+    return ascon.ascon_mac(
+        session.header_key, header[2:], "Ascon-PrfShort", HEADER_TAG_SIZE
+    )
+
+
+def message_info(message):
+    """Return (msg type, sender id, counter) from a message header"""
+    _, _, msg_type, _, sender_id, counter = struct.unpack_from(HEADER_FORMAT, message)
+    return msg_type, sender_id, counter
+
+
+def check_preamble(preamble, session=None):
+    """Pre-authenticate a message preamble, return its body length or None.
+
+    Costs a single Ascon permutation whatever body size is claimed, so junk
+    is rejected before the body is read or decrypted.
+    """
+    _initialize_key()
+    if len(preamble) != PREAMBLE_SIZE:
+        return None
+    magic, version, _, body_len, _, _ = struct.unpack_from(HEADER_FORMAT, preamble)
+    if magic != MAGIC or version != PROTOCOL_VERSION:
+        return None
+    if body_len < AEAD_TAG_SIZE or PREAMBLE_SIZE + body_len > MAX_MESSAGE_SIZE:
+        return None
+    tag = preamble[HEADER_SIZE:]
+    expected = _header_tag(session or _bootstrap, preamble[:HEADER_SIZE])
+    if not hmac.compare_digest(tag, expected):
+        return None
+    return body_len
+
+
+def _recv_exact(sock, size, deadline=None, timeout=None):
+    chunks = []
+    while size > 0:
+        if deadline is not None:
+            # Each recv may wait `timeout`, but never past the deadline
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("Connection deadline passed")
+            sock.settimeout(remaining if timeout is None else min(timeout, remaining))
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_message(sock, lookup=None, deadline=None):
+    """Read one framed message, return (message, session) or None on EOF.
+
+    `lookup(msg_type, sender_id)` returns the candidate sessions for the
+    sender (None means the bootstrap keys); the first whose header tag
+    verifies is returned. Raises ValueError for junk headers, and
+    socket.timeout once the monotonic `deadline` passes, however slowly
+    the bytes trickle in.
+    """
+    if deadline is None:
+        return _read_message(sock, lookup)
+    timeout = sock.gettimeout()
+    try:
+        return _read_message(sock, lookup, deadline, timeout)
+    finally:
+        sock.settimeout(timeout)
+
+
+def _read_message(sock, lookup, deadline=None, timeout=None):
+    preamble = _recv_exact(sock, PREAMBLE_SIZE, deadline, timeout)
+    if preamble is None:
+        return None
+    candidates = [None]
+    if lookup is not None:
+        candidates = lookup(*message_info(preamble)[:2])
+    for session in candidates:
+        body_len = check_preamble(preamble, session)
+        if body_len is not None:
+            break
+    else:
+        raise ValueError("Rejected message header")
+    body = _recv_exact(sock, body_len, deadline, timeout)
+    if body is None:
+        return None
+    return preamble + body, session or _bootstrap
+
+
 if __name__ == "__main__":
     # Quick test
     test_data = {"status": "secure", "value": 42}
@@ -2,10 +2,19 @@
 
 """
 KAT implementation for NIST (based on TestVectorGen.zip)
+
+Test cases are independent, so they are computed on a process pool (by
+case index) and written in Count order; the output files are identical
+to a serial run (--jobs 1).
 """
 
-import ascon
+import os
 import sys
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import ascon
 from writer import MultipleWriter
 
 
@@ -13,91 +22,116 @@ def kat_bytes(length):
     return bytes(bytearray([i % 256 for i in range(length)]))
 
 
-def kat_aead(variant):
+def write_kat(filename, case, params, jobs=1):
+    """Compute case(*p) for every p in params and write the returned
+    (label, value, length) fields as records numbered in order."""
+    start = time.perf_counter()
+    with MultipleWriter(filename) as w:
+        if jobs > 1:
+            pool = ProcessPoolExecutor(jobs)
+            # Later cases are longer; small chunks keep the workers balanced
+            chunksize = max(1, len(params) // (jobs * 16))
+            results = pool.map(case, *zip(*params), chunksize=chunksize)
+        else:
+            pool = None
+            results = itertools.starmap(case, params)
+        try:
+            for count, fields in enumerate(results, 1):
+                w.open()
+                w.append("Count", count)
+                for field in fields:
+                    w.append(*field)
+                w.close()
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    print(f"{filename}: {len(params)} cases in {time.perf_counter() - start:.2f} s "
+          f"({jobs} job{'s' if jobs > 1 else ''})")
+
+
+def aead_case(variant, mlen, adlen):
+    klen = 16  # =CRYPTO_KEYBYTES
+    nlen = 16  # =CRYPTO_NPUBBYTES
+    tlen = 16  # <=CRYPTO_ABYTES
+    key   = kat_bytes(klen)
+    nonce = kat_bytes(nlen)
+    msg   = kat_bytes(mlen)
+    ad    = kat_bytes(adlen)
+    ct = ascon.ascon_encrypt(key, nonce, ad, msg, variant)
+    assert len(ct) == mlen + tlen
+    msg2 = ascon.ascon_decrypt(key, nonce, ad, ct, variant)
+    assert len(msg2) == mlen
+    assert msg2 == msg
+    return [("Key", key, klen), ("Nonce", nonce, nlen), ("PT", msg, mlen),
+            ("AD", ad, adlen), ("CT", ct, len(ct))]
+
+
+def kat_aead(variant, jobs=1):
     MAX_MESSAGE_LENGTH = 32
     MAX_ASSOCIATED_DATA_LENGTH = 32
 
     klen = 16  # =CRYPTO_KEYBYTES
     nlen = 16  # =CRYPTO_NPUBBYTES
-    tlen = 16  # <=CRYPTO_ABYTES
     filename = "LWC_AEAD_KAT_{klenbits}_{nlenbits}".format(klenbits=klen*8, nlenbits=nlen*8)
     assert variant in ["Ascon-AEAD128"]
 
-    key   = kat_bytes(klen)
-    nonce = kat_bytes(nlen)
-    msg   = kat_bytes(MAX_MESSAGE_LENGTH)
-    ad    = kat_bytes(MAX_ASSOCIATED_DATA_LENGTH)
+    params = [(variant, mlen, adlen)
+              for mlen in range(MAX_MESSAGE_LENGTH+1)
+              for adlen in range(MAX_ASSOCIATED_DATA_LENGTH+1)]
+    write_kat(filename, aead_case, params, jobs)
 
-    with MultipleWriter(filename) as w:
-        count = 1
-        for mlen in range(MAX_MESSAGE_LENGTH+1):
-            for adlen in range(MAX_ASSOCIATED_DATA_LENGTH+1):
-                w.open()
-                w.append("Count", count)
-                count += 1
-                w.append("Key", key, klen)
-                w.append("Nonce", nonce, nlen)
-                w.append("PT", msg, mlen)
-                w.append("AD", ad, adlen)
-                ct = ascon.ascon_encrypt(key, nonce, ad[:adlen], msg[:mlen], variant)
-                assert len(ct) == mlen + tlen
-                w.append("CT", ct, len(ct))
-                msg2 = ascon.ascon_decrypt(key, nonce, ad[:adlen], ct, variant)
-                assert len(msg2) == mlen
-                assert msg2 == msg[:mlen]
-                w.close()
+
+def hash_case(variant, hlen, mlen):
+    msg = kat_bytes(mlen)
+    tag = ascon.ascon_hash(msg, variant, hlen)
+    return [("Msg", msg, mlen), ("MD", tag, hlen)]
 
 
-def kat_hash(variant="Ascon-Hash256"):
+def kat_hash(variant="Ascon-Hash256", jobs=1):
     MAX_MESSAGE_LENGTH = 1024
     hlen = 32  # =CRYPTO_BYTES
     hashtypes = {"Ascon-Hash256": "HASH",
                  "Ascon-XOF128": "HASH",  # or: XOF
                  "Ascon-CXOF128": "HASH"} # or: CXOF
     assert variant in hashtypes.keys()
-    
+
     filename = "LWC_{hashtype}_KAT_{hlenbits}".format(hashtype=hashtypes[variant], hlenbits=hlen*8)
 
-    msg = kat_bytes(MAX_MESSAGE_LENGTH)
-    with MultipleWriter(filename) as w:
-        count = 1
-        for mlen in range(MAX_MESSAGE_LENGTH+1):
-            w.open()
-            w.append("Count", count)
-            count += 1
-            w.append("Msg", msg, mlen)
-            tag = ascon.ascon_hash(msg[:mlen], variant, hlen)
-            w.append("MD", tag, hlen)
-            w.close()
-
-
-def kat_cxof(variant="Ascon-CXOF128"):
+    params = [(variant, hlen, mlen) for mlen in range(MAX_MESSAGE_LENGTH+1)]
+    write_kat(filename, hash_case, params, jobs)
+
+
+def cxof_case(variant, hlen, mlen, zlen):
+    msg    = kat_bytes(mlen)
+    custom = kat_bytes(zlen)
+    tag = ascon.ascon_hash(msg, variant, hlen, custom)
+    return [("Msg", msg, mlen), ("Z", custom, zlen), ("MD", tag, hlen)] # Z or CS?
+
+
+def kat_cxof(variant="Ascon-CXOF128", jobs=1):
     # proposed KAT format - not official reference
     MAX_MESSAGE_LENGTH = 32
     MAX_CUSTOMIZATION_LENGTH = 32
     hlen = 32  # =CRYPTO_BYTES
     cxoftypes = {"Ascon-CXOF128": "CXOF"}
     assert variant in cxoftypes.keys()
-    
+
     filename = "LWC_{cxoftype}_KAT_{hlenbits}".format(cxoftype=cxoftypes[variant], hlenbits=hlen*8)
 
-    msg    = kat_bytes(MAX_MESSAGE_LENGTH)
-    custom = kat_bytes(MAX_CUSTOMIZATION_LENGTH)
-    with MultipleWriter(filename) as w:
-        count = 1
-        for mlen in range(MAX_MESSAGE_LENGTH+1):
-            for zlen in range(MAX_CUSTOMIZATION_LENGTH+1):
-                w.open()
-                w.append("Count", count)
-                count += 1
-                w.append("Msg", msg, mlen)
-                w.append("Z", custom, zlen) # or CS?
-                tag = ascon.ascon_hash(msg[:mlen], variant, hlen, custom[:zlen])
-                w.append("MD", tag, hlen)
-                w.close()
+    params = [(variant, hlen, mlen, zlen)
+              for mlen in range(MAX_MESSAGE_LENGTH+1)
+              for zlen in range(MAX_CUSTOMIZATION_LENGTH+1)]
+    write_kat(filename, cxof_case, params, jobs)
+
+
+def auth_case(variant, klen, hlen, mlen):
+    key = kat_bytes(klen)
+    msg = kat_bytes(mlen)
+    tag = ascon.ascon_mac(key, msg, variant, hlen)
+    return [("Key", key, klen), ("Msg", msg, mlen), ("Tag", tag, hlen)]
 
 
-def kat_auth(variant="Ascon-Mac"):
+def kat_auth(variant="Ascon-Mac", jobs=1):
     MAX_MESSAGE_LENGTH = 1024
     if variant == "Ascon-PrfShort": MAX_MESSAGE_LENGTH = 16
     klen = 16
@@ -105,33 +139,28 @@ def kat_auth(variant="Ascon-Mac"):
     filename = "LWC_AUTH_KAT_{klenbits}_{hlenbits}".format(klenbits=klen*8, hlenbits=hlen*8)
     assert variant in ["Ascon-Mac", "Ascon-Prf", "Ascon-PrfShort"]
 
-    key = kat_bytes(klen)
-    msg = kat_bytes(MAX_MESSAGE_LENGTH)
-    with MultipleWriter(filename) as w:
-        count = 1
-        for mlen in range(MAX_MESSAGE_LENGTH+1):
-            w.open()
-            w.append("Count", count)
-            count += 1
-            w.append("Key", key, klen)
-            w.append("Msg", msg, mlen)
-            tag = ascon.ascon_mac(key, msg[:mlen], variant, hlen)
-            w.append("Tag", tag, hlen)
-            w.close()
-
-
-def kat(variant):
+    params = [(variant, klen, hlen, mlen) for mlen in range(MAX_MESSAGE_LENGTH+1)]
+    write_kat(filename, auth_case, params, jobs)
+
+
+def kat(variant, jobs=1):
     aead_variants = ["Ascon-AEAD128"]
     hash_variants = ["Ascon-Hash256", "Ascon-XOF128", "Ascon-CXOF128"]
     cxof_variants = ["Ascon-CXOF128"] # will produce two KATs (hash+cxof)
     auth_variants = ["Ascon-Mac", "Ascon-Prf", "Ascon-PrfShort"]
     assert variant in aead_variants + hash_variants + cxof_variants + auth_variants
-    if variant in aead_variants: kat_aead(variant)
-    if variant in hash_variants: kat_hash(variant)
-    if variant in cxof_variants: kat_cxof(variant)
-    if variant in auth_variants: kat_auth(variant)
+    if variant in aead_variants: kat_aead(variant, jobs)
+    if variant in hash_variants: kat_hash(variant, jobs)
+    if variant in cxof_variants: kat_cxof(variant, jobs)
+    if variant in auth_variants: kat_auth(variant, jobs)
 
 
 if __name__ == "__main__":
-    variant = sys.argv[1] if len(sys.argv) > 1 else "Ascon-AEAD128"
-    kat(variant)
+    parser = argparse.ArgumentParser(description="Generate Ascon KAT files")
+    parser.add_argument("variant", nargs="?", default="Ascon-AEAD128")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (1 = serial, default: one per CPU)")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    kat(args.variant, max(1, args.jobs))
+    print(f"{args.variant}: total {time.perf_counter() - start:.2f} s", file=sys.stderr)
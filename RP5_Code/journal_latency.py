@@ -0,0 +1,134 @@
+import os
+import argparse
+from event_journal import (
+    read_journal,
+    JOURNAL_FILE,
+    SAMPLE,
+    REPORT_SENT,
+    DECISION,
+    RESPONSE_RECEIVED,
+    APPLY_STARTED,
+    APPLY_FINISHED,
+    LOCAL_DECISION,
+)
+
+# ======= Configuration =======
+PERCENTILES = (50, 90, 99)
+MATCH_SLACK = 0.5  # Seconds of clock skew tolerated when matching decisions to reports
+# =============================
+
+STAGES = (
+    ("sample -> report sent", SAMPLE, REPORT_SENT),
+    ("report -> response (round trip)", REPORT_SENT, RESPONSE_RECEIVED),
+    ("response -> apply started", RESPONSE_RECEIVED, APPLY_STARTED),
+    ("local decision -> apply started", LOCAL_DECISION, APPLY_STARTED),
+    ("apply started -> finished", APPLY_STARTED, APPLY_FINISHED),
+    ("sample -> enforced (end to end)", SAMPLE, APPLY_FINISHED),
+)
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a sorted list."""
+    index = max(0, min(len(values) - 1, round(p / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def group_by_sample(events):
+    """{(run, seq): {event type: event}} of one node journal.
+
+    seq restarts with every client start, so a drop in seq begins a new
+    run; the first event of a type per sample is kept.
+    """
+    samples = {}
+    run, last_seq = 0, 0
+    for event in events:
+        if event["event"] == SAMPLE:
+            if event["seq"] <= last_seq:
+                run += 1
+            last_seq = event["seq"]
+        samples.setdefault((run, event["seq"]), {}).setdefault(event["event"], event)
+    return samples
+
+
+def node_latencies(samples):
+    """{stage: [seconds]} from one node's grouped events (monotonic clock)."""
+    latencies = {name: [] for name, _, _ in STAGES}
+    for events in samples.values():
+        for name, first, second in STAGES:
+            if first in events and second in events:
+                if second == APPLY_FINISHED and events[second]["failed"]:
+                    continue
+                delta = events[second]["mono"] - events[first]["mono"]
+                if delta >= 0:
+                    latencies[name].append(delta)
+    return latencies
+
+
+def split_round_trips(samples, decisions):
+    """(controller ms, network + crypto ms, clock offset s) per report whose
+    decision is found in the controller journal.
+
+    A decision belongs to a report when its wall time falls between the
+    node's send and receive wall times (within MATCH_SLACK); the offset
+    assumes the decision happened mid-way, like an NTP exchange.
+    """
+    results = []
+    reports = sorted(
+        [
+            (events[REPORT_SENT], events[RESPONSE_RECEIVED])
+            for events in samples.values()
+            if REPORT_SENT in events and RESPONSE_RECEIVED in events
+        ],
+        key=lambda pair: pair[0]["wall"],
+    )
+    index = 0
+    for sent, received in reports:
+        while index < len(decisions) and decisions[index]["wall"] < sent["wall"] - MATCH_SLACK:
+            index += 1
+        if index == len(decisions) or decisions[index]["wall"] > received["wall"] + MATCH_SLACK:
+            continue
+        decision = decisions[index]
+        index += 1
+        round_trip_ms = (received["mono"] - sent["mono"]) * 1000
+        offset = decision["wall"] - (sent["wall"] + received["wall"]) / 2
+        results.append((decision["value"], max(round_trip_ms - decision["value"], 0.0), offset))
+    return results
+
+
+def summarize(name, values, scale=1000.0, unit="ms"):
+    if not values:
+        print(f"  {name:<34}{'-':>6}")
+        return
+    values = sorted(values)
+    cells = "".join(f"{percentile(values, p) * scale:10.1f}" for p in PERCENTILES)
+    print(f"  {name:<34}{len(values):6d}{cells}{values[-1] * scale:10.1f} {unit}")
+
+
+def analyse(specs, server_journal=None):
+    """specs: "IP=path" of node journals (IP matches the controller's
+    decisions), or bare paths when only node-side stages are wanted."""
+    decisions = read_journal(server_journal) if server_journal and os.path.exists(server_journal) else []
+    decisions = [event for event in decisions if event["event"] == DECISION]
+    header = "".join(f"{'p' + str(p):>10}" for p in PERCENTILES)
+    for spec in specs:
+        ip, _, path = spec.rpartition("=")
+        samples = group_by_sample(read_journal(path))
+        print(f"\n=== {ip or path}: {len(samples)} samples ===")
+        print(f"  {'stage':<34}{'n':>6}{header}{'max':>10}")
+        for stage, values in node_latencies(samples).items():
+            summarize(stage, values)
+        node_decisions = [event for event in decisions if ip and event["node"] == ip]
+        if node_decisions:
+            split = split_round_trips(samples, node_decisions)
+            summarize("  controller (decrypt + decide)", [s[0] for s in split], scale=1.0)
+            summarize("  network + node crypto", [s[1] for s in split], scale=1.0)
+            summarize("  clock offset controller - node", [s[2] for s in split], unit="ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sample-to-enforcement latency from event journals")
+    parser.add_argument("journals", nargs="+", help="IP=path of a node's events.journal, or a bare path")
+    parser.add_argument("--server-journal", default=JOURNAL_FILE,
+                        help="controller journal with the decisions")
+    args = parser.parse_args()
+    analyse(args.journals, args.server_journal)
@@ -0,0 +1,300 @@
+import io
+import os
+import re
+import time
+import argparse
+import numpy as np
+from telemetry_codec import PROFILE_IDS
+
+# ======= Configuration =======
+SERVER_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.log")
+MAX_GAP = 60  # Seconds; a longer gap between samples is logger downtime
+GRID = 10  # Seconds between points of the fleet-wide aligned timeline
+PERCENTILES = (50, 90, 99)
+DWELL_BINS = (0, 10, 30, 60, 300, 900, 3600, np.inf)  # Seconds
+UNKNOWN = "Unknown"  # Before a node's first decision or while the server is down
+# =============================
+
+# "2025-04-28 17:52:30,872 - INFO - Updated 192.168.30.109 to Critical Task"
+SERVER_LINE = re.compile(
+    rb"^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),(\d{3}) - \w+ - "
+    rb"(?:Updated (\S+) to ([^\r\n]+)|(Server started|Shutdown signal received))",
+    re.M,
+)
+ONE_SECOND = np.timedelta64(1, "s")
+
+
+def _datetimes(fields):
+    """datetime64[s] from an (n, 6) array of year, month, day, h, m, s."""
+    year, month, day = (fields[:, i].astype(np.int64) for i in range(3))
+    dates = (year - 1970).astype("datetime64[Y]") + (month - 1).astype("timedelta64[M]")
+    dates = dates.astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
+    seconds = (fields[:, 3] * 3600 + fields[:, 4] * 60 + fields[:, 5]).astype(np.int64)
+    return dates.astype("datetime64[s]") + seconds.astype("timedelta64[s]")
+
+
+def _local_seconds(seconds):
+    """UTC epoch seconds -> local wall-clock seconds, each with the UTC
+    offset in force at that instant (so a DST change mid-log is honoured).
+
+    Offsets only change on quarter-hour boundaries, so localtime() runs
+    once per distinct quarter hour rather than once per record.
+    """
+    quarters, inverse = np.unique(seconds // 900, return_inverse=True)
+    offsets = np.array([time.localtime(int(q) * 900).tm_gmtoff for q in quarters], np.int64)
+    return seconds + offsets[inverse.reshape(-1)]
+
+
+def load_node_log(path):
+    """(local time datetime64[s], cpu %, ram %) arrays of a resources_log
+    CSV or binary (.rlog) log.
+
+    CSV dates and times are parsed without a per-row Python loop: the
+    separators become spaces and numpy's C loader reads all columns as
+    numbers.
+    """
+    if path.endswith(".rlog"):
+        from binary_log import load
+
+        data = load(path)
+        # Binary logs are UTC; node CSVs and server.log are local time
+        seconds = _local_seconds(data["t_ns"] // 10**9)
+        return (seconds.astype("datetime64[s]"), np.asarray(data["cpu"], np.float64),
+                np.asarray(data["ram"], np.float64))
+    with open(path, "rb") as f:
+        header = f.readline()
+        body = f.read().translate(bytes.maketrans(b"-:,", b"   "))
+    columns = [name.strip() for name in header.decode().split(",")]
+    fields = np.loadtxt(io.BytesIO(body), ndmin=2) if body.strip() else np.zeros((0, 0))
+    if fields.size == 0:
+        return np.zeros(0, "datetime64[s]"), np.zeros(0), np.zeros(0)
+    # Date and Time expand to six fields; the others shift by four
+    cpu = fields[:, columns.index("CPU (%)") + 4]
+    ram = fields[:, columns.index("RAM (%)") + 4]
+    return _datetimes(fields), cpu, ram
+
+
+def parse_server_log(path):
+    """{node ip: (times datetime64[ms], profile names)} of every decision.
+
+    Server starts and shutdowns are added to every node as UNKNOWN, since
+    nothing is enforced on their behalf while the controller is down.
+    """
+    with open(path, "rb") as f:
+        matches = SERVER_LINE.findall(f.read())
+    if not matches:
+        return {}
+    stamps = np.array([f"{m[0].decode()}.{m[1].decode()}" for m in matches], "datetime64[ms]")
+    ips = np.array([m[2].decode() for m in matches])
+    profiles = np.array([m[3].decode().strip() if m[2] else UNKNOWN for m in matches])
+    resets = ips == ""
+    timelines = {}
+    for ip in np.unique(ips[~resets]):
+        rows = (ips == ip) | resets
+        timelines[ip] = (stamps[rows], profiles[rows])
+    return timelines
+
+
+def profile_at(timeline, times):
+    """Profile enforced at each of `times` (last decision at or before it)."""
+    if timeline is None:
+        return np.full(len(times), UNKNOWN)
+    stamps, profiles = timeline
+    index = np.searchsorted(stamps, times.astype("datetime64[ms]"), side="right") - 1
+    return np.where(index >= 0, profiles[np.maximum(index, 0)], UNKNOWN)
+
+
+def sample_durations(times, max_gap=MAX_GAP):
+    """Seconds each sample stands for: the gap to the next one, with gaps
+    over max_gap (downtime) and the last sample counted as one median step."""
+    if len(times) < 2:
+        return np.full(len(times), float(GRID))
+    gaps = np.diff(times) / ONE_SECOND
+    step = float(np.median(gaps))
+    gaps = np.where(gaps > max_gap, step, gaps)
+    return np.append(gaps, step)
+
+
+def transitions(timeline):
+    """(run start times, run profiles): consecutive repeats merged."""
+    stamps, profiles = timeline
+    keep = np.ones(len(profiles), bool)
+    keep[1:] = profiles[1:] != profiles[:-1]
+    return stamps[keep], profiles[keep]
+
+
+def analyse_node(times, cpu, ram, timeline):
+    profiles = profile_at(timeline, times)
+    durations = sample_durations(times)
+    stats = {}
+    for profile in np.unique(profiles):
+        rows = profiles == profile
+        stats[profile] = {
+            "seconds": float(durations[rows].sum()),
+            "cpu": np.percentile(cpu[rows], PERCENTILES),
+            "ram": np.percentile(ram[rows], PERCENTILES),
+        }
+    counts, dwell = {}, {}
+    if timeline is not None:
+        starts, runs = transitions(timeline)
+        # The last run is still open: its dwell time is unknown
+        lengths = np.diff(starts) / np.timedelta64(1, "s")
+        for before, after in zip(runs[:-1], runs[1:]):
+            if UNKNOWN not in (before, after):
+                counts[(before, after)] = counts.get((before, after), 0) + 1
+        for profile in np.unique(runs[:-1]):
+            if profile != UNKNOWN:
+                dwell[profile] = np.histogram(lengths[runs[:-1] == profile], DWELL_BINS)[0]
+    return {"samples": len(times), "profiles": stats, "transitions": counts, "dwell": dwell}
+
+
+def align(nodes, grid=GRID, max_gap=MAX_GAP):
+    """Common timeline every `grid` s; each node contributes its last sample
+    if it is at most max_gap old (else NaN / UNKNOWN).  Returns
+    (grid times, {name: (cpu, ram, profile)})."""
+    logged = [times for times, *_ in nodes.values() if len(times)]
+    if not logged:
+        print("No samples in any node log, nothing to align")
+        return np.zeros(0, "datetime64[s]"), {}
+    start = min(times[0] for times in logged)
+    end = max(times[-1] for times in logged)
+    axis = np.arange(start, end + ONE_SECOND, np.timedelta64(grid, "s"))
+    aligned = {}
+    for name, (times, cpu, ram, timeline) in nodes.items():
+        if not len(times):
+            aligned[name] = (np.full(len(axis), np.nan), np.full(len(axis), np.nan),
+                             np.full(len(axis), UNKNOWN))
+            continue
+        index = np.searchsorted(times, axis, side="right") - 1
+        fresh = (index >= 0) & ((axis - times[np.maximum(index, 0)]) / ONE_SECOND <= max_gap)
+        index = np.maximum(index, 0)
+        aligned[name] = (
+            np.where(fresh, cpu[index], np.nan),
+            np.where(fresh, ram[index], np.nan),
+            np.where(fresh, profile_at(timeline, axis), UNKNOWN),
+        )
+    return axis, aligned
+
+
+def _profile_order(names):
+    known = [p for p in PROFILE_IDS if p in names]
+    return known + sorted(set(names) - set(known) - {UNKNOWN}) + ([UNKNOWN] if UNKNOWN in names else [])
+
+
+def report(results, axis, aligned):
+    for name, result in results.items():
+        total = sum(s["seconds"] for s in result["profiles"].values()) or 1.0
+        print(f"\n=== {name}: {result['samples']} samples, {total / 3600:.1f} h ===")
+        print(f"{'profile':<19}{'share':>7}  {'cpu p' + '/'.join(map(str, PERCENTILES)):>20}"
+              f"  {'ram p' + '/'.join(map(str, PERCENTILES)):>20}")
+        for profile in _profile_order(list(result["profiles"])):
+            s = result["profiles"][profile]
+            print(f"{profile:<19}{100 * s['seconds'] / total:6.1f}%  "
+                  f"{'/'.join(f'{v:.1f}' for v in s['cpu']):>20}  "
+                  f"{'/'.join(f'{v:.1f}' for v in s['ram']):>20}")
+        if result["transitions"]:
+            print("transitions: " + ", ".join(
+                f"{a} -> {b}: {n}" for (a, b), n in sorted(result["transitions"].items())
+            ))
+        if result["dwell"]:
+            edges = [f"<{int(e)}s" if e < 60 else f"<{int(e // 60)}m" for e in DWELL_BINS[1:-1]]
+            print(f"{'dwell':<19}" + "".join(f"{e:>7}" for e in edges + [">=1h"]))
+            for profile in _profile_order(list(result["dwell"])):
+                print(f"  {profile:<17}" + "".join(f"{n:>7}" for n in result["dwell"][profile]))
+
+    if len(aligned) > 1:
+        print(f"\n=== Fleet ({len(aligned)} nodes, {len(axis)} points every {GRID} s) ===")
+        profiles = np.stack([p for _, _, p in aligned.values()])
+        cpu = np.stack([c for c, _, _ in aligned.values()])
+        cpu = cpu[:, ~np.isnan(cpu).all(axis=0)]  # Points where some node was logging
+        print(f"mean fleet cpu {np.nanmean(cpu):.1f}%, busiest point {np.nanmean(cpu, axis=0).max():.1f}%")
+        for profile in _profile_order(list(np.unique(profiles))):
+            concurrent = (profiles == profile).sum(axis=0)
+            print(f"{profile:<19}mean {concurrent.mean():5.2f} nodes, peak {concurrent.max()}")
+
+
+def export_aligned(path, axis, aligned):
+    header = ["Time"] + [f"{name} {col}" for name in aligned for col in ("CPU (%)", "RAM (%)", "Profile")]
+    columns = [axis.astype(str)]
+    for cpu, ram, profile in aligned.values():
+        columns += [np.char.mod("%.1f", cpu), np.char.mod("%.1f", ram), profile]
+    rows = np.stack(columns, axis=1)
+    with open(path, "w", newline="") as f:
+        f.write(",".join(header) + "\r\n")
+        np.savetxt(f, rows, fmt="%s", delimiter=",", newline="\r\n")
+
+
+def analyse(specs, server_log=SERVER_LOG, aligned_out=None):
+    """specs: "IP=path" (joined with that node's decisions) or a bare path."""
+    timelines = parse_server_log(server_log) if server_log else {}
+    nodes, results = {}, {}
+    for spec in specs:
+        ip, _, path = spec.rpartition("=")
+        name = ip or path
+        times, cpu, ram = load_node_log(path)
+        order = np.argsort(times, kind="stable")  # Clock steps can reorder rows
+        times, cpu, ram = times[order], cpu[order], ram[order]
+        timeline = timelines.get(ip)
+        nodes[name] = (times, cpu, ram, timeline)
+        results[name] = analyse_node(times, cpu, ram, timeline)
+    axis, aligned = align(nodes)
+    if aligned_out:
+        export_aligned(aligned_out, axis, aligned)
+    return results, axis, aligned
+
+
+def benchmark(days=30, nodes=5, interval=10):
+    """Synthetic month of fleet logs: CSV per node plus a server.log."""
+    import tempfile
+
+    rng = np.random.default_rng(1)
+    rows = days * 86400 // interval
+    start = np.datetime64("2026-01-01T00:00:00")
+    names = list(PROFILE_IDS)
+    with tempfile.TemporaryDirectory() as tmp:
+        specs, lines = [], []
+        for n in range(nodes):
+            times = start + (np.arange(rows) * interval).astype("timedelta64[s]")
+            stamps = times.astype(str)
+            body = np.char.add(np.char.replace(stamps, "T", ","), ",")
+            values = np.char.mod("%.1f,", rng.uniform(0, 100, rows))
+            values = np.char.add(values, np.char.mod("%.1f", rng.uniform(5, 60, rows)))
+            path = os.path.join(tmp, f"node{n}.csv")
+            with open(path, "w", newline="") as f:
+                f.write("Date,Time,CPU (%),RAM (%)\r\n")
+                f.write("\r\n".join(np.char.add(body, values)) + "\r\n")
+            ip = f"10.0.0.{n + 1}"
+            specs.append(f"{ip}={path}")
+            # One decision per report, i.e. per sample
+            profiles = np.array(names)[rng.integers(0, len(names), rows)]
+            lines.append(np.char.add(
+                np.char.add(np.char.replace(stamps, "T", " "), f",000 - INFO - Updated {ip} to "),
+                profiles,
+            ))
+        server_log = os.path.join(tmp, "server.log")
+        merged = np.concatenate(lines)
+        merged.sort()
+        with open(server_log, "w") as f:
+            f.write("\n".join(merged) + "\n")
+        size = sum(os.path.getsize(os.path.join(tmp, p)) for p in os.listdir(tmp))
+
+        started = time.perf_counter()
+        analyse(specs, server_log)
+        elapsed = time.perf_counter() - started
+    print(f"{nodes} nodes x {days} days at {interval} s ({nodes * rows} samples, "
+          f"{size / 2**20:.0f} MB of logs): analysed in {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Join node resource logs with server.log decisions")
+    parser.add_argument("logs", nargs="*", help="IP=path of a node's log (CSV or .rlog), or a bare path")
+    parser.add_argument("--server-log", default=SERVER_LOG)
+    parser.add_argument("--aligned", help="write the fleet-wide aligned timeline to this CSV")
+    parser.add_argument("--benchmark", action="store_true", help="time a synthetic month of fleet logs")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark()
+    elif not args.logs:
+        parser.error("give at least one node log")
+    else:
+        report(*analyse(args.logs, args.server_log, args.aligned))
@@ -1,80 +1,188 @@
-# ****************************************************************************************
-#  File Name      : resources_log.py
-#  Version        : 1.1
-#  Description    : This script displays and logs the cpu and ram values with separate
-#                   date & time
-#  Authors        : Ahmad, Zaid, Omar
-#  Target         : Raspberry pi 4 & 5
-#  Last Updated   : 28 April 2025
-#  Libraries Used : psutil, time, csv, os
-#  Extra Notes    : Requires: psutil install
-# ****************************************************************************************
-
-import psutil
-import time
-import csv
-import os
-
-# ======= Configuration =======
-T = 10  # Time interval in seconds
-LOG_FILE = "system_stats_log.csv"
-scheduled_time_set = "19:20:00"  # <-- Set the desired start time here to start
-# =============================
-
-
-def initialize_log_file():
-    """Create log file and header if it doesn't exist."""
-    if not os.path.isfile(LOG_FILE):
-        with open(LOG_FILE, mode="w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Date", "Time", "CPU (%)", "RAM (%)"])
-
-
-def log_system_stats(current_date, current_time, cpu, ram):
-    """Append CPU and RAM stats to the CSV log file."""
-    with open(LOG_FILE, mode="a", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow([current_date, current_time, cpu, ram])
-
-
-def monitor_system():
-    """Main monitoring loop for CPU and RAM."""
-    initialize_log_file()
-
-    try:
-        print("\nSystem Resource Monitoring Started (CPU & RAM)\n")
-        while True:
-            current_date = time.strftime("%Y-%m-%d")
-            current_time = time.strftime("%H:%M:%S")
-            cpu_percent = psutil.cpu_percent()
-            ram_percent = psutil.virtual_memory().percent
-
-            print(
-                f"[DATE: {current_date}] [TIME: {current_time}] CPU: {cpu_percent:.1f}% | RAM: {ram_percent:.1f}%"
-            )
-
-            log_system_stats(current_date, current_time, cpu_percent, ram_percent)
-
-            time.sleep(T)
-
-    except KeyboardInterrupt:
-        print("\nMonitoring stopped by user.")
-    except Exception as e:
-        print(f"\nAn error occurred: {e}")
-
-
-def wait_until(start_time_str):
-    """Wait until the system clock reaches the specified start time (HH:MM:SS)."""
-    print(f"Waiting until {start_time_str} to start monitoring...")
-    while True:
-        now = time.strftime("%H:%M:%S")
-        if now >= start_time_str:
-            break
-        time.sleep(1)
-
-
-if __name__ == "__main__":
-    # Change this to your desired start time
-    scheduled_time = scheduled_time_set  # <-- Set the desired start time here to start
-    wait_until(scheduled_time)
-    monitor_system()
+# ****************************************************************************************
+#  File Name      : resources_log.py
+#  Version        : 1.5
+#  Description    : This script displays and logs the cpu and ram values with separate
+#                   date & time, averaged over each interval by a /proc sampler,
+#                   through a buffered writer rotating daily and by size, or as
+#                   fixed-width binary records (binary_log) for long runs.
+#                   HIGH_RES mode records per-core and per-process samples every 100 ms
+#  Authors        : Ahmad, Zaid, Omar
+#  Target         : Raspberry pi 4 & 5
+#  Last Updated   : 19 October 2026
+#  Libraries Used : os, time, threading, proc_sampler, csv_logger, binary_log
+#  Extra Notes    : Reads /proc directly (Linux only)
+# ****************************************************************************************
+
+import os
+import time
+import threading
+from proc_sampler import ProcSampler, ProcessSampler
+from csv_logger import RotatingCsvWriter, exit_on_sigterm
+from binary_log import BinaryLogWriter, RecordRing
+
+# ======= Configuration =======
+T = 10  # Time interval in seconds
+LOG_FILE = "system_stats_log.csv"
+LOG_HEADER = ["Date", "Time", "CPU (%)", "RAM (%)"]
+FLUSH_INTERVAL = 60  # Seconds of rows that may be lost on a power cut
+MAX_LOG_BYTES = 16 * 1024 * 1024  # Rotate within a day past this size
+# "binary" appends records loadable with binary_log.load(); export them to
+# CSV with `python binary_log.py export system_stats_log.rlog`
+LOG_FORMAT = "csv"
+BINARY_LOG_FILE = "system_stats_log.rlog"
+LOG_PER_CORE = True  # Binary only: one column per core
+LOG_NETWORK = True  # Binary only: rx/tx Mbps columns
+# High-resolution mode: per-core, network and watched-process samples every
+# HIGH_RES_INTERVAL into a binary log, to catch short spikes (nft reloads,
+# decrypt bursts) that 10 s means hide
+HIGH_RES = False
+HIGH_RES_INTERVAL = 0.1
+HIGH_RES_LOG = "system_stats_hires.rlog"
+WATCHED_PROCESSES = ("client-socket.py", "RP5_CENTRAL.py", "nft", "suricata")
+RING_CAPACITY = 1200  # Records buffered in memory (2 min at 100 ms)
+BATCH_INTERVAL = 5  # Seconds between batched writes of the ring to the log
+scheduled_time_set = "19:20:00"  # <-- Set the desired start time here to start
+# =============================
+
+
+def open_log(cores=0):
+    """Long-lived writer; creates the log file and header if needed."""
+    if LOG_FORMAT == "binary":
+        return BinaryLogWriter(
+            BINARY_LOG_FILE, cores if LOG_PER_CORE else 0, LOG_NETWORK, FLUSH_INTERVAL
+        )
+    return RotatingCsvWriter(LOG_FILE, LOG_HEADER, FLUSH_INTERVAL, MAX_LOG_BYTES)
+
+
+def log_system_stats(log, now, cpu, ram, snap=None):
+    """Append CPU and RAM stats (and, in binary logs, per-core and network
+    columns from the sampler snapshot) to the log file; returns the date
+    and time strings of `now` (epoch seconds)."""
+    tm = time.localtime(now)
+    if isinstance(log, BinaryLogWriter):
+        log.append(
+            int(now * 1e9), cpu, ram,
+            snap["per_core"] if snap else (),
+            (snap["rx_bps"]["mean"] or 0.0) / 1e6 if snap else 0.0,
+            (snap["tx_bps"]["mean"] or 0.0) / 1e6 if snap else 0.0,
+        )
+        return time.strftime("%Y-%m-%d", tm), time.strftime("%H:%M:%S", tm)
+    current_date, current_time = log.stamp(tm)
+    log.writerow([current_date, current_time, cpu, ram], tm)
+    return current_date, current_time
+
+
+def monitor_system():
+    """Main monitoring loop for CPU and RAM."""
+    exit_on_sigterm()  # Flush buffered rows when stopped by systemd/kill
+    sampler = ProcSampler().start()
+    log = open_log(os.cpu_count() or 0)
+
+    try:
+        print("\nSystem Resource Monitoring Started (CPU & RAM)\n")
+        while True:
+            time.sleep(T)
+            now = time.time()
+            # Mean over the interval; does not block like psutil.cpu_percent(t)
+            snap = sampler.snapshot(reset=True)
+            cpu_percent = round(snap["cpu"]["mean"], 1)
+            ram_percent = round(snap["ram"]["mean"], 1)
+
+            current_date, current_time = log_system_stats(log, now, cpu_percent, ram_percent, snap)
+
+            print(
+                f"[DATE: {current_date}] [TIME: {current_time}] CPU: {cpu_percent:.1f}% | RAM: {ram_percent:.1f}%"
+            )
+
+    except KeyboardInterrupt:
+        print("\nMonitoring stopped by user.")
+    except Exception as e:
+        print(f"\nAn error occurred: {e}")
+    finally:
+        sampler.stop()
+        log.close()
+
+
+def monitor_high_res():
+    """100 ms sampling of per-core CPU, RAM, network and watched processes.
+
+    The sampling loop only reads the already open /proc handles and packs
+    a record into a preallocated ring; a flusher thread writes the ring to
+    HIGH_RES_LOG every BATCH_INTERVAL, so disk latency never delays a tick.
+    """
+    exit_on_sigterm()
+    sampler = ProcSampler(interval=HIGH_RES_INTERVAL)  # Read directly, no thread
+    processes = ProcessSampler(WATCHED_PROCESSES)
+    cores = len(sampler.read_cpu_times()) - 1
+    log = BinaryLogWriter(HIGH_RES_LOG, cores, True, FLUSH_INTERVAL, WATCHED_PROCESSES)
+    ring = RecordRing(log.record.format, RING_CAPACITY)
+    stopping = threading.Event()
+
+    def flusher():
+        while not stopping.wait(BATCH_INTERVAL):
+            log.write_records(ring.drain())
+
+    writer = threading.Thread(target=flusher, daemon=True)
+    writer.start()
+    busy = 0.0  # CPU seconds spent sampling
+    started = next_tick = time.monotonic()
+    next_print = started + T
+    try:
+        print(f"\nHigh-resolution monitoring every {HIGH_RES_INTERVAL * 1000:.0f} ms "
+              f"({cores} cores, watching {', '.join(WATCHED_PROCESSES)})\n")
+        while True:
+            tick_start = time.thread_time()
+            now = time.monotonic()
+            sampler.sample()
+            per_core = sampler.per_core + [0.0] * (cores - len(sampler.per_core))
+            values = [time.time_ns(), sampler.cpu.last, sampler.ram.last, *per_core[:cores],
+                      sampler.traffic.rx_bps.last / 1e6, sampler.traffic.tx_bps.last / 1e6]
+            for process_cpu, rss_mb in processes.sample(now):
+                values += [process_cpu, rss_mb]
+            ring.append(*values)
+            busy += time.thread_time() - tick_start
+
+            if now >= next_print:
+                snap = sampler.snapshot(reset=True)
+                print(
+                    f"[TIME: {time.strftime('%H:%M:%S')}] CPU mean {snap['cpu']['mean']:.1f}% "
+                    f"peak {snap['cpu']['max']:.1f}% | RAM {snap['ram']['last']:.1f}% | "
+                    f"overhead {100 * busy / (now - started):.2f}% of a core, "
+                    f"{ring.dropped} records dropped"
+                )
+                next_print += T
+            next_tick += HIGH_RES_INTERVAL
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()  # Overran: skip, do not burst
+    except KeyboardInterrupt:
+        print("\nMonitoring stopped by user.")
+    finally:
+        stopping.set()
+        writer.join()
+        log.write_records(ring.drain())
+        log.close()
+        processes.close()
+        sampler.stop()
+
+
+def wait_until(start_time_str):
+    """Wait until the system clock reaches the specified start time (HH:MM:SS)."""
+    print(f"Waiting until {start_time_str} to start monitoring...")
+    while True:
+        now = time.strftime("%H:%M:%S")
+        if now >= start_time_str:
+            break
+        time.sleep(1)
+
+
+if __name__ == "__main__":
+    # Change this to your desired start time
+    scheduled_time = scheduled_time_set  # <-- Set the desired start time here to start
+    wait_until(scheduled_time)
+    if HIGH_RES:
+        monitor_high_res()
+    else:
+        monitor_system()
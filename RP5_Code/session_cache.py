@@ -0,0 +1,45 @@
+import threading
+from collections import OrderedDict
+
+# ======= Configuration =======
+MAX_SESSIONS = 100_000  # Nodes whose derived keys stay cached
+# =============================
+
+
+class SessionCache:
+    """Bounded LRU of derived session keys keyed by node id.
+
+    Each entry holds the current session and the one it replaced, so reports
+    encrypted just before a key rotation still verify. HKDF therefore runs
+    once per handshake instead of once per message.
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.next_epoch = 1
+        self.evictions = 0
+
+    def install(self, node_id, session):
+        """Make `session` current for `node_id`, keeping the previous one."""
+        with self.lock:
+            session.epoch = self.next_epoch
+            self.next_epoch += 1
+            entry = self.entries.pop(node_id, None)
+            self.entries[node_id] = (session, entry[0] if entry else None)
+            if len(self.entries) > self.max_sessions:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def candidates(self, node_id):
+        """Current and previous session for `node_id`, newest first."""
+        with self.lock:
+            entry = self.entries.get(node_id)
+            if entry is None:
+                return []
+            self.entries.move_to_end(node_id)
+            return [s for s in entry if s is not None]
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# The modules are flat scripts next to this directory, not a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def master_key(tmp_path, monkeypatch):
+    """Run in a scratch directory with a fresh key.conf and no cached keys."""
+    import encryption_decryption
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "key.conf").write_text("ASCON_KEY=" + "0f" * 32 + "\n")
+    monkeypatch.setattr(encryption_decryption, "_master_key", None)
+    monkeypatch.setattr(encryption_decryption, "_bootstrap", None)
+    return tmp_path
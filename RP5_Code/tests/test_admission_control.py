@@ -0,0 +1,127 @@
+import os
+import socket
+import time
+
+import pytest
+
+import admission_control
+from admission_control import AdmissionController
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(admission_control, "time", clock)
+    return clock
+
+
+def admit(ac, ip):
+    if ac.try_admit(ip):
+        ac.release()
+        return True
+    return False
+
+
+def test_burst_then_sustained_rate(clock):
+    ac = AdmissionController(rate=2, burst=3, max_strikes=100)
+    assert [admit(ac, "10.0.0.1") for _ in range(4)] == [True, True, True, False]
+    clock.now += 0.5  # One token back at 2/s
+    assert admit(ac, "10.0.0.1")
+    assert not admit(ac, "10.0.0.1")
+    assert admit(ac, "10.0.0.2")  # Other sources are unaffected
+    assert ac.stats()["shed_rate"] == 2
+
+
+def test_strikes_block_until_expiry(clock):
+    ac = AdmissionController(rate=1, burst=5, max_strikes=3, block_seconds=60)
+    for _ in range(3):
+        ac.penalize("10.0.0.66")
+    assert not admit(ac, "10.0.0.66")
+    assert ac.stats()["blocks"] == 1
+    clock.now += 61
+    assert admit(ac, "10.0.0.66")
+
+
+def test_rate_violations_count_as_strikes(clock):
+    ac = AdmissionController(rate=1, burst=1, max_strikes=2, block_seconds=60)
+    assert admit(ac, "10.0.0.66")
+    assert not admit(ac, "10.0.0.66")
+    assert not admit(ac, "10.0.0.66")  # Second strike: blocked
+    clock.now += 30
+    assert not admit(ac, "10.0.0.66")
+    assert ac.stats()["shed_blocked"] == 1
+
+
+def test_concurrency_budget(clock):
+    ac = AdmissionController(max_concurrent=2)
+    assert ac.try_admit("10.0.0.1") and ac.try_admit("10.0.0.2")
+    assert not ac.try_admit("10.0.0.3")
+    ac.release()
+    assert ac.try_admit("10.0.0.3")
+    assert ac.stats()["shed_busy"] == 1
+
+
+def test_frames_drain_the_bucket_without_strikes(clock):
+    ac = AdmissionController(rate=1, burst=2, max_strikes=1)
+    assert ac.try_admit("10.0.0.1")
+    assert [ac.charge("10.0.0.1", cost=0.5) for _ in range(3)] == [True, True, False]
+    assert ac.stats()["shed_frames"] == 1
+    assert ac.stats()["blocks"] == 0
+    clock.now += 1
+    assert ac.charge("10.0.0.1", cost=0.5)
+
+
+def test_tracked_sources_are_bounded(clock):
+    ac = AdmissionController(max_sources=3)
+    for i in range(10):
+        admit(ac, f"10.0.0.{i}")
+    assert ac.stats()["tracked_sources"] == 3
+    for i in range(10):
+        ac.penalize(f"10.0.1.{i}")
+    assert ac.stats()["tracked_sources"] == 3
+
+
+def test_read_message_deadline_stops_tricklers():
+    from encryption_decryption import read_message
+
+    server, client = socket.socketpair()
+    with server, client:
+        server.settimeout(5)
+        start = time.monotonic()
+        client.sendall(b"AF")  # A preamble that never completes
+        with pytest.raises(socket.timeout):
+            read_message(server, deadline=start + 0.2)
+        assert time.monotonic() - start < 1
+        assert server.gettimeout() == 5
+
+
+def test_connection_serves_at_most_max_frames(master_key, monkeypatch):
+    import RP5_CENTRAL
+    from encryption_decryption import MSG_HELLO, encrypt
+
+    monkeypatch.setattr(RP5_CENTRAL, "EVENT_JOURNAL", False)
+    monkeypatch.setattr(RP5_CENTRAL, "MAX_FRAMES", 2)
+    server = RP5_CENTRAL.CentralServer()
+    assert server.admission.try_admit("127.0.0.1")
+    conn, client = socket.socketpair()
+    with client:
+        for _ in range(3):
+            client.sendall(encrypt(os.urandom(16), msg_type=MSG_HELLO))
+        server.handle_client(conn, ("127.0.0.1", 40000))
+        client.settimeout(1)
+        replies = b""
+        try:
+            while chunk := client.recv(4096):
+                replies += chunk
+        except ConnectionResetError:
+            pass  # The third handshake was never read
+    # Two handshakes answered, then the connection was closed
+    assert replies.count(b"AF\x03\x02") == 2
@@ -0,0 +1,84 @@
+import pytest
+
+from event_journal import (
+    APPLY_FINISHED,
+    APPLY_STARTED,
+    DECISION,
+    FLAG_FAILED,
+    HEADER,
+    MAGIC,
+    LAYOUT_VERSION,
+    RECORD,
+    REPORT_SENT,
+    RESPONSE_RECEIVED,
+    SAMPLE,
+    EventJournal,
+    ip_to_int,
+    read_journal,
+)
+from journal_latency import group_by_sample, node_latencies, split_round_trips
+
+
+def write_journal(path, records):
+    """A journal file from (event, seq, wall s, mono s, value[, node]) tuples."""
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, LAYOUT_VERSION, RECORD.size))
+        for event, seq, wall, mono, value, *node in records:
+            f.write(RECORD.pack(event, 0, 0, ip_to_int(node[0] if node else None), seq,
+                                round(wall * 1e9), round(mono * 1e9), value))
+
+
+def test_write_read_round_trip(tmp_path):
+    path = str(tmp_path / "events.journal")
+    with EventJournal(path, batch=2) as journal:
+        journal.record(SAMPLE, 1, value=42.5)
+        journal.record(DECISION, 1, node="10.0.0.7", profile="Critical Task", value=3.25)
+        journal.record(APPLY_FINISHED, 2**32 + 2, profile="Bogus", flags=FLAG_FAILED)
+        assert len(read_journal(path)) == 2  # Third record still buffered
+    events = read_journal(path)
+    assert [e["event"] for e in events] == [SAMPLE, DECISION, APPLY_FINISHED]
+    assert events[0]["value"] == 42.5 and events[0]["node"] is None
+    assert events[1]["node"] == "10.0.0.7" and events[1]["profile"] == "Critical Task"
+    assert events[2]["seq"] == 2 and events[2]["failed"] and events[2]["profile"] is None
+    assert events[0]["mono"] <= events[1]["mono"] <= events[2]["mono"]
+
+    with EventJournal(path) as journal:  # Reopening appends without a new header
+        journal.record(SAMPLE, 3)
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02")  # Torn record
+    assert len(read_journal(path)) == 4
+
+
+def test_foreign_file_is_rejected(tmp_path):
+    path = tmp_path / "events.journal"
+    path.write_bytes(b"EVTJ\x02" + bytes(RECORD.size))
+    with pytest.raises(ValueError):
+        read_journal(str(path))
+
+
+def test_split_round_trips(tmp_path):
+    node, server = str(tmp_path / "node.journal"), str(tmp_path / "server.journal")
+    # The controller clock runs 0.2 s ahead; node mono = wall - 1000
+    write_journal(node, [
+        (SAMPLE, 1, 1010.0, 10.0, 30.0),
+        (REPORT_SENT, 1, 1010.1, 10.1, 0.0),
+        (RESPONSE_RECEIVED, 1, 1010.15, 10.15, 0.0),
+        (APPLY_STARTED, 1, 1010.16, 10.16, 0.0),
+        (APPLY_FINISHED, 1, 1010.2, 10.2, 40.0),
+        (SAMPLE, 2, 1020.0, 20.0, 30.0),
+        (REPORT_SENT, 2, 1020.1, 20.1, 0.0),
+        (RESPONSE_RECEIVED, 2, 1020.2, 20.2, 0.0),  # Decision not journaled
+        (SAMPLE, 1, 1030.0, 30.0, 30.0),  # Client restart: a new run
+    ])
+    write_journal(server, [(DECISION, 0, 1010.325, 5.0, 10.0, "10.0.0.7")])
+
+    samples = group_by_sample(read_journal(node))
+    assert sorted(samples) == [(0, 1), (0, 2), (1, 1)]
+    latencies = node_latencies(samples)
+    assert latencies["sample -> enforced (end to end)"] == [pytest.approx(0.2)]
+    assert latencies["report -> response (round trip)"] == [pytest.approx(0.05), pytest.approx(0.1)]
+
+    [(controller_ms, network_ms, offset)] = split_round_trips(samples, read_journal(server))
+    assert controller_ms == 10.0
+    assert network_ms == pytest.approx(40.0)
+    assert offset == pytest.approx(0.2)
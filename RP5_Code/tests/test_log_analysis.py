@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from binary_log import BinaryLogWriter  # noqa: E402
+from log_analysis import UNKNOWN, align, analyse, load_node_log, parse_server_log  # noqa: E402
+
+# 2026-10-24 12:00 UTC, the day before Europe/Berlin falls back to CET
+BEFORE_DST_END = 1792843200
+
+
+@pytest.fixture
+def berlin(monkeypatch):
+    monkeypatch.setenv("TZ", "Europe/Berlin")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.fixture
+def node_csv(tmp_path):
+    path = tmp_path / "node.csv"
+    path.write_text(
+        "Date,Time,CPU (%),RAM (%)\r\n"
+        "2026-03-02,10:00:00,12.5,40.0\r\n"
+        "2026-03-02,10:00:10,80.0,41.0\r\n"
+        "2026-03-02,10:00:20,81.0,42.0\r\n"
+    )
+    return str(path)
+
+
+@pytest.fixture
+def server_log(tmp_path):
+    path = tmp_path / "server.log"
+    path.write_text(
+        "2026-03-02 09:59:00,000 - INFO - Server started on 0.0.0.0:9999\n"
+        "2026-03-02 10:00:05,250 - INFO - Updated 10.0.0.7 to High Activity\n"
+    )
+    return str(path)
+
+
+def test_rlog_uses_each_records_utc_offset(tmp_path, berlin):
+    path = str(tmp_path / "node.rlog")
+    with BinaryLogWriter(path) as log:
+        log.append(BEFORE_DST_END * 10**9, 10.0, 20.0)
+        log.append((BEFORE_DST_END + 2 * 86400) * 10**9, 30.0, 40.0)
+    times, cpu, _ = load_node_log(path)
+    assert times.astype(str).tolist() == ["2026-10-24T14:00:00", "2026-10-26T13:00:00"]
+    assert cpu.tolist() == [10.0, 30.0]
+
+
+def test_csv_and_server_log_are_joined(node_csv, server_log):
+    times, cpu, ram = load_node_log(node_csv)
+    assert times[0] == np.datetime64("2026-03-02T10:00:00")
+    assert cpu.tolist() == [12.5, 80.0, 81.0]
+    timelines = parse_server_log(server_log)
+    assert timelines["10.0.0.7"][1].tolist() == [UNKNOWN, "High Activity"]
+
+    results, axis, aligned = analyse([f"10.0.0.7={node_csv}"], server_log)
+    assert len(axis) == 3
+    assert aligned["10.0.0.7"][2].tolist() == [UNKNOWN, "High Activity", "High Activity"]
+    assert results["10.0.0.7"]["profiles"]["High Activity"]["seconds"] == 20.0
+
+
+def test_align_empty_and_partly_empty_logs(tmp_path, node_csv, capsys):
+    empty = tmp_path / "empty.csv"
+    empty.write_text("Date,Time,CPU (%),RAM (%)\r\n")
+    axis, aligned = align({"a": (*load_node_log(str(empty)), None)})
+    assert len(axis) == 0 and aligned == {}
+    assert "nothing to align" in capsys.readouterr().out
+
+    axis, aligned = align({"a": (*load_node_log(str(empty)), None),
+                           "b": (*load_node_log(node_csv), None)})
+    assert len(axis) == 3
+    assert np.isnan(aligned["a"][0]).all()
+    assert aligned["b"][0].tolist() == [12.5, 80.0, 81.0]
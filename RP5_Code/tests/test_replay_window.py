@@ -0,0 +1,44 @@
+from replay_window import ReplayWindow
+
+
+def test_duplicates_rejected_and_out_of_order_accepted():
+    window = ReplayWindow(window_bits=8)
+    assert window.accept("node", 5)
+    assert window.accept("node", 3)
+    assert window.accept("node", 4)
+    assert not window.accept("node", 5)
+    assert not window.accept("node", 3)
+    assert window.replays == 2
+
+
+def test_counters_behind_the_window_are_rejected():
+    window = ReplayWindow(window_bits=8)
+    assert window.accept("node", 100)
+    assert window.accept("node", 93)  # 7 behind: last slot of the window
+    assert not window.accept("node", 92)  # 8 behind: too old to tell
+    assert window.accept("node", 101)
+    assert not window.accept("node", 93)
+
+
+def test_is_replay_does_not_record():
+    window = ReplayWindow()
+    assert not window.is_replay("node", 1)
+    assert not window.is_replay("node", 1)
+    assert window.accept("node", 1)
+    assert window.is_replay("node", 1)
+
+
+def test_sessions_are_independent():
+    window = ReplayWindow()
+    assert window.accept(1, 7)
+    assert window.accept(2, 7)
+    assert not window.accept(1, 7)
+
+
+def test_least_recently_seen_session_is_evicted():
+    window = ReplayWindow(max_nodes=2)
+    assert window.accept("a", 1)
+    assert window.accept("b", 1)
+    assert window.accept("a", 2)  # "b" is now the least recently seen
+    assert window.accept("c", 1)
+    assert set(window.windows) == {"a", "c"}
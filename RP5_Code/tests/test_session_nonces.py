@@ -0,0 +1,129 @@
+import os
+
+import pytest
+
+import encryption_decryption as wire
+from encryption_decryption import MSG_HELLO, decrypt, derive_session, encrypt
+from telemetry_codec import encode_report
+
+REPORT = {"cpu": 42.0, "ram": 30.0, "traffic": 1.0, "current_profile": "Idle",
+          "source_ip": "10.0.0.7", "source_port": 40000}
+
+
+@pytest.fixture
+def nonces(monkeypatch):
+    """(key, nonce) of every Ascon encryption made during the test."""
+    seen = []
+    real_encrypt = wire.ascon.ascon_encrypt
+
+    def recording_encrypt(key, nonce, associateddata, plaintext, variant):
+        seen.append((key, nonce))
+        return real_encrypt(key, nonce, associateddata, plaintext, variant)
+
+    monkeypatch.setattr(wire.ascon, "ascon_encrypt", recording_encrypt)
+    return seen
+
+
+def test_session_keys_depend_on_node_and_both_nonces(master_key):
+    client, server = os.urandom(16), os.urandom(16)
+    base = derive_session(7, client, server)
+    assert derive_session(7, client, server).aead_key == base.aead_key
+    others = [
+        derive_session(8, client, server),
+        derive_session(7, os.urandom(16), server),
+        derive_session(7, client, os.urandom(16)),
+    ]
+    keys = {base.aead_key, base.header_key}
+    for session in others:
+        keys |= {session.aead_key, session.header_key}
+    assert len(keys) == 2 * (len(others) + 1)
+
+
+def test_no_key_and_nonce_pair_is_used_twice(master_key, nonces):
+    session = derive_session(7, os.urandom(16), os.urandom(16))
+    for _ in range(50):
+        message = encrypt(encode_report(REPORT), session=session)
+        _, sender, counter = wire.message_info(message)
+        # The reply reuses the counter but not the message type
+        encrypt({"profile": "Idle"}, reply_to=(sender, counter), session=session)
+    for _ in range(5):
+        encrypt(os.urandom(16), msg_type=MSG_HELLO)
+    assert len(nonces) == 105
+    assert len(set(nonces)) == len(nonces)
+
+
+def test_round_trip_and_tamper_detection(master_key):
+    session = derive_session(7, os.urandom(16), os.urandom(16))
+    message = encrypt({"profile": "Idle"}, session=session)
+    assert decrypt(message, session=session) == {"profile": "Idle"}
+    tampered = bytearray(message)
+    tampered[-1] ^= 1
+    assert decrypt(bytes(tampered), session=session) is None
+    other = derive_session(7, os.urandom(16), os.urandom(16))
+    assert decrypt(message, session=other) is None
+
+
+class RecordingConn:
+    def __init__(self):
+        self.sent = []
+
+    def sendall(self, data):
+        self.sent.append(data)
+
+
+def test_server_never_answers_unauthenticated_reports(master_key, monkeypatch):
+    import RP5_CENTRAL
+
+    monkeypatch.setattr(RP5_CENTRAL, "EVENT_JOURNAL", False)
+    server = RP5_CENTRAL.CentralServer()
+    session = derive_session(7, os.urandom(16), os.urandom(16))
+    genuine = encrypt(encode_report(REPORT), session=session)
+    forged = bytearray(genuine)
+    forged[-1] ^= 1
+    conn = RecordingConn()
+    addr = ("10.0.0.7", 40000)
+
+    server.handle_report(conn, addr, bytes(forged), session)
+    assert conn.sent == []
+    server.handle_report(conn, addr, genuine, session)
+    assert len(conn.sent) == 1
+    assert decrypt(conn.sent[0], session=session)["profile"] == "Low Activity"
+    server.handle_report(conn, addr, genuine, session)  # Replay
+    assert len(conn.sent) == 1
+
+
+def test_server_error_reply_consumes_the_counter(master_key, monkeypatch):
+    import RP5_CENTRAL
+
+    monkeypatch.setattr(RP5_CENTRAL, "EVENT_JOURNAL", False)
+    server = RP5_CENTRAL.CentralServer()
+    session = derive_session(7, os.urandom(16), os.urandom(16))
+    report = {k: v for k, v in REPORT.items() if k != "source_ip"}
+    message = encrypt(encode_report(report, use_json=True), session=session)
+    conn = RecordingConn()
+
+    server.handle_report(conn, ("10.0.0.7", 40000), message, session)
+    assert "error" in decrypt(conn.sent[0], session=session)
+    server.handle_report(conn, ("10.0.0.7", 40000), message, session)
+    assert len(conn.sent) == 1
+
+
+def test_hello_replayed_after_restart_is_refused(master_key, monkeypatch):
+    import RP5_CENTRAL
+
+    monkeypatch.setattr(RP5_CENTRAL, "EVENT_JOURNAL", False)
+    addr = ("10.0.0.7", 40000)
+    server = RP5_CENTRAL.CentralServer()
+    hello = encrypt(os.urandom(wire.SESSION_NONCE_SIZE), msg_type=MSG_HELLO)
+    conn = RecordingConn()
+    assert server.handle_hello(conn, addr, hello)
+    assert not server.handle_hello(conn, addr, hello)
+
+    # A restart loses the in-memory replay window
+    restarted = RP5_CENTRAL.CentralServer()
+    assert not restarted.handle_hello(conn, addr, hello)
+    assert len(conn.sent) == 1
+    assert restarted.sessions.candidates(wire.message_info(hello)[1]) == []
+
+    fresh = encrypt(os.urandom(wire.SESSION_NONCE_SIZE), msg_type=MSG_HELLO)
+    assert restarted.handle_hello(conn, addr, fresh)